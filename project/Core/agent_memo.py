@@ -0,0 +1,40 @@
+# Memoized agent outputs
+from collections import Counter
+
+class AgentMemo:
+    """
+    Keeps the output of report agents (summary, USPs, issues, trend) per (product, memory version, agent,
+    model), so re-rendering a page never calls the LLM again for a memory that has not changed. Any update
+    to the memory bumps `ProductMemory.version`, which makes older entries unreachable; `invalidate` drops
+    everything, e.g. when a new dataset is uploaded.
+    """
+    def __init__(self):
+        """Initializes an empty memo and its counters."""
+        self.results = {}
+        self.stats = Counter()
+
+    @staticmethod
+    def key(product_memory, agent_name: str, model: str) -> tuple:
+        """Returns the memo key of an agent's output for the current state of a product memory."""
+        return (product_memory.product_name, product_memory.version, agent_name, model)
+
+    def has(self, key: tuple) -> bool:
+        """Returns True if an output is memoized under `key`."""
+        return key in self.results
+
+    def get_or_run(self, key: tuple, run, refresh: bool = False):
+        """Returns the memoized output for `key`, calling `run()` only on a miss or when `refresh` is set."""
+        if refresh or key not in self.results:
+            self.stats["runs"] += 1
+            # Outputs of older versions of the same product/agent/model can never be hit again
+            product, _, agent_name, model = key
+            for stale in [k for k in self.results if k[0] == product and k[2:] == (agent_name, model)]:
+                del self.results[stale]
+            self.results[key] = run()
+        else:
+            self.stats["hits"] += 1
+        return self.results[key]
+
+    def invalidate(self) -> None:
+        """Drops every memoized output."""
+        self.results.clear()
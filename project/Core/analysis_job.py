@@ -0,0 +1,126 @@
+# Background analysis jobs
+import threading
+import time
+from Core.telemetry import telemetry
+
+class AnalysisJob:
+    """
+    Runs `MultiAgent.create_product_memory_from_stream` on a background thread so the caller (the
+    Streamlit script) stays responsive. The engine reports every applied unit through `advance`, which
+    feeds the progress counters and, at most every `view_interval` seconds, a small read-only view of the
+    partial product memory. `cancel` stops the engine from starting new requests; requests already in
+    flight are applied, so the memory keeps everything processed up to that point.
+    The job runs on its own `product_worker` copy of the agent, so a cancelled job still draining and the
+    job of a new upload never share ingestion state (attached job, shared results, local tier counters,
+    escalation budget); the worker's counters stay readable as `job.agent` once the job is done.
+    """
+    def __init__(self, agent, source, filename: str = None, view_interval: float = 1.0, **kwargs):
+        """`kwargs` are passed on to `create_product_memory_from_stream`."""
+        self.agent = agent.product_worker()
+        self.source = source
+        self.filename = filename
+        self.view_interval = view_interval
+        self.kwargs = kwargs
+        self.status = "pending"
+        self.error = None
+        self.total = None
+        self.done = 0
+        self.started_at = None
+        self.finished_at = None
+        self.product_memory = None
+        self.tasks = None
+        self.quality_parameter = None
+        self.memory_view = None
+        self._last_view = 0.0
+        self.telemetry_mark = {}
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self.run, name=f"analysis-{filename or 'job'}", daemon=True)
+
+    def start(self) -> "AnalysisJob":
+        """Starts the job thread and returns the job."""
+        self.started_at = time.monotonic()
+        self.telemetry_mark = telemetry.mark()
+        self.status = "preparing"
+        self._thread.start()
+        return self
+
+    def run(self) -> None:
+        """Job thread body: runs the analysis and records its outcome."""
+        self.agent.job = self
+        try:
+            product_memory, tasks, quality_parameter = self.agent.create_product_memory_from_stream(self.source, filename=self.filename, **self.kwargs)
+            self.product_memory, self.tasks, self.quality_parameter = product_memory, tasks, quality_parameter
+            self.memory_view = self.view_of(product_memory)
+            self.status = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            print(f"Analysis job failed: {str(e)}")
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            self.agent.job = None
+            self.finished_at = time.monotonic()
+
+    def set_total(self, total) -> None:
+        """Called by the engine once the number of reviews to analyze is known (None if unknown)."""
+        self.total = total
+        self.status = "analyzing"
+
+    def advance(self, reviews: int, product_memory) -> bool:
+        """Called by the engine after each applied unit; returns False once the job has been cancelled."""
+        self.done += reviews
+        now = time.monotonic()
+        if now - self._last_view >= self.view_interval:
+            self.memory_view = self.view_of(product_memory)
+            self._last_view = now
+        return not self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Asks the engine to stop after the requests already in flight."""
+        self._cancel.set()
+        if self.is_running():
+            self.status = "cancelling"
+
+    def cancelled(self) -> bool:
+        """Returns True once cancellation has been requested."""
+        return self._cancel.is_set()
+
+    def is_running(self) -> bool:
+        """Returns True while the job thread is alive."""
+        return self._thread.is_alive()
+
+    def join(self, timeout: float = None) -> None:
+        """Waits for the job thread to finish."""
+        self._thread.join(timeout)
+
+    @staticmethod
+    def view_of(product_memory) -> dict:
+        """Returns a small, detached view of a (partial) product memory."""
+        return {
+            "product_name": product_memory.product_name,
+            "overall_sentiment_trend": product_memory.get_sentiment_trend(),
+            "sentiment_distribution": dict(product_memory.stats),
+            "top_usps": product_memory.usps.most_common(5),
+            "top_issues": product_memory.issues.most_common(5)
+        }
+
+    def cost(self) -> float:
+        """Returns the USD cost of the LLM calls made since the job started (process-wide telemetry)."""
+        return telemetry.totals(self.telemetry_mark)["cost_usd"]
+
+    def progress(self) -> dict:
+        """Returns the job status with reviews done, throughput (reviews/s), ETA (s) and cost so far."""
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        throughput = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done if self.total is not None else None
+        eta = remaining / throughput if remaining is not None and throughput > 0 and self.is_running() else None
+        return {
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "elapsed_seconds": round(elapsed, 1),
+            "throughput": round(throughput, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "cost_usd": round(self.cost(), 4),
+            "error": self.error
+        }
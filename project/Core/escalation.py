@@ -0,0 +1,53 @@
+# Per-run budget for re-running LLM calls on a stronger model or retrying them
+import threading
+
+class EscalationBudget:
+    """
+    Caps how many first-tier LLM results of a run may be recomputed (escalated to a stronger model, or
+    retried). Every first-tier result is `observe`d, and escalations are allowed up to `rate` of them plus
+    `burst`, so the few calls at the start of a run can escalate too; `limit` is an optional absolute cap.
+    Worst-case cost is therefore about (1 + rate) times the first-tier cost plus `burst` calls.
+    """
+    def __init__(self, rate: float = 0.1, limit: int = None, burst: int = 5):
+        """Initializes an unused budget."""
+        self.rate = rate
+        self.limit = limit
+        self.burst = burst
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts a new run."""
+        with self._lock:
+            self.observed = 0
+            self.spent = 0
+            self.denied = 0
+
+    def copy(self) -> "EscalationBudget":
+        """Returns an unused budget with the same limits."""
+        return EscalationBudget(self.rate, self.limit, self.burst)
+
+    def observe(self, results: int = 1) -> None:
+        """Counts first-tier results, which earn escalation allowance."""
+        with self._lock:
+            self.observed += results
+
+    def allowance(self) -> int:
+        """Returns the number of escalations allowed so far in this run."""
+        allowed = int(self.rate * self.observed) + self.burst
+        return allowed if self.limit is None else min(allowed, self.limit)
+
+    def try_spend(self) -> bool:
+        """Takes one escalation from the budget; returns False (and counts a denial) when it is used up."""
+        with self._lock:
+            if self.spent < self.allowance():
+                self.spent += 1
+                return True
+            self.denied += 1
+            return False
+
+    def summary(self) -> dict:
+        """Returns the results observed and the escalations made and denied in this run."""
+        with self._lock:
+            return {"observed": self.observed, "escalated": self.spent, "denied": self.denied,
+                    "escalation_rate": round(self.spent / self.observed, 4) if self.observed else 0.0}
@@ -0,0 +1,151 @@
+# LLM response cache
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "REVIEW_ANALYZER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache")
+)
+
+class LLMResponseCache:
+    """
+    Persistent, content-addressed store of LLM responses backed by a single SQLite file.
+    Entries are keyed by a SHA-256 digest of (model, temperature, system message, prompt, max_tokens), so
+    a response truncated by a small token budget is never served to a request with a larger one, and are
+    evicted least-recently-used once the cache outgrows `max_entries` / `max_bytes`; entries older
+    than `ttl_seconds` are treated as misses and purged.
+    """
+    def __init__(self, path: str = None, max_entries: int = 50000, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 30 * 24 * 3600):
+        """Opens (or creates) the cache database and loads its current size."""
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "llm_responses.sqlite")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._refresh_totals()
+
+    @staticmethod
+    def make_key(model: str, temp: float, system_message: str, prompt: str, max_tokens: int = None) -> str:
+        """Returns the content address of a request."""
+        payload = json.dumps([model, float(temp), system_message, prompt, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached response for `key`, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            with self._conn:
+                if now - created_at > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._refresh_totals()
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Stores a response and evicts old entries if the cache is over its limits."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now)
+                )
+            self._refresh_totals()
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(now)
+
+    def evict(self) -> None:
+        """Purges expired entries and trims the cache back under its size limits."""
+        with self._lock:
+            self._evict(time.time())
+
+    def _evict(self, now: float) -> None:
+        """Deletes expired rows, then least-recently-used rows until both limits hold."""
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._refresh_totals()
+            if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            excess_entries = max(0, self._entries - self.max_entries)
+            excess_bytes = max(0, self._bytes - self.max_bytes)
+            freed_entries, freed_bytes, doomed = 0, 0, []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC"):
+                if freed_entries >= excess_entries and freed_bytes >= excess_bytes:
+                    break
+                doomed.append((key,))
+                freed_entries += 1
+                freed_bytes += size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._refresh_totals()
+
+    def _refresh_totals(self) -> None:
+        """Re-reads entry count and total payload size from the database."""
+        entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._entries, self._bytes = entries, total_bytes
+
+    def clear(self) -> None:
+        """Removes every cached response and resets the hit/miss counters."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses")
+            self._refresh_totals()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": self._entries,
+            "bytes": self._bytes
+        }
+
+_cache = None
+_cache_disabled = os.environ.get("REVIEW_ANALYZER_DISABLE_CACHE", "").lower() in ("1", "true", "yes")
+
+def get_cache():
+    """Returns the process-wide response cache, creating it on first use, or None when caching is disabled."""
+    global _cache
+    if _cache_disabled:
+        return None
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
+
+def set_cache(cache) -> None:
+    """Replaces the process-wide response cache; pass None to disable caching."""
+    global _cache, _cache_disabled
+    _cache = cache
+    _cache_disabled = cache is None
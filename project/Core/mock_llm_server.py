@@ -0,0 +1,270 @@
+# Local OpenAI-compatible stand-in server
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Utils.helpers import estimate_tokens
+
+POSITIVE_WORDS = {"love", "great", "excellent", "awesome", "amazing", "good", "perfect", "happy", "fast", "recommend", "best", "nice", "smooth", "works"}
+NEGATIVE_WORDS = {"bad", "poor", "defective", "broken", "worst", "terrible", "slow", "issue", "issues", "problem", "problems", "return", "refund", "waste", "disappointed", "freezes"}
+FEATURES = ["battery", "camera", "screen", "display", "price", "charger", "speaker", "signal", "software", "performance", "storage", "delivery", "sim", "size"]
+
+class MockLLMBackend:
+    """
+    Stand-in for the OpenAI chat completion endpoint that answers every agent prompt of this project
+    with schema-valid JSON. Latency, error rate and periodic 429 bursts are configurable so the
+    ingestion pipeline can be load-tested locally.
+    """
+    def __init__(self, latency: str = "lognormal", latency_mean: float = 0.8, latency_spread: float = 0.5,
+                 error_rate: float = 0.0, burst_interval: float = 0.0, burst_duration: float = 0.0,
+                 retry_after: float = 1.0, max_concurrency: int = 0, seed: int = 0):
+        """
+        Args:
+            latency (str): Latency distribution, one of "constant", "uniform" or "lognormal".
+            latency_mean (float): Mean response latency in seconds.
+            latency_spread (float): Half-width for "uniform", sigma of the underlying normal for "lognormal".
+            error_rate (float): Probability of answering a request with HTTP 500.
+            burst_interval (float): Seconds between the starts of two 429 bursts (0 disables bursts).
+            burst_duration (float): Length of every 429 burst in seconds.
+            retry_after (float): Value of the Retry-After header sent with 429 responses.
+            max_concurrency (int): Requests served at once, like an account limit; any request beyond it is
+                answered with 429 (0 for no limit).
+            seed (int): Seed for latency and error sampling.
+        """
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Clears the request log."""
+        with self._lock:
+            self.requests = []
+            self.status_counts = {}
+
+    def sample_latency(self) -> float:
+        """Draws one response latency from the configured distribution."""
+        with self._lock:
+            if self.latency == "constant":
+                return self.latency_mean
+            if self.latency == "uniform":
+                return max(0.0, self._random.uniform(self.latency_mean - self.latency_spread, self.latency_mean + self.latency_spread))
+            if self.latency_mean <= 0:
+                return 0.0
+            mu = math.log(self.latency_mean) - self.latency_spread ** 2 / 2
+            return self._random.lognormvariate(mu, self.latency_spread)
+
+    def in_burst(self) -> bool:
+        """Returns True while a simulated rate-limit burst is active."""
+        if not self.burst_interval or not self.burst_duration:
+            return False
+        return (time.monotonic() - self._started_at) % self.burst_interval < self.burst_duration
+
+    def complete(self, body: dict):
+        """
+        Handles one chat completion request body.
+        Returns (HTTP status, extra headers, JSON payload) after sleeping for the sampled latency.
+        """
+        start = time.monotonic()
+        messages = body.get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        prompt_tokens = sum(estimate_tokens(message.get("content", "")) for message in messages)
+
+        if self.in_burst():
+            return self._record(start, 429, prompt_tokens, 0, {"Retry-After": str(self.retry_after)},
+                                {"error": {"message": "Rate limit reached (stand-in burst).", "type": "requests", "code": "rate_limit_exceeded"}})
+        with self._lock:
+            saturated = self.max_concurrency and self.in_flight >= self.max_concurrency
+            if not saturated:
+                self.in_flight += 1
+        if saturated:
+            return self._record(start, 429, prompt_tokens, 0, {},
+                                {"error": {"message": "Too many concurrent requests (stand-in limit).", "type": "requests", "code": "rate_limit_exceeded"}})
+
+        try:
+            time.sleep(self.sample_latency())
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            return self._record(start, 500, prompt_tokens, 0, {},
+                                {"error": {"message": "Stand-in server error.", "type": "server_error", "code": None}})
+
+        content = self.respond(prompt)
+        completion_tokens = estimate_tokens(content)
+        payload = {
+            "id": "chatcmpl-local-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "local"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        }
+        return self._record(start, 200, prompt_tokens, completion_tokens, {}, payload)
+
+    def _record(self, start, status, prompt_tokens, completion_tokens, headers, payload):
+        """Logs a served request and passes its response through."""
+        with self._lock:
+            self.requests.append({
+                "status": status,
+                "latency": time.monotonic() - start,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens
+            })
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return status, headers, payload
+
+    def respond(self, prompt: str) -> str:
+        """Returns a schema-valid JSON answer for whichever agent prompt was received."""
+        if "Return ONLY a JSON array" in prompt:
+            reviews = re.findall(r"=+ Review (\d+) =+\s*Review: (.*?)\n\s*Review Date:", prompt, flags=re.DOTALL)
+            return json.dumps([dict(review_index=int(index), **self.sentiment(text)) for index, text in reviews])
+        if "adaptive sentiment analysis AI" in prompt:
+            match = re.search(r"Review: (.*?)\n\s*Review Date:", prompt, flags=re.DOTALL)
+            return json.dumps(self.sentiment(match.group(1) if match else ""))
+        if "USP (Unique Selling Point) extraction agent" in prompt:
+            return json.dumps(self.top_features(prompt, "All USPs Mentioned:", "top_usps", "positive_mentions"))
+        if "issue detection agent" in prompt:
+            return json.dumps(self.top_features(prompt, "All Issues Mentioned:", "top_issues", "negative_mentions"))
+        if "analyze the historical customer sentiment data" in prompt:
+            return json.dumps({
+                "trend_analysis_report": "Customer sentiment remained broadly stable across the reported months with no significant shift.",
+                "model_confidence": 0.88
+            })
+        if "generating a human-readable review summary" in prompt:
+            return json.dumps({
+                "summary": "Customers are broadly satisfied with the product, praising its everyday reliability while noting a few recurring issues.",
+                "model_confidence": 0.9
+            })
+        return json.dumps({"model_confidence": 0.5})
+
+    @staticmethod
+    def sentiment(review: str) -> dict:
+        """Derives a deterministic sentiment result from simple word lists."""
+        words = re.findall(r"[a-z]+", review.lower())
+        positives = sum(word in POSITIVE_WORDS for word in words)
+        negatives = sum(word in NEGATIVE_WORDS for word in words)
+        total = positives + negatives
+        score = round((positives - negatives) / total, 2) if total else 0.0
+        category = "positive" if score > 0.2 else "negative" if score < -0.2 else "neutral"
+        drivers = [feature for feature in FEATURES if feature in words][:3] or ["overall experience"]
+        return {
+            "sentiment_category": category,
+            "sentiment_score": score,
+            "model_confidence": round(min(0.95, 0.6 + 0.1 * total), 2),
+            "key_drivers": drivers,
+            "emotional_intensity": round(min(1.0, 0.3 + 0.15 * total), 2),
+            "mixed_signals": bool(positives and negatives),
+            "conflicting_phrases": [],
+            "justification": f"Review mentions {', '.join(drivers)} with {category} wording.",
+            "trust_tag": "high_trust" if total > 2 else "low_trust",
+            "persona_adjusted": True
+        }
+
+    @staticmethod
+    def top_features(prompt: str, marker: str, key: str, count_key: str) -> dict:
+        """Echoes back the three most frequent features listed in a USP or issue prompt."""
+        section = prompt.split(marker, 1)[1].split("Justifications", 1)[0] if marker in prompt else ""
+        features = re.findall(r"([^,\n]+?) \(frequency: (\d+)\)", section)
+        records = [{
+            "feature": feature.strip(),
+            count_key: int(count),
+            "justification": f"Reviewers repeatedly mention {feature.strip()}.",
+            "model_confidence": 0.9
+        } for feature, count in features[:3]]
+        return {key: records, "model_confidence": 0.9 if records else 0.5}
+
+class MockLLMServer:
+    """Serves a MockLLMBackend over HTTP at `/v1/chat/completions` from a background thread."""
+    def __init__(self, backend: MockLLMBackend = None, host: str = "127.0.0.1", port: int = 0):
+        """Binds the server; port 0 picks a free port."""
+        self.backend = backend or MockLLMBackend()
+        backend = self.backend
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {}, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._send(*backend.complete(body))
+
+            def _send(self, status, headers, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to assign to `openai.api_base`."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Starts serving in a daemon thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and waits for the serving thread."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local OpenAI-compatible stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.8)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-interval", type=float, default=0.0)
+    parser.add_argument("--burst-duration", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Concurrent requests served before answering 429.")
+    args = parser.parse_args()
+
+    backend = MockLLMBackend(args.latency, args.latency_mean, args.latency_spread, args.error_rate, args.burst_interval, args.burst_duration,
+                             max_concurrency=args.max_concurrency)
+    server = MockLLMServer(backend, args.host, args.port)
+    print(f"Stand-in OpenAI endpoint listening on {server.url} (set openai.api_base to this URL)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
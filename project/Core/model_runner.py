@@ -1,38 +1,142 @@
-import openai
-import time
-
-def run_llm_model(model: str, prompt: str, max_retries: int = 3, temp = 0.2):
-    """
-    Calls the OpenAI ChatCompletion API with retry logic and returns output + execution time.
-    
-    Args:
-        model (str): The OpenAI model name (e.g., "gpt-4", "gpt-3.5-turbo").
-        prompt (str): Prompt text to send to the LLM.
-        max_retries (int): Number of retry attempts on failure.
-
-    Returns:
-        Tuple[str, float]: (LLM-generated response, execution time in seconds)
-    """
-    for attempt in range(max_retries):
-        try:
-            start_time = time.time()
-            
-            response = openai.ChatCompletion.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are an intelligent assistant that answers in clean and precise JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temp,
-                max_tokens=1000  
-            )
-            
-            execution_time = time.time() - start_time
-            content = response['choices'][0]['message']['content'].strip()
-            
-            return content, execution_time
-
-        except openai.error.OpenAIError as e:
-            if attempt == max_retries - 1:
-                print(f"[ERROR] Failed after {max_retries} attempts: {e}")
-                return "", 0.0
+import asyncio
+import openai
+import time
+from Core.llm_cache import get_cache
+from Core.rate_limit import get_rate_limiter
+from Core.resilience import get_request_controller, is_retryable
+from Core.telemetry import telemetry
+from Utils.helpers import estimate_tokens
+
+SYSTEM_MESSAGE = "You are an intelligent assistant that answers in clean and precise JSON format."
+
+def run_llm_model(model: str, prompt: str, max_retries: int = 3, temp = 0.2, use_cache: bool = True, max_tokens: int = 1000, agent: str = None, product: str = None, refresh_cache: bool = False):
+    """
+    Calls the OpenAI ChatCompletion API with retry logic and returns output + execution time.
+    
+    Args:
+        model (str): The OpenAI model name (e.g., "gpt-4", "gpt-3.5-turbo").
+        prompt (str): Prompt text to send to the LLM.
+        max_retries (int): Number of retry attempts on failure.
+        use_cache (bool): Serve and store the response through the persistent response cache.
+        max_tokens (int): Upper bound on generated tokens.
+        agent (str): Agent name the call is recorded under in the telemetry.
+        product (str): Product the call is recorded under; defaults to the current task's product.
+        refresh_cache (bool): Skip the cached response and replace it with a fresh one, e.g. when retrying
+            a response that was rejected.
+
+    Returns:
+        Tuple[str, float]: (LLM-generated response, execution time in seconds)
+    """
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        cache_key = cache.make_key(model, temp, SYSTEM_MESSAGE, prompt, max_tokens)
+        cached_response = None if refresh_cache else cache.get(cache_key)
+        if cached_response is not None:
+            telemetry.record(model, agent, product, status="cached")
+            return cached_response, 0.0
+
+    rate_limiter = get_rate_limiter()
+    controller = get_request_controller()
+    for attempt in range(max_retries):
+        if rate_limiter is not None:
+            rate_limiter.acquire(estimate_tokens(SYSTEM_MESSAGE + prompt) + max_tokens)
+        if controller is not None:
+            controller.acquire()
+        start_time = time.time()
+        try:
+            response = openai.ChatCompletion.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temp,
+                max_tokens=max_tokens,
+                request_timeout=controller.timeout if controller is not None else None
+            )
+        except openai.error.OpenAIError as e:
+            if controller is not None:
+                controller.release(e)
+            if attempt == max_retries - 1 or (controller is not None and not is_retryable(e)):
+                print(f"[ERROR] Failed after {attempt + 1} attempts: {e}")
+                telemetry.record(model, agent, product, time.time() - start_time, retries=attempt, status="failed")
+                return "", 0.0
+            if controller is not None:
+                time.sleep(controller.retry_delay(e, attempt))
+            continue
+        except BaseException:
+            if controller is not None:
+                controller.release(completed=False)
+            raise
+        if controller is not None:
+            controller.release()
+
+        execution_time = time.time() - start_time
+        telemetry.record(model, agent, product, execution_time, response.get('usage'), retries=attempt)
+        content = response['choices'][0]['message']['content'].strip()
+        if cache is not None and content:
+            cache.set(cache_key, model, content)
+
+        return content, execution_time
+
+async def run_llm_model_async(model: str, prompt: str, max_retries: int = 3, temp = 0.2, use_cache: bool = True, max_tokens: int = 1000, agent: str = None, product: str = None, refresh_cache: bool = False):
+    """
+    Async counterpart of `run_llm_model` built on `openai.ChatCompletion.acreate`.
+    Lets many requests wait on the network concurrently inside one event loop; cache reads and writes
+    run on the default executor so SQLite never blocks the loop.
+
+    Returns:
+        Tuple[str, float]: (LLM-generated response, execution time in seconds)
+    """
+    cache = get_cache() if use_cache else None
+    loop = asyncio.get_running_loop()
+    if cache is not None:
+        cache_key = cache.make_key(model, temp, SYSTEM_MESSAGE, prompt, max_tokens)
+        cached_response = None if refresh_cache else await loop.run_in_executor(None, cache.get, cache_key)
+        if cached_response is not None:
+            telemetry.record(model, agent, product, status="cached")
+            return cached_response, 0.0
+
+    rate_limiter = get_rate_limiter()
+    controller = get_request_controller()
+    for attempt in range(max_retries):
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async(estimate_tokens(SYSTEM_MESSAGE + prompt) + max_tokens)
+        if controller is not None:
+            await controller.acquire_async()
+        start_time = time.time()
+        try:
+            response = await openai.ChatCompletion.acreate(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temp,
+                max_tokens=max_tokens,
+                request_timeout=controller.timeout if controller is not None else None
+            )
+        except openai.error.OpenAIError as e:
+            if controller is not None:
+                controller.release(e)
+            if attempt == max_retries - 1 or (controller is not None and not is_retryable(e)):
+                print(f"[ERROR] Failed after {attempt + 1} attempts: {e}")
+                telemetry.record(model, agent, product, time.time() - start_time, retries=attempt, status="failed")
+                return "", 0.0
+            if controller is not None:
+                await asyncio.sleep(controller.retry_delay(e, attempt))
+            continue
+        except BaseException:
+            if controller is not None:
+                controller.release(completed=False)
+            raise
+        if controller is not None:
+            controller.release()
+
+        execution_time = time.time() - start_time
+        telemetry.record(model, agent, product, execution_time, response.get('usage'), retries=attempt)
+        content = response['choices'][0]['message']['content'].strip()
+        if cache is not None and content:
+            await loop.run_in_executor(None, cache.set, cache_key, model, content)
+
+        return content, execution_time
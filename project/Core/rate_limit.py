@@ -0,0 +1,159 @@
+# Request rate limiting shared by threads, event loops and worker processes
+import asyncio
+import contextvars
+import multiprocessing
+import time
+from collections import Counter, deque
+
+# Who an API request is made for; asyncio tasks inherit it from the task that created them
+current_tenant = contextvars.ContextVar("current_tenant", default=None)
+
+class SharedRateLimiter:
+    """
+    Spaces API requests at most `requests_per_minute` apart, across every process that shares the
+    limiter. Each request reserves the next free slot (GCRA-style: slot = max(now, next_slot),
+    next_slot = slot + interval) under a lock, then waits until its slot. The state is a
+    multiprocessing Value, so a limiter created in a parent process can be handed to pool workers.
+    `burst` requests may start back to back after an idle period.
+    """
+    def __init__(self, requests_per_minute: float, burst: int = 1, context=None):
+        """`context` is the multiprocessing context the pool workers are started with."""
+        context = context or multiprocessing.get_context()
+        self.interval = 60.0 / requests_per_minute
+        self.burst = burst
+        self._lock = context.Lock()
+        self._next_slot = context.Value("d", 0.0, lock=False)
+
+    def reserve(self) -> float:
+        """Reserves the next request slot and returns how many seconds to wait for it."""
+        with self._lock:
+            now = time.time()
+            slot = max(now - (self.burst - 1) * self.interval, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        return max(0.0, slot - now)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Blocks until a request may be sent; `tokens` is accepted for interface parity and ignored."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Waits, without blocking the event loop, until a request may be sent."""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+class FairShareLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget shared fairly by the tenants (products) of one
+    event loop. Both budgets are token buckets holding one second of capacity. Waiting requests are
+    queued per tenant (`current_tenant`), and a dispatcher grants the head request of the tenant that has
+    consumed the least so far. Consumption is measured in seconds of its dominant budget, i.e.
+    max(1 / request rate, tokens / token rate). A tenant that becomes active again starts from the
+    least-served active tenant's level, so idle time does not turn into a burst. A large catalog
+    therefore gets the capacity the small ones leave unused, but cannot delay them.
+
+    Only async callers are scheduled; `acquire` (used by synchronous code) only waits for `upstream`,
+    an optional limiter such as `SharedRateLimiter` that every granted request also passes through.
+    """
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, upstream=None):
+        """Either budget may be None for no limit on that dimension."""
+        self.request_rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self.token_rate = tokens_per_minute / 60.0 if tokens_per_minute else None
+        self.request_capacity = max(1.0, self.request_rate or 1.0)
+        self.token_capacity = max(1.0, self.token_rate or 1.0)
+        self.requests_available = self.request_capacity
+        self.tokens_available = self.token_capacity
+        self.updated = time.monotonic()
+        self.upstream = upstream
+        self.waiting = {}
+        self.served = {}
+        self.granted = {}
+        self._dispatcher = None
+
+    def refill(self) -> None:
+        """Adds the budget accrued since the last refill."""
+        now = time.monotonic()
+        elapsed, self.updated = now - self.updated, now
+        if self.request_rate:
+            self.requests_available = min(self.request_capacity, self.requests_available + elapsed * self.request_rate)
+        if self.token_rate:
+            self.tokens_available = min(self.token_capacity, self.tokens_available + elapsed * self.token_rate)
+
+    def wait_for(self, tokens: int) -> float:
+        """
+        Returns the seconds until a request of `tokens` fits both budgets. A request larger than the token
+        bucket only needs a full bucket and leaves it in debt.
+        """
+        wait = 0.0
+        if self.request_rate and self.requests_available < 1:
+            wait = (1 - self.requests_available) / self.request_rate
+        if self.token_rate:
+            needed = min(tokens, self.token_capacity)
+            if self.tokens_available < needed:
+                wait = max(wait, (needed - self.tokens_available) / self.token_rate)
+        return wait
+
+    def cost(self, tokens: int) -> float:
+        """Returns the share of the budget a request consumes, in seconds of its dominant dimension."""
+        costs = [1 / self.request_rate if self.request_rate else 0.0, tokens / self.token_rate if self.token_rate else 0.0]
+        return max(costs) or 1.0
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Waits for this tenant's fair turn and for budget for a request of about `tokens` tokens."""
+        tenant = current_tenant.get()
+        queue = self.waiting.setdefault(tenant, deque())
+        if not queue:
+            active = [self.served[other] for other, pending in self.waiting.items() if pending and other != tenant]
+            self.served[tenant] = max(self.served.get(tenant, 0.0), min(active, default=0.0))
+        grant = asyncio.get_running_loop().create_future()
+        queue.append((tokens, grant))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self.dispatch())
+        await grant
+        if self.upstream is not None:
+            await self.upstream.acquire_async(tokens)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Synchronous callers are not scheduled; they only wait for the upstream limiter."""
+        if self.upstream is not None:
+            self.upstream.acquire(tokens)
+
+    async def dispatch(self) -> None:
+        """Grants queued requests, least-served tenant first, as the budgets allow."""
+        while True:
+            pending = [tenant for tenant, queue in self.waiting.items() if queue]
+            if not pending:
+                return
+            tenant = min(pending, key=self.served.get)
+            tokens, grant = self.waiting[tenant][0]
+            if grant.cancelled():
+                self.waiting[tenant].popleft()
+                continue
+            self.refill()
+            wait = self.wait_for(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            self.waiting[tenant].popleft()
+            if self.request_rate:
+                self.requests_available -= 1
+            if self.token_rate:
+                self.tokens_available -= tokens
+            self.served[tenant] += self.cost(tokens)
+            counts = self.granted.setdefault(tenant, Counter())
+            counts["requests"] += 1
+            counts["tokens"] += tokens
+            grant.set_result(None)
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """Returns the process-wide request rate limiter, or None when requests are not limited."""
+    return _rate_limiter
+
+def set_rate_limiter(rate_limiter) -> None:
+    """Installs the process-wide request rate limiter; pass None to remove it."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
@@ -0,0 +1,233 @@
+# Backoff, adaptive concurrency and circuit breaking for LLM requests
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+import openai
+
+THROTTLE_STATUS = 429
+
+def error_status(error) -> int:
+    """Returns the HTTP status of an OpenAI error, or None for transport errors and timeouts."""
+    return getattr(error, "http_status", None)
+
+def is_throttled(error) -> bool:
+    """Returns True if the provider rejected the request because of rate or concurrency limits."""
+    return isinstance(error, openai.error.RateLimitError) or error_status(error) == THROTTLE_STATUS
+
+def is_retryable(error) -> bool:
+    """Returns True for throttling, timeouts, connection problems and 5xx errors; 4xx request errors are final."""
+    if is_throttled(error) or isinstance(error, (openai.error.Timeout, openai.error.APIConnectionError, openai.error.ServiceUnavailableError)):
+        return True
+    status = error_status(error)
+    return status is None or status >= 500
+
+def parse_duration(value: str):
+    """Parses "1.5", "20ms", "1s", "6m0s" or an HTTP date into seconds; returns None if unparseable."""
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    if value.endswith("ms"):
+        try:
+            return float(value[:-2]) / 1000
+        except ValueError:
+            return None
+    seconds, number = 0.0, ""
+    for char in value:
+        if char.isdigit() or char == ".":
+            number += char
+        elif char in "hms" and number:
+            seconds += float(number) * {"h": 3600, "m": 60, "s": 1}[char]
+            number = ""
+        else:
+            seconds = None
+            break
+    if seconds is not None and not number:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_hint(error):
+    """Returns the wait the provider asked for (Retry-After, retry-after-ms, x-ratelimit-reset-*), or None."""
+    headers = getattr(error, "headers", None) or {}
+    headers = {str(name).lower(): value for name, value in dict(headers).items()}
+    if "retry-after-ms" in headers:
+        hint = parse_duration(f"{headers['retry-after-ms']}ms")
+        if hint is not None:
+            return hint
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        if name in headers:
+            hint = parse_duration(headers[name])
+            if hint is not None:
+                return hint
+    return None
+
+class RequestController:
+    """
+    Shapes the LLM traffic of a process so it stays close to, but under, the account's limits.
+
+    - Concurrency is AIMD-controlled: every success raises the in-flight limit by 1/limit (about +1 per
+      round of requests), every throttled or timed-out request halves it, at most once per
+      `decrease_interval` (about one request latency). Requests over the limit wait for a slot.
+    - Retries wait for the provider's retry hint when there is one, else for exponential backoff with
+      full jitter: uniform(0, min(max_delay, base_delay * 2**attempt)).
+    - A circuit breaker opens when at least `breaker_threshold` of the last `breaker_window` requests
+      failed with a server error, timeout or connection error (throttling does not count). While open, requests wait instead of reaching the provider; after `breaker_cooldown` a
+      single probe is let through, which closes the breaker on success or reopens it for twice as long.
+    - Every request gets `timeout` seconds.
+    Slots are handed out under one lock, so threads and any number of event loops can share a controller.
+    """
+    def __init__(self, initial_concurrency: int = 16, min_concurrency: int = 1, max_concurrency: int = 64, timeout: float = 60.0,
+                 base_delay: float = 0.5, max_delay: float = 30.0, decrease_interval: float = 1.0,
+                 breaker_window: int = 20, breaker_threshold: float = 0.5, breaker_cooldown: float = 10.0, max_breaker_cooldown: float = 120.0):
+        """Initializes a closed breaker and an in-flight limit of `initial_concurrency`."""
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.decrease_interval = decrease_interval
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_breaker_cooldown = max_breaker_cooldown
+        self.in_flight = 0
+        self.outcomes = deque(maxlen=breaker_window)
+        self.state = "closed"
+        self.open_until = 0.0
+        self.cooldown = breaker_cooldown
+        self.probe_in_flight = False
+        self.last_decrease = 0.0
+        self.stats = {"throttled": 0, "errors": 0, "breaker_trips": 0}
+        self._condition = threading.Condition(threading.RLock())
+        self._waiters = []
+        self._random = random.Random()
+
+    def try_acquire(self) -> float:
+        """Takes a request slot and returns 0, or returns how long to wait before trying again (inf: until woken)."""
+        with self._condition:
+            now = time.monotonic()
+            if self.state == "open":
+                if now < self.open_until:
+                    return self.open_until - now
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.probe_in_flight or self.in_flight:
+                    return float("inf")
+                self.probe_in_flight = True
+            elif self.in_flight >= max(self.min_concurrency, int(self.limit)):
+                return float("inf")
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self) -> None:
+        """Blocks until a request may be sent."""
+        with self._condition:
+            while True:
+                wait = self.try_acquire()
+                if not wait:
+                    return
+                self._condition.wait(None if wait == float("inf") else wait)
+
+    async def acquire_async(self) -> None:
+        """Waits, without blocking the event loop, until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            woken = loop.create_future()
+            # Checking and registering under one lock, so a release in between cannot be missed
+            with self._condition:
+                wait = self.try_acquire()
+                if not wait:
+                    return
+                self._waiters.append((loop, woken))
+            await asyncio.wait([woken], timeout=None if wait == float("inf") else wait)
+
+    def release(self, error=None, completed: bool = True) -> None:
+        """
+        Returns a slot with the outcome of its request (`error` None on success) and wakes waiters.
+        `completed=False` frees the slot of a request that was abandoned (e.g. cancelled) without an outcome.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if not completed:
+                if self.probe_in_flight and self.state == "half_open":
+                    self.probe_in_flight = False
+                self.wake_waiters()
+                return
+            failed = error is not None and is_retryable(error)
+            congested = failed and (is_throttled(error) or isinstance(error, openai.error.Timeout))
+            if congested:
+                self.stats["throttled"] += 1
+                if now - self.last_decrease >= self.decrease_interval:
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    self.last_decrease = now
+            elif error is None:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            if failed:
+                self.stats["errors"] += 1
+            # Throttling is the concurrency limit's business; the breaker reacts to the provider failing
+            broken = failed and not is_throttled(error)
+
+            if self.state == "half_open" and self.probe_in_flight:
+                self.probe_in_flight = False
+                if broken:
+                    self.cooldown = min(self.cooldown * 2, self.max_breaker_cooldown)
+                    self.trip(now)
+                else:
+                    self.state = "closed"
+                    self.cooldown = self.breaker_cooldown
+                    self.outcomes.clear()
+            elif self.state == "closed":
+                self.outcomes.append(broken)
+                if len(self.outcomes) == self.outcomes.maxlen and sum(self.outcomes) >= self.breaker_threshold * len(self.outcomes):
+                    self.trip(now)
+
+            self.wake_waiters()
+
+    def wake_waiters(self) -> None:
+        """Wakes every blocked thread and event-loop waiter so they re-check for a slot (caller holds the lock)."""
+        waiters, self._waiters = self._waiters, []
+        self._condition.notify_all()
+        for loop, woken in waiters:
+            try:
+                loop.call_soon_threadsafe(lambda future=woken: future.done() or future.set_result(None))
+            except RuntimeError:
+                pass
+
+    def trip(self, now: float) -> None:
+        """Opens the breaker for the current cooldown (caller holds the lock)."""
+        self.state = "open"
+        self.open_until = now + self.cooldown
+        self.outcomes.clear()
+        self.stats["breaker_trips"] += 1
+        print(f"[WARN] Circuit breaker open for {self.cooldown:.1f}s after repeated LLM request failures")
+
+    def retry_delay(self, error, attempt: int) -> float:
+        """Returns how long to wait before retry number `attempt` + 1 of a failed request."""
+        hint = retry_hint(error)
+        if hint is not None:
+            return min(hint, self.max_breaker_cooldown)
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def summary(self) -> dict:
+        """Returns the current concurrency limit, breaker state and failure counters."""
+        with self._condition:
+            return dict(self.stats, concurrency_limit=round(self.limit, 2), in_flight=self.in_flight, breaker=self.state)
+
+_controller = RequestController()
+
+def get_request_controller():
+    """Returns the process-wide request controller, or None when requests go out uncontrolled."""
+    return _controller
+
+def set_request_controller(controller) -> None:
+    """Replaces the process-wide request controller; pass None to disable it."""
+    global _controller
+    _controller = controller
@@ -0,0 +1,230 @@
+# Extraction, local repair and validation of the JSON the agents get back from the LLM
+import copy
+import json
+import re
+from Core.telemetry import telemetry
+
+CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", flags=re.DOTALL)
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+MAX_CANDIDATES = 5
+
+class Schema:
+    """
+    Expected shape of an agent's JSON object. `required` maps field names to types and `optional` maps
+    field names to (type, default). A type is str, float, int, bool, list or another Schema, which stands
+    for a list of records of that schema. Values are coerced where the intent is unambiguous ("0.9" for a
+    float, a single string for a list); records of a nested list that do not validate are dropped.
+    """
+    def __init__(self, required: dict, optional: dict = None):
+        """Initializes the field specification."""
+        self.required = required
+        self.optional = optional or {}
+
+    def validate(self, value):
+        """Returns a coerced copy of `value` with optional fields filled in, or None if it does not conform."""
+        if not isinstance(value, dict):
+            return None
+        result = dict(value)
+        for name, kind in self.required.items():
+            if name not in value:
+                return None
+            result[name] = coerce(value[name], kind)
+            if result[name] is None:
+                return None
+        for name, (kind, default) in self.optional.items():
+            coerced = coerce(value[name], kind) if name in value else None
+            result[name] = copy.copy(default) if coerced is None else coerced
+        return result
+
+def coerce(value, kind):
+    """Converts `value` to `kind` (see `Schema`), or returns None when it cannot."""
+    if isinstance(kind, Schema):
+        if not isinstance(value, list):
+            return None
+        records = [kind.validate(item) for item in value]
+        return [record for record in records if record is not None]
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+            return value.strip().lower() == "true"
+        return None
+    if kind in (float, int):
+        if isinstance(value, bool):
+            return None
+        try:
+            return kind(float(value))
+        except (TypeError, ValueError):
+            return None
+    if kind is str:
+        return value if isinstance(value, str) else None if isinstance(value, (dict, list)) or value is None else str(value)
+    if kind is list:
+        return value if isinstance(value, list) else None if value is None else [value]
+    return value if isinstance(value, kind) else None
+
+def scan(text: str, start: int):
+    """
+    Walks the JSON value opened at `text[start]` and returns the index just past its closing bracket, or
+    None when the text ends first (a truncated response).
+    """
+    stack, in_string, escaped = [], False, False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                return None
+            if not stack:
+                return index + 1
+    return None
+
+def candidates(text: str, opener: str, limit: int = MAX_CANDIDATES):
+    """Yields up to `limit` (None: all) top-level JSON fragments of `text` starting with `opener`, in order."""
+    position, found = text.find(opener), 0
+    while position != -1 and (limit is None or found < limit):
+        end = scan(text, position)
+        found += 1
+        if end is None:
+            yield text[position:]
+            return
+        yield text[position:end]
+        position = text.find(opener, end)
+
+def repair(fragment: str):
+    """
+    Applies the cheap fixes LLM output usually needs and returns the parsed value, or None. Trailing
+    commas are dropped, missing commas between values are added, Python literals (True, False, None) become JSON ones, and a truncated fragment is
+    closed: an open string is terminated and open brackets are closed, or, if that does not parse, the
+    fragment is cut back to its last complete element.
+    """
+    out, stack, in_string, escaped = [], [], False, False
+    safe = (0, [])
+    index = 0
+    while index < len(fragment):
+        char = fragment[index]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"' or char in CLOSERS:
+            if stack and ends_value(out):
+                out.append(",")
+            if char == '"':
+                in_string = True
+                out.append(char)
+            else:
+                stack.append(CLOSERS[char])
+                out.append(char)
+                safe = (len(out), list(stack))
+        elif char in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if stack and stack[-1] == char:
+                stack.pop()
+            out.append(char)
+            safe = (len(out), list(stack))
+            if not stack:
+                break
+        elif char == ",":
+            safe = (len(out), list(stack))
+            out.append(char)
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z]+", fragment[index:]).group(0)
+            out.append(PYTHON_LITERALS.get(word, word))
+            index += len(word)
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    attempts = []
+    if in_string or stack:
+        closed = "".join(out) + ('"' if in_string else "")
+        attempts.append(closed.rstrip().rstrip(",") + "".join(reversed(stack)))
+        length, safe_stack = safe
+        attempts.append("".join(out[:length]).rstrip().rstrip(",") + "".join(reversed(safe_stack)))
+    else:
+        attempts.append("".join(out))
+    for attempt in attempts:
+        try:
+            return json.loads(attempt, strict=False)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+def ends_value(out: list) -> bool:
+    """Returns True if the repaired output so far ends with a complete value, i.e. a comma is due next."""
+    for text in reversed(out):
+        stripped = text.rstrip()
+        if stripped:
+            return stripped[-1] in '"}]' or stripped[-1].isalnum()
+    return False
+
+def strip_code_fence(text: str) -> str:
+    """Returns the content of the first Markdown code fence in `text`, or `text` itself."""
+    match = CODE_FENCE.search(text)
+    return match.group(1) if match else text
+
+def decode(fragment: str):
+    """Parses a fragment as is, then after local repair. Returns (value, repaired), value None on failure."""
+    try:
+        return json.loads(fragment, strict=False), False
+    except json.JSONDecodeError:
+        return repair(fragment), True
+
+def extract_json(text: str, schema: Schema, agent: str = None, model: str = None, product: str = None):
+    """
+    Returns the first JSON object in an LLM response that validates against `schema`, repairing it
+    locally if needed, or None. The outcome (parsed, repaired or failed) is recorded in the telemetry
+    under `agent`, `model` and `product`.
+    """
+    text = strip_code_fence(text or "")
+    for fragment in candidates(text, "{"):
+        value, repaired = decode(fragment)
+        result = schema.validate(value)
+        if result is not None:
+            telemetry.record_parse(model, agent, product, "repaired" if repaired else "parsed")
+            return result
+    telemetry.record_parse(model, agent, product, "failed")
+    print(f"[WARN] Could not extract a valid {agent or 'LLM'} JSON object from the response")
+    return None
+
+def extract_json_list(text: str, item_schema: Schema, agent: str = None, model: str = None, product: str = None) -> list:
+    """
+    Returns the records of the JSON array in an LLM response, each validated against `item_schema`
+    (None for records that do not conform). A truncated array keeps its complete records. Without an
+    array, the top-level objects of the response are used. The outcome is recorded like `extract_json`.
+    """
+    text = strip_code_fence(text or "")
+    value, repaired = None, False
+    for fragment in candidates(text, "["):
+        value, repaired = decode(fragment)
+        if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+            break
+        value = None
+    if value is None:
+        value, repaired = [], False
+        for fragment in candidates(text, "{", limit=None):
+            item, item_repaired = decode(fragment)
+            value.append(item)
+            repaired = repaired or item_repaired
+
+    records = [item_schema.validate(item) for item in value]
+    outcome = "failed" if not any(record is not None for record in records) else "repaired" if repaired else "parsed"
+    telemetry.record_parse(model, agent, product, outcome)
+    return records
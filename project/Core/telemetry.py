@@ -0,0 +1,226 @@
+# Telemetry of LLM calls
+import json
+import threading
+from bisect import bisect_left
+from Core.rate_limit import current_tenant
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1-nano": (0.10, 0.40)
+}
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+COUNTERS = ("calls", "failures", "cache_hits", "retries", "prompt_tokens", "completion_tokens", "cost_usd", "parsed", "parse_repaired", "parse_failures")
+PARSE_OUTCOMES = {"parsed": "parsed", "repaired": "parse_repaired", "failed": "parse_failures"}
+METRIC_PREFIX = "review_analyzer_llm"
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus semantics: `counts[i]` observations <= `buckets[i]`, plus overflow."""
+    def __init__(self, buckets: tuple):
+        """Initializes empty bucket counts."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Adds one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def minus(self, other: "Histogram") -> "Histogram":
+        """Returns the observations made since `other`, an earlier copy of this histogram."""
+        delta = Histogram(self.buckets)
+        delta.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        delta.sum = self.sum - other.sum
+        delta.count = self.count - other.count
+        return delta
+
+    def copy(self) -> "Histogram":
+        """Returns an independent copy."""
+        return self.minus(Histogram(self.buckets))
+
+    def quantile(self, q: float):
+        """Returns the upper bound of the bucket holding the q-quantile, or None without observations."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        """Returns the histogram as JSON-serializable values with cumulative bucket counts."""
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": round(self.sum, 6), "count": self.count}
+
+class Series:
+    """Counters and histograms of the calls sharing one (agent, product, model) label set."""
+    def __init__(self):
+        """Initializes empty counters and histograms."""
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.tokens = Histogram(TOKEN_BUCKETS)
+
+    def copy(self) -> "Series":
+        """Returns an independent copy."""
+        series = Series()
+        series.counters = dict(self.counters)
+        series.latency = self.latency.copy()
+        series.tokens = self.tokens.copy()
+        return series
+
+    def minus(self, other: "Series") -> "Series":
+        """Returns the activity since `other`, an earlier copy of this series."""
+        series = Series()
+        series.counters = {name: value - other.counters[name] for name, value in self.counters.items()}
+        series.latency = self.latency.minus(other.latency)
+        series.tokens = self.tokens.minus(other.tokens)
+        return series
+
+class Telemetry:
+    """
+    Process-wide record of LLM calls made through the model runner, tagged by agent (sentiment, summary,
+    usp, issues, trend), product and model. Each label set keeps call, failure, cache-hit, retry, token,
+    cost and response parsing counters plus latency and total-token histograms. `mark` / `since` give the activity of one run,
+    and `to_json` / `to_prometheus` export everything.
+    """
+    def __init__(self):
+        """Initializes an empty record."""
+        self._lock = threading.Lock()
+        self.series = {}
+
+    def record(self, model: str, agent: str = None, product: str = None, latency: float = 0.0, usage: dict = None, retries: int = 0, status: str = "ok") -> None:
+        """
+        Records one call. `status` is "ok", "failed" or "cached"; `product` defaults to the product the
+        current task works for (see `current_tenant`).
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        labels = (agent or "other", str(product or current_tenant.get() or "unknown"), model)
+        with self._lock:
+            series = self.series.setdefault(labels, Series())
+            counters = series.counters
+            counters["calls"] += 1
+            counters["retries"] += retries
+            if status == "cached":
+                counters["cache_hits"] += 1
+                return
+            if status == "failed":
+                counters["failures"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            counters["completion_tokens"] += completion_tokens
+            counters["cost_usd"] += (prompt_tokens * input_price + completion_tokens * output_price) / 1e6
+            series.latency.observe(latency)
+            if prompt_tokens or completion_tokens:
+                series.tokens.observe(prompt_tokens + completion_tokens)
+
+    def record_parse(self, model: str, agent: str = None, product: str = None, outcome: str = "parsed") -> None:
+        """Records how a response was turned into JSON: "parsed", "repaired" (after local repair) or "failed"."""
+        labels = (agent or "other", str(product or current_tenant.get() or "unknown"), model)
+        with self._lock:
+            self.series.setdefault(labels, Series()).counters[PARSE_OUTCOMES[outcome]] += 1
+
+    def mark(self) -> dict:
+        """Returns a copy of the current series, to measure a run with `since`."""
+        with self._lock:
+            return {labels: series.copy() for labels, series in self.series.items()}
+
+    def since(self, mark: dict = None) -> dict:
+        """Returns the series accumulated since `mark` (everything when None)."""
+        mark = mark or {}
+        with self._lock:
+            return {labels: series.minus(mark[labels]) if labels in mark else series.copy() for labels, series in self.series.items()}
+
+    @staticmethod
+    def summarize(series: dict) -> dict:
+        """Returns the totals of a set of series: counters, cost and approximate latency percentiles."""
+        totals = dict.fromkeys(COUNTERS, 0)
+        latency = Histogram(LATENCY_BUCKETS)
+        for item in series.values():
+            for name, value in item.counters.items():
+                totals[name] += value
+            latency.counts = [a + b for a, b in zip(latency.counts, item.latency.counts)]
+            latency.sum += item.latency.sum
+            latency.count += item.latency.count
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["latency_mean"] = round(latency.sum / latency.count, 3) if latency.count else None
+        totals["latency_p50"] = latency.quantile(0.5)
+        totals["latency_p95"] = latency.quantile(0.95)
+        parses = totals["parsed"] + totals["parse_repaired"] + totals["parse_failures"]
+        totals["parse_failure_rate"] = round(totals["parse_failures"] / parses, 4) if parses else None
+        return totals
+
+    def totals(self, mark: dict = None) -> dict:
+        """Returns the summarized activity since `mark` (everything when None)."""
+        return self.summarize(self.since(mark))
+
+    def to_json(self, mark: dict = None) -> str:
+        """Exports the series (since `mark`) and their totals as a JSON document."""
+        series = self.since(mark)
+        document = {
+            "series": [
+                {"agent": agent, "product": product, "model": model, **item.counters,
+                 "latency_seconds": item.latency.to_dict(), "tokens": item.tokens.to_dict()}
+                for (agent, product, model), item in sorted(series.items())
+            ],
+            "totals": self.summarize(series)
+        }
+        return json.dumps(document, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Exports all series in the Prometheus text exposition format."""
+        series = self.since()
+        lines = []
+        for name, kind, help_text in (
+            ("calls", "counter", "LLM calls, including cache hits and failures."),
+            ("failures", "counter", "LLM calls that failed after all retries."),
+            ("cache_hits", "counter", "LLM calls served from the response cache."),
+            ("retries", "counter", "Retried LLM requests."),
+            ("prompt_tokens", "counter", "Prompt tokens billed."),
+            ("completion_tokens", "counter", "Completion tokens billed."),
+            ("cost_usd", "counter", "Estimated cost in US dollars."),
+            ("parsed", "counter", "Responses that parsed as valid JSON."),
+            ("parse_repaired", "counter", "Responses that parsed as valid JSON after local repair."),
+            ("parse_failures", "counter", "Responses no valid JSON could be extracted from.")
+        ):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name}_total {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total {kind}")
+            for labels, item in sorted(series.items()):
+                lines.append(f"{METRIC_PREFIX}_{name}_total{{{self.label_text(labels)}}} {item.counters[name]}")
+        for name, attribute, help_text in (
+            ("latency_seconds", "latency", "LLM request latency."),
+            ("tokens", "tokens", "Prompt plus completion tokens per LLM request.")
+        ):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} histogram")
+            for labels, item in sorted(series.items()):
+                histogram = getattr(item, attribute).to_dict()
+                label_text = self.label_text(labels)
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f'{METRIC_PREFIX}_{name}_bucket{{{label_text},le="{bound}"}} {count}')
+                lines.append(f"{METRIC_PREFIX}_{name}_sum{{{label_text}}} {histogram['sum']}")
+                lines.append(f"{METRIC_PREFIX}_{name}_count{{{label_text}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def label_text(labels: tuple) -> str:
+        """Renders (agent, product, model) as escaped Prometheus labels."""
+        escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return ",".join(f'{name}="{escape(value)}"' for name, value in zip(("agent", "product", "model"), labels))
+
+    def reset(self) -> None:
+        """Drops all recorded series."""
+        with self._lock:
+            self.series.clear()
+
+telemetry = Telemetry()
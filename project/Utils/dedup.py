@@ -0,0 +1,219 @@
+# Near-duplicate review detection with MinHash signatures and LSH banding
+import asyncio
+import copy
+from array import array
+from collections import Counter
+import numpy as np
+
+# Bytes that belong to words: ASCII letters, digits, apostrophes and every non-ASCII (UTF-8) byte
+BYTE_IS_WORD = np.zeros(256, dtype=bool)
+BYTE_IS_WORD[list(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'")] = True
+BYTE_IS_WORD[128:] = True
+BYTE_LOWER = np.arange(256, dtype=np.uint64)
+BYTE_LOWER[65:91] += 32
+HASH_BASE = 0x100000001B3
+HASH_BASE_INVERSE = pow(HASH_BASE, -1, 2**64)
+BIGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+BAND_MULTIPLIER = np.uint64(HASH_BASE)
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index that maps every added review to the first earlier review it
+    near-duplicates, or to itself. Reviews are shingled into word bigrams; signatures of `num_perm`
+    multiply-shift hashes are computed for a whole block of reviews at once with numpy, and split into
+    `bands` LSH bands. Band collisions are confirmed by signature agreement >= `threshold`, an estimate of
+    the Jaccard similarity of the two reviews' bigram sets. Exact repeats are matched by their text hash
+    before any signature is computed. Only representatives' signatures are kept in the index.
+    """
+    def __init__(self, threshold: float = 0.8, num_perm: int = 32, bands: int = 8, block_size: int = 1024, seed: int = 1):
+        """Draws the hash functions; `num_perm` must be divisible by `bands`."""
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.min_agreement = threshold * num_perm
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.block_size = block_size
+        self.multipliers = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self.buckets = [dict() for _ in range(bands)]
+        self.signatures = {}
+        self.exact = {}
+        self.representatives = array("q")
+        self.powers = np.ones(1, dtype=np.uint64)
+        self.inverse_powers = np.ones(1, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def hash_powers(self, size: int):
+        """Returns HASH_BASE**i and HASH_BASE**-i modulo 2**64 for i < size, extending the cached tables."""
+        if len(self.powers) < size:
+            size = max(size, 2 * len(self.powers))
+            self.powers = np.full(size, HASH_BASE, dtype=np.uint64)
+            self.powers[0] = 1
+            np.cumprod(self.powers, out=self.powers)
+            self.inverse_powers = np.full(size, HASH_BASE_INVERSE, dtype=np.uint64)
+            self.inverse_powers[0] = 1
+            np.cumprod(self.inverse_powers, out=self.inverse_powers)
+        return self.powers, self.inverse_powers
+
+    def word_hashes(self, texts: list):
+        """
+        Returns the 64-bit hash of every word in a block of texts and the position of the text it belongs
+        to. Words are runs of word bytes, lowercased; hashes are polynomial, computed for all words at
+        once from wrapping prefix sums over the block's UTF-8 bytes.
+        """
+        encoded = [str(text).encode("utf-8") for text in texts]
+        buffer = np.frombuffer(b"\n".join(encoded) + b"\n", dtype=np.uint8)
+        text_starts = np.cumsum([0] + [len(chunk) + 1 for chunk in encoded[:-1]])
+
+        is_word = np.concatenate(([False], BYTE_IS_WORD[buffer], [False]))
+        edges = np.flatnonzero(is_word[1:] != is_word[:-1])
+        starts, ends = edges[0::2], edges[1::2]
+
+        # With prefix[i] = sum(byte[j] * HASH_BASE**-j for j < i), the hash of buffer[start:end] is
+        # (prefix[end] - prefix[start]) * HASH_BASE**(end - 1); all arithmetic wraps modulo 2**64
+        size = len(buffer)
+        powers, inverse_powers = self.hash_powers(size)
+        prefix = np.zeros(size + 1, dtype=np.uint64)
+        np.cumsum(BYTE_LOWER[buffer] * inverse_powers[:size], out=prefix[1:])
+        hashes = (prefix[ends] - prefix[starts]) * powers[ends - 1]
+        return hashes, np.searchsorted(text_starts, starts, side="right") - 1
+
+    def signatures_of(self, texts: list) -> np.ndarray:
+        """Returns the (len(texts), num_perm) MinHash signatures of a block of texts."""
+        ids, review_of = self.word_hashes(texts)
+        lengths = np.bincount(review_of, minlength=len(texts))
+
+        # Word bigrams that do not cross a review boundary; reviews with fewer than two words get one
+        # shingle of their single word (or 0 when empty) so every review has at least one shingle.
+        same_review = review_of[:-1] == review_of[1:]
+        shingles = (ids[:-1] * BIGRAM_MULTIPLIER ^ ids[1:])[same_review]
+        shingle_review = review_of[:-1][same_review]
+        short = np.flatnonzero(lengths < 2)
+        if len(short):
+            starts = np.cumsum(lengths) - lengths
+            single = np.zeros(len(short), dtype=np.uint64)
+            one_word = lengths[short] == 1
+            single[one_word] = ids[starts[short][one_word]]
+            shingles = np.concatenate((shingles, single))
+            shingle_review = np.concatenate((shingle_review, short))
+            order = np.argsort(shingle_review, kind="stable")
+            shingles, shingle_review = shingles[order], shingle_review[order]
+
+        hashed = np.empty((self.num_perm, len(shingles)), dtype=np.uint64)
+        np.multiply(self.multipliers[:, None], shingles[None, :], out=hashed)
+        hashed += self.offsets[:, None]
+        hashed >>= np.uint64(32)
+        segment_starts = np.searchsorted(shingle_review, np.arange(len(lengths)))
+        return np.minimum.reduceat(hashed, segment_starts, axis=1).T
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Returns one 64-bit key per band and signature, shape (len(signatures), bands)."""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows_per_band)
+        keys = np.zeros(banded.shape[:2], dtype=np.uint64)
+        for row in range(self.rows_per_band):
+            keys = keys * BAND_MULTIPLIER + banded[:, :, row]
+        return keys
+
+    def add_many(self, texts) -> list[int]:
+        """
+        Adds reviews in order and returns, for each, the position of its representative: the first
+        earlier review it near-duplicates, or its own position.
+        """
+        assigned, block = [], []
+        for text in texts:
+            text = str(text)
+            block.append((hash(text), text))
+            if len(block) >= self.block_size:
+                assigned.extend(self._add_block(block))
+                block = []
+        if block:
+            assigned.extend(self._add_block(block))
+        return assigned
+
+    def _add_block(self, block: list) -> list[int]:
+        """Assigns representatives to a block of (exact key, text) pairs."""
+        # Exact repeats of an already indexed text skip MinHash entirely
+        first_seen = {}
+        for i, (key, _) in enumerate(block):
+            if key not in self.exact and key not in first_seen:
+                first_seen[key] = i
+        to_sign = list(first_seen.values())
+        signatures = self.signatures_of([block[i][1] for i in to_sign]) if to_sign else None
+        band_keys = self.band_keys(signatures).tolist() if to_sign else []
+        signed = {i: j for j, i in enumerate(to_sign)}
+
+        assigned = []
+        for i, (key, _) in enumerate(block):
+            position = len(self.representatives)
+            representative = self.exact.get(key)
+            if representative is None:
+                signature, keys = signatures[signed[i]], band_keys[signed[i]]
+                representative = position
+                for band, band_key in enumerate(keys):
+                    candidate = self.buckets[band].get(band_key)
+                    if candidate is not None and np.count_nonzero(self.signatures[candidate] == signature) >= self.min_agreement:
+                        representative = candidate
+                        break
+                if representative == position:
+                    self.signatures[position] = signature
+                    for band, band_key in enumerate(keys):
+                        self.buckets[band].setdefault(band_key, position)
+                self.exact[key] = representative
+            self.representatives.append(representative)
+            assigned.append(representative)
+        return assigned
+
+    def duplicate_counts(self) -> Counter:
+        """Returns {representative position: number of near-duplicates mapped to it}."""
+        return Counter(rep for position, rep in enumerate(self.representatives) if rep != position)
+
+class SharedResults:
+    """
+    Hands the analysis result of a cluster representative to its near-duplicates, in the serial and the
+    async ingestion engine. A result is kept only until its last duplicate has taken a copy.
+    """
+    def __init__(self, duplicate_counts: Counter):
+        """`duplicate_counts` maps representative positions to their number of duplicates."""
+        self.remaining = dict(duplicate_counts)
+        self.results = {}
+        self.waiters = {}
+        self.reused = 0
+
+    def is_duplicate(self, row: dict) -> bool:
+        """Returns True if the row should reuse its representative's result."""
+        return row.get("representative", row.get("row_index")) != row.get("row_index")
+
+    def publish(self, row: dict, result: dict) -> None:
+        """Stores the result of a representative that has duplicates and wakes their waiters."""
+        position = row.get("row_index")
+        if position not in self.remaining:
+            return
+        self.results[position] = result
+        waiter = self.waiters.pop(position, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def take(self, row: dict) -> dict:
+        """Returns a copy of the representative's result for a duplicate row."""
+        representative = row["representative"]
+        result = copy.deepcopy(self.results[representative])
+        self.remaining[representative] -= 1
+        if self.remaining[representative] == 0:
+            del self.remaining[representative]
+            del self.results[representative]
+        self.reused += 1
+        return result
+
+    async def take_async(self, row: dict) -> dict:
+        """Async variant of `take` that waits for a representative still in flight."""
+        representative = row["representative"]
+        while representative not in self.results:
+            if representative not in self.waiters:
+                self.waiters[representative] = asyncio.get_running_loop().create_future()
+            await self.waiters[representative]
+        return self.take(row)
@@ -0,0 +1,139 @@
+# Incremental canonicalization of key-driver phrases into clusters
+import re
+
+PHRASE_STOPWORDS = {"a", "an", "the", "of", "and", "or", "for", "to", "in", "on", "with", "is", "are", "its", "it", "this", "very", "too", "so", "really"}
+# Modifiers shared by many unrelated drivers ("camera quality" / "display quality"); they count little
+GENERIC_TOKENS = {"quality", "issue", "problem", "good", "great", "bad", "poor", "excellent", "nice", "overall", "not", "no", "lack", "feature", "experience"}
+GENERIC_WEIGHT = 0.25
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def singular(token: str) -> str:
+    """Crude plural folding: batteries -> battery, issues -> issue, speakers -> speaker."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def trigrams(token: str) -> set:
+    """Returns the padded character trigrams of a token."""
+    padded = f"#{token}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class DriverIndex:
+    """
+    Maps free-form driver phrases from the LLM ("battery life", "Battery backup", "batteries") to a
+    canonical cluster label, incrementally and without comparing against every known phrase.
+
+    Tokens are first folded onto known tokens through a character-trigram inverted index (plurals and
+    typos), then a phrase is compared only with clusters that share one of its tokens, through a token
+    inverted index. Similarity is the weighted Jaccard similarity of the token sets, with generic modifiers
+    such as "quality" down-weighted: "good battery life" and "long battery life" join "battery life" and
+    "camera quality" joins "camera", but phrases sharing one of two content tokens stay apart ("screen
+    life" / "battery life", "charging port" / "fast charging"), and so do "camera quality" / "display quality".
+    A cluster is labelled by the first phrase that created it; repeated phrases are answered from a cache.
+    """
+    def __init__(self, threshold: float = 0.6, token_threshold: float = 0.7):
+        """Initializes an empty index."""
+        self.threshold = threshold
+        self.token_threshold = token_threshold
+        self.aliases = {}
+        self.labels = []
+        self.position = {}
+        self.label_tokens = {}
+        self.clusters_by_token = {}
+        self.tokens = {}
+        self.tokens_by_trigram = {}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def canonical_token(self, token: str) -> str:
+        """Returns the known token a new token is a variant of, registering it if there is none."""
+        token = singular(token)
+        if token in self.tokens:
+            return self.tokens[token]
+        grams = trigrams(token)
+        best, best_score = token, 0.0
+        candidates = set()
+        for gram in grams:
+            candidates.update(self.tokens_by_trigram.get(gram, ()))
+        for candidate in candidates:
+            if abs(len(candidate) - len(token)) > 2:
+                continue
+            candidate_grams = trigrams(candidate)
+            score = len(grams & candidate_grams) / len(grams | candidate_grams)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best_score < self.token_threshold:
+            best = token
+            for gram in grams:
+                self.tokens_by_trigram.setdefault(gram, []).append(token)
+        self.tokens[token] = best
+        return best
+
+    def phrase_tokens(self, phrase: str) -> tuple:
+        """Returns the canonical content tokens of a phrase."""
+        words = [word for word in TOKEN_PATTERN.findall(phrase.lower()) if word not in PHRASE_STOPWORDS]
+        return tuple(dict.fromkeys(self.canonical_token(word) for word in words))
+
+    @staticmethod
+    def weight(tokens) -> float:
+        """Returns the summed weight of a token set."""
+        return sum(GENERIC_WEIGHT if token in GENERIC_TOKENS else 1.0 for token in tokens)
+
+    def canonical(self, phrase: str) -> str:
+        """Returns the cluster label of a driver phrase, creating a new cluster when nothing is similar."""
+        key = " ".join(str(phrase).lower().split())
+        label = self.aliases.get(key)
+        if label is not None:
+            return label
+
+        tokens = self.phrase_tokens(key)
+        lookup = [token for token in tokens if token not in GENERIC_TOKENS] or list(tokens)
+        candidates = set()
+        for token in lookup:
+            candidates.update(self.clusters_by_token.get(token, ()))
+
+        best, best_score = None, 0.0
+        # Candidates in creation order, so ties go to the oldest cluster
+        for candidate in sorted(candidates, key=self.position.get):
+            candidate_tokens = self.label_tokens[candidate]
+            shared = self.weight(set(tokens) & set(candidate_tokens))
+            score = shared / self.weight(set(tokens) | set(candidate_tokens))
+            if score > best_score:
+                best, best_score = candidate, score
+
+        if best is None or best_score < self.threshold:
+            best = self.add_cluster(key, tokens)
+        self.aliases[key] = best
+        return best
+
+    def add_cluster(self, label: str, tokens: tuple = None) -> str:
+        """Registers a new cluster labelled `label`."""
+        tokens = self.phrase_tokens(label) if tokens is None else tokens
+        self.position[label] = len(self.labels)
+        self.labels.append(label)
+        self.label_tokens[label] = tokens
+        for token in tokens:
+            self.clusters_by_token.setdefault(token, []).append(label)
+        return label
+
+    def members(self, label: str) -> list[str]:
+        """Returns the phrases mapped to a cluster."""
+        return [phrase for phrase, alias in self.aliases.items() if alias == label]
+
+    def to_state(self) -> dict:
+        """Returns the clusters in creation order and the phrase aliases as JSON-serializable values."""
+        return {"labels": list(self.labels), "aliases": dict(self.aliases)}
+
+    @classmethod
+    def from_state(cls, state: dict, **kwargs) -> "DriverIndex":
+        """Rebuilds an index from `to_state` output."""
+        index = cls(**kwargs)
+        for label in state.get("labels", []):
+            index.add_cluster(label)
+        for phrase, label in state.get("aliases", {}).items():
+            if label in index.label_tokens:
+                index.aliases[phrase] = label
+        return index
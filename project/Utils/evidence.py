@@ -0,0 +1,90 @@
+# Token-budgeted evidence selection for the summary, USP and issue prompts
+import heapq
+import math
+import re
+from collections import Counter
+from Utils.helpers import estimate_tokens
+
+DEFAULT_EVIDENCE_TOKEN_BUDGET = 600
+DEFAULT_DRIVER_TOKEN_BUDGET = 150
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _words(text: str) -> frozenset:
+    """Returns the lowercase word set of a text."""
+    return frozenset(WORD_PATTERN.findall(text.lower()))
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    """Returns the Jaccard similarity of two word sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def evidence_score(meta: dict, driver_counts) -> float:
+    """
+    Scores one justification by how often its drivers were mentioned, how intense the review was and
+    how many reviews produced the same justification.
+    """
+    frequency = sum(driver_counts.get(str(driver).lower(), 0) for driver in meta.get("drivers", []))
+    intensity = meta.get("intensity", 0.0)
+    repeats = meta.get("count", 1)
+    return (1 + math.log1p(frequency)) * (0.5 + intensity) * (1 + math.log1p(repeats - 1))
+
+def select_evidence(justifications, evidence: dict, driver_counts, token_budget: int = DEFAULT_EVIDENCE_TOKEN_BUDGET, similarity_threshold: float = 0.6) -> list[str]:
+    """
+    Returns a diverse, high-signal subset of `justifications` whose estimated size fits `token_budget`.
+    Texts are deduplicated on their normalized words and ranked with `evidence_score` using the per-text
+    metadata in `evidence` ({"drivers", "intensity", "count"}). Selection is greedy: near-duplicates of an
+    already selected text are dropped, and texts whose drivers are already covered are discounted, so the
+    subset spreads over features instead of repeating the most frequent one.
+    """
+    candidates = {}
+    for text in justifications:
+        if not text:
+            continue
+        words = _words(text)
+        meta = evidence.get(text, {})
+        score = evidence_score(meta, driver_counts)
+        if words and (words not in candidates or candidates[words][0] < score):
+            candidates[words] = (score, text, tuple(str(driver).lower() for driver in meta.get("drivers", [])))
+
+    # Lazy greedy: a popped candidate is re-scored against the current coverage and pushed back if it dropped
+    heap = [(-score, text, words, drivers, 0) for words, (score, text, drivers) in candidates.items()]
+    heapq.heapify(heap)
+    selected, selected_words, covered = [], [], Counter()
+    used = 0
+    while heap and token_budget - used > 0:
+        negative_score, text, words, drivers, seen_coverage = heapq.heappop(heap)
+        coverage = min((covered[driver] for driver in drivers), default=0)
+        if coverage != seen_coverage:
+            base_score = -negative_score * (1 + seen_coverage)
+            heapq.heappush(heap, (-base_score / (1 + coverage), text, words, drivers, coverage))
+            continue
+        if any(_similarity(words, other) >= similarity_threshold for other in selected_words):
+            continue
+        cost = estimate_tokens(text) + 2
+        if used + cost > token_budget:
+            continue
+        selected.append(text)
+        selected_words.append(words)
+        covered.update(drivers)
+        used += cost
+    return selected
+
+def format_evidence(texts: list[str]) -> str:
+    """Renders selected justifications as a bulleted prompt section."""
+    return "\n        ".join(f"- {text}" for text in texts) if texts else "None"
+
+def format_driver_counts(items, token_budget: int = DEFAULT_DRIVER_TOKEN_BUDGET) -> str:
+    """
+    Joins "feature (frequency: n)" entries of (feature, count) pairs, most frequent first, until
+    `token_budget` is reached.
+    """
+    parts, used = [], 0
+    for feature, count in items:
+        part = f"{feature} (frequency: {count})"
+        cost = estimate_tokens(part) + 1
+        if parts and used + cost > token_budget:
+            break
+        parts.append(part)
+        used += cost
+    return ', '.join(parts)
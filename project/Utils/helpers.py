@@ -1,76 +1,206 @@
-import nltk
-import pandas as pd
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-from datetime import datetime
-
-nltk.download('wordnet')
-nltk.download('stopwords')
-nltk.download('punkt')
-
-def compute_word_diversity(df: pd.DataFrame):
-    """Returns vocabulary richness of customer reviews."""
-    stemmer = PorterStemmer()
-    all_reviews = " ".join(df['customer_review'].dropna().astype(str).apply(lambda x: x.lower()).tolist())
-    tokens = word_tokenize(all_reviews)
-    stop_words = set(stopwords.words('english'))
-    filtered_tokens = [stemmer.stem(token) for token in tokens if token.isalpha() and token not in stop_words]
-    
-    vocab_richness = len(set(filtered_tokens))/len(filtered_tokens)
-    return vocab_richness
-
-def assess_data_quality(df: pd.DataFrame):
-    """Returns quality metrics of the review dataset."""
-    quality_metrics = {}
-    try:
-        avg_review_len = df['review_length'].mean()
-        quality_metrics['review_length_ratio'] = round(min(avg_review_len/100, 1), 2)
-        
-        dates = df['review_date'].apply(lambda x: calculate_days_passed(x))
-        date_range = max(dates) - min(dates)
-        quality_metrics['temporal_spread'] = round(min(date_range/365, 1), 2)
-
-        quality_metrics['vocab_richness'] = compute_word_diversity(df)
-
-        verified_purchase = df[df['verified_purchase'] == True]
-        quality_metrics['verified_purchase_ratio'] = round(len(verified_purchase)/len(df), 2)
-
-        quality_metrics['rating_mean'] = round(df['rating'].mean(), 2)
-        quality_metrics['rating_std'] = round(df['rating'].std(), 2)
-
-        empty_ratio = df.isnull().sum().sum()/(len(df) * len(df.columns))
-        quality_metrics['review_completeness'] = round((1 - empty_ratio), 2)
-        return quality_metrics
-    
-    except Exception as e:
-        print(f"Failed to analyze data quality: {str(e)}")
-        return {}
-
-def autonomous_task_selection(df: pd.DataFrame):
-    """Returns list of tasks to perform and data quality parameters based on review quality."""
-    selections = []
-    quality_params = assess_data_quality(df)
-    if quality_params['review_completeness'] != 1:
-        print(f"Data has missing values with completeness ratio : {quality_params['review_completeness']}")
-        return selections, quality_params
-    selections.append("sentiment")
-    selections.append("summary")
-    try:
-        if len(df) > 50 and quality_params['temporal_spread'] >= 0.1:
-            selections.append("trend_analysis")
-        if quality_params['vocab_richness'] > 0.1 and quality_params['verified_purchase_ratio'] > 0.8 and quality_params['review_length_ratio'] > 0.7:
-            selections.append("usps")
-            selections.append("issues")
-        return selections, quality_params
-    except Exception as e:
-        print(f"Failed to complete task selection: {str(e)}")
-    return selections, quality_params
-
-def calculate_days_passed(date_str: str):
-    """Returns days passed since given date string."""
-    past_date = datetime.strptime(date_str, "%d-%m-%Y")
-    today = datetime.today()
-    days_passed = (today - past_date).days
-
-    return days_passed
\ No newline at end of file
+import hashlib
+import os
+import re
+import threading
+import pandas as pd
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+# NLTK data packages used by the quality metrics, by their nltk.data path
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords"
+}
+# Missing NLTK data is only downloaded when explicitly allowed, so air-gapped workers never touch the network
+NLTK_ALLOW_DOWNLOADS = os.environ.get("REVIEW_ANALYZER_ALLOW_DOWNLOADS", "").lower() in ("1", "true", "yes")
+# Seconds to wait for a download; nltk's own requests have no timeout
+NLTK_DOWNLOAD_TIMEOUT = float(os.environ.get("REVIEW_ANALYZER_DOWNLOAD_TIMEOUT", "10"))
+# NLTK's English stopword list, used when the corpus is not installed and cannot be downloaded
+ENGLISH_STOPWORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves he him his
+himself she she's her hers herself it it's its itself they them their theirs themselves what which who whom this
+that that'll these those am is are was were be been being have has had having do does did doing a an the and but
+if or because as until while of at by for with about against between into through during before after above below
+to from up down in out on off over under again further then once here there when where why how all any both each
+few more most other some such no nor not only own same so than too very s t can will just don don't should
+should've now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't
+haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn shouldn't wasn wasn't
+weren weren't won won't wouldn wouldn't
+""".split())
+SIMPLE_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+@lru_cache(maxsize=None)
+def ensure_nltk_resource(name: str) -> bool:
+    """
+    Returns True if an NLTK data package is installed. Missing packages are downloaded on first use only
+    when REVIEW_ANALYZER_ALLOW_DOWNLOADS is set. The download runs on a daemon thread that is waited
+    for at most NLTK_DOWNLOAD_TIMEOUT seconds and abandoned after that, without touching process-wide
+    socket settings. Checked once per process, never at import time.
+    """
+    import nltk
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+        return True
+    except LookupError:
+        pass
+    if not NLTK_ALLOW_DOWNLOADS:
+        print(f"NLTK resource '{name}' is not installed and downloads are disabled; using the built-in fallback.")
+        return False
+    outcome = {}
+
+    def download():
+        try:
+            outcome["installed"] = bool(nltk.download(name, quiet=True, raise_on_error=True))
+        except Exception as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=download, name=f"nltk-download-{name}", daemon=True)
+    worker.start()
+    worker.join(NLTK_DOWNLOAD_TIMEOUT)
+    if worker.is_alive():
+        print(f"Downloading NLTK resource '{name}' timed out after {NLTK_DOWNLOAD_TIMEOUT}s; using the built-in fallback.")
+        return False
+    if "error" in outcome:
+        print(f"Failed to download NLTK resource '{name}': {str(outcome['error'])}")
+        return False
+    return outcome.get("installed", False)
+
+def tokenize_words(text: str) -> list:
+    """Returns NLTK word tokens of a text, or regex word/punctuation tokens when punkt is unavailable."""
+    # Newer NLTK releases load punkt_tab, older ones punkt; punkt is only looked for without punkt_tab
+    if any(ensure_nltk_resource(name) for name in ("punkt_tab", "punkt")):
+        from nltk.tokenize import word_tokenize
+        try:
+            return word_tokenize(text)
+        except LookupError as e:
+            print(f"NLTK tokenizer unavailable, using the built-in fallback: {str(e).strip().splitlines()[0]}")
+    return SIMPLE_TOKEN_PATTERN.findall(text)
+
+@lru_cache(maxsize=1)
+def english_stopwords() -> frozenset:
+    """Returns NLTK's English stopwords, from the corpus when available."""
+    if ensure_nltk_resource("stopwords"):
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    return ENGLISH_STOPWORDS
+
+def review_stems(reviews: pd.Series) -> list:
+    """Returns the stemmed, stopword-free alphabetic tokens of a series of reviews."""
+    from nltk.stem import PorterStemmer
+    stemmer = PorterStemmer()
+    all_reviews = " ".join(reviews.dropna().astype(str).str.lower().tolist())
+    tokens = tokenize_words(all_reviews)
+    stop_words = english_stopwords()
+    # Stem each distinct token once; review vocabularies are tiny compared to their token counts
+    stems = {token: stemmer.stem(token) for token in set(tokens) if token.isalpha() and token not in stop_words}
+    return [stems[token] for token in tokens if token in stems]
+
+def compute_word_diversity(df: pd.DataFrame):
+    """Returns vocabulary richness of customer reviews."""
+    filtered_tokens = review_stems(df['customer_review'])
+    
+    vocab_richness = len(set(filtered_tokens))/len(filtered_tokens)
+    return vocab_richness
+
+def assess_data_quality(df: pd.DataFrame):
+    """
+    Returns quality metrics of the review dataset.
+    Every metric is computed column-wise: review dates are parsed once with their fixed format and the
+    remaining aggregates are single reductions over their column.
+    """
+    quality_metrics = {}
+    try:
+        avg_review_len = df['review_length'].mean()
+        quality_metrics['review_length_ratio'] = round(min(avg_review_len/100, 1), 2)
+        
+        dates = pd.to_datetime(df['review_date'], format="%d-%m-%Y")
+        date_range = (dates.max() - dates.min()).days
+        quality_metrics['temporal_spread'] = round(min(date_range/365, 1), 2)
+
+        quality_metrics['vocab_richness'] = compute_word_diversity(df)
+
+        verified_purchase = int((df['verified_purchase'] == True).sum())
+        quality_metrics['verified_purchase_ratio'] = round(verified_purchase/len(df), 2)
+
+        quality_metrics['rating_mean'] = round(df['rating'].mean(), 2)
+        quality_metrics['rating_std'] = round(df['rating'].std(), 2)
+
+        empty_ratio = df.isnull().to_numpy().sum()/df.size
+        quality_metrics['review_completeness'] = round((1 - empty_ratio), 2)
+        return quality_metrics
+    
+    except Exception as e:
+        print(f"Failed to analyze data quality: {str(e)}")
+        return {}
+
+def autonomous_task_selection(df: pd.DataFrame):
+    """Returns list of tasks to perform and data quality parameters based on review quality."""
+    quality_params = assess_data_quality(df)
+    return select_tasks(quality_params, len(df)), quality_params
+
+def select_tasks(quality_params: dict, review_count: int):
+    """Returns the list of tasks the data quality parameters of a dataset with `review_count` reviews support."""
+    selections = []
+    if quality_params.get('review_completeness') != 1:
+        print(f"Data has missing values with completeness ratio : {quality_params.get('review_completeness')}")
+        return selections
+    selections.append("sentiment")
+    selections.append("summary")
+    try:
+        if review_count > 50 and quality_params['temporal_spread'] >= 0.1:
+            selections.append("trend_analysis")
+        if quality_params['vocab_richness'] > 0.1 and quality_params['verified_purchase_ratio'] > 0.8 and quality_params['review_length_ratio'] > 0.7:
+            selections.append("usps")
+            selections.append("issues")
+        return selections
+    except Exception as e:
+        print(f"Failed to complete task selection: {str(e)}")
+    return selections
+
+def calculate_days_passed(date_str: str):
+    """Returns days passed since given date string."""
+    past_date = datetime.strptime(date_str, "%d-%m-%Y")
+    today = datetime.today()
+    days_passed = (today - past_date).days
+
+    return days_passed
+
+def iter_chunks(iterable, size: int):
+    """Yields consecutive lists of at most `size` items from any iterable without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def estimate_tokens(text: str) -> int:
+    """Returns a cheap local estimate of the number of LLM tokens in a text (about 4 characters per token)."""
+    return max(1, (len(text) + 3) // 4)
+
+def pack_by_token_budget(items, cost_fn, token_budget: int, max_items: int):
+    """
+    Lazily groups items into consecutive batches whose summed `cost_fn` stays within `token_budget`
+    and whose size stays within `max_items`. An item that alone exceeds the budget forms its own batch.
+    """
+    batch, batch_cost = [], 0
+    for item in items:
+        cost = cost_fn(item)
+        if batch and (batch_cost + cost > token_budget or len(batch) >= max_items):
+            yield batch
+            batch, batch_cost = [], 0
+        batch.append(item)
+        batch_cost += cost
+    if batch:
+        yield batch
+
+def review_fingerprint(row) -> str:
+    """
+    Returns a stable fingerprint of a review row built from its normalized text, reviewer and date.
+    Used to recognize reviews a persisted ProductMemory has already absorbed.
+    """
+    text = re.sub(r"\s+", " ", str(row['customer_review'])).strip().lower()
+    key = "\x1f".join([text, str(row['customer_name']).strip().lower(), str(row['review_date']).strip()])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,177 @@
+# Streaming ingestion of review files
+import math
+import pandas as pd
+from Utils.helpers import review_stems, iter_chunks
+
+REQUIRED_COLUMNS = {"customer_review", "rating", "verified_purchase", "review_date", "customer_name", "helpful_votes", "total_votes", "review_length"}
+DEFAULT_CHUNKSIZE = 10000
+
+def _is_excel(source, filename: str = None) -> bool:
+    """Returns True if the source looks like an .xlsx workbook."""
+    name = filename or (source if isinstance(source, str) else getattr(source, "name", ""))
+    return str(name).lower().endswith((".xlsx", ".xlsm"))
+
+def iter_review_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE, filename: str = None):
+    """
+    Yields a review file as DataFrames of at most `chunksize` rows, so only one chunk is held in memory.
+    `source` is a path or a seekable file object such as a Streamlit upload; every call starts from the
+    beginning of the file, which lets callers make several passes. Workbooks are streamed through
+    openpyxl's read-only mode.
+    """
+    if hasattr(source, "seek"):
+        source.seek(0)
+    if _is_excel(source, filename):
+        yield from _iter_excel_chunks(source, chunksize)
+        return
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        yield chunk
+
+def _iter_excel_chunks(source, chunksize: int):
+    """Streams the active sheet of a workbook as DataFrame chunks."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for batch in iter_chunks(rows, chunksize):
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def iter_review_rows(source, chunksize: int = DEFAULT_CHUNKSIZE, filename: str = None):
+    """Yields review rows as dicts, reading the file chunk by chunk."""
+    for chunk in iter_review_chunks(source, chunksize, filename):
+        yield from chunk.to_dict('records')
+
+def missing_columns(columns) -> set:
+    """Returns the required review columns absent from `columns`."""
+    return REQUIRED_COLUMNS - set(columns)
+
+class StreamingQualityAssessor:
+    """
+    Computes the metrics of `assess_data_quality` incrementally, one chunk at a time.
+    Only running sums, extrema and the review vocabulary are kept, so memory is bounded by the
+    vocabulary size rather than by the number of reviews.
+    """
+    def __init__(self):
+        """Initializes empty running statistics."""
+        self.product_name = None
+        self.rows = 0
+        self.cells = 0
+        self.nulls = 0
+        self.verified = 0
+        self.length_sum = 0.0
+        self.length_count = 0
+        self.rating_count = 0
+        self.rating_mean = 0.0
+        self.rating_m2 = 0.0
+        self.min_date = None
+        self.max_date = None
+        self.vocabulary = set()
+        self.token_count = 0
+        self.error = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Folds one chunk of reviews into the running statistics."""
+        if self.error is not None or chunk.empty:
+            return
+        try:
+            if self.product_name is None and 'product_name' in chunk.columns:
+                self.product_name = chunk['product_name'].iloc[0]
+            self.rows += len(chunk)
+            self.cells += chunk.size
+            self.nulls += int(chunk.isnull().to_numpy().sum())
+            self.verified += int((chunk['verified_purchase'] == True).sum())
+
+            lengths = chunk['review_length'].dropna()
+            self.length_sum += float(lengths.sum())
+            self.length_count += len(lengths)
+
+            dates = pd.to_datetime(chunk['review_date'], format="%d-%m-%Y")
+            chunk_min, chunk_max = dates.min(), dates.max()
+            self.min_date = chunk_min if self.min_date is None else min(self.min_date, chunk_min)
+            self.max_date = chunk_max if self.max_date is None else max(self.max_date, chunk_max)
+
+            ratings = chunk['rating'].dropna().astype(float)
+            if len(ratings):
+                count, mean = len(ratings), float(ratings.mean())
+                m2 = float(((ratings - mean) ** 2).sum())
+                total = self.rating_count + count
+                delta = mean - self.rating_mean
+                self.rating_mean += delta * count / total
+                self.rating_m2 += m2 + delta ** 2 * self.rating_count * count / total
+                self.rating_count = total
+
+            stems = review_stems(chunk['customer_review'])
+            self.vocabulary.update(stems)
+            self.token_count += len(stems)
+        except Exception as e:
+            self.error = e
+
+    def merged(self, other: "StreamingQualityAssessor") -> "StreamingQualityAssessor":
+        """
+        Returns a new assessor holding the statistics of both assessors, as if their rows had been folded
+        into one. Costs one union of the vocabularies, independent of the number of rows behind them.
+        """
+        combined = StreamingQualityAssessor()
+        combined.product_name = self.product_name if self.product_name is not None else other.product_name
+        combined.error = self.error or other.error
+        for name in ("rows", "cells", "nulls", "verified", "length_sum", "length_count", "token_count"):
+            setattr(combined, name, getattr(self, name) + getattr(other, name))
+        dates = [date for date in (self.min_date, self.max_date, other.min_date, other.max_date) if date is not None]
+        if dates:
+            combined.min_date, combined.max_date = min(dates), max(dates)
+        combined.rating_count = self.rating_count + other.rating_count
+        if combined.rating_count:
+            delta = other.rating_mean - self.rating_mean
+            combined.rating_mean = self.rating_mean + delta * other.rating_count / combined.rating_count
+            combined.rating_m2 = self.rating_m2 + other.rating_m2 + delta ** 2 * self.rating_count * other.rating_count / combined.rating_count
+        combined.vocabulary = self.vocabulary | other.vocabulary
+        return combined
+
+    def to_state(self) -> dict:
+        """Returns the running statistics as JSON-serializable values."""
+        return {
+            "product_name": self.product_name, "rows": self.rows, "cells": self.cells, "nulls": self.nulls,
+            "verified": self.verified, "length_sum": self.length_sum, "length_count": self.length_count,
+            "rating_count": self.rating_count, "rating_mean": self.rating_mean, "rating_m2": self.rating_m2,
+            "min_date": self.min_date.isoformat() if self.min_date is not None else None,
+            "max_date": self.max_date.isoformat() if self.max_date is not None else None,
+            "vocabulary": sorted(self.vocabulary), "token_count": self.token_count
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "StreamingQualityAssessor":
+        """Rebuilds an assessor from `to_state` values."""
+        assessor = cls()
+        for name, value in state.items():
+            if not hasattr(assessor, name):
+                continue
+            if name in ("min_date", "max_date"):
+                value = pd.Timestamp(value) if value is not None else None
+            elif name == "vocabulary":
+                value = set(value)
+            setattr(assessor, name, value)
+        return assessor
+
+    def result(self) -> dict:
+        """Returns the quality metrics in the same form as `assess_data_quality`, or {} on failure."""
+        quality_metrics = {}
+        try:
+            if self.error is not None:
+                raise self.error
+            quality_metrics['review_length_ratio'] = round(min(self.length_sum / self.length_count / 100, 1), 2)
+            quality_metrics['temporal_spread'] = round(min((self.max_date - self.min_date).days / 365, 1), 2)
+            quality_metrics['vocab_richness'] = len(self.vocabulary) / self.token_count
+            quality_metrics['verified_purchase_ratio'] = round(self.verified / self.rows, 2)
+            quality_metrics['rating_mean'] = round(self.rating_mean, 2)
+            rating_std = math.sqrt(self.rating_m2 / (self.rating_count - 1)) if self.rating_count > 1 else float("nan")
+            quality_metrics['rating_std'] = round(rating_std, 2)
+            quality_metrics['review_completeness'] = round(1 - self.nulls / self.cells, 2)
+            return quality_metrics
+
+        except Exception as e:
+            print(f"Failed to analyze data quality: {str(e)}")
+            return {}
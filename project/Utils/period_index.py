@@ -0,0 +1,183 @@
+# Chronologically ordered per-period sentiment aggregates (day, week and month)
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+
+GRANULARITIES = ("day", "week", "month")
+SPAN_MONTHS = {"year": 12, "halfyear": 6, "quarter": 3, "month": 1}
+SCORE_COLUMNS = ("score_sum", "score_count")
+
+class PeriodSeries:
+    """
+    Sentiment aggregates of one granularity as parallel numeric columns over sorted integer period keys:
+    day ordinals, the ordinal of the Monday of a week, or year * 12 + month - 1. Each sentiment category
+    has a count column next to `score_sum` / `score_count`. Prefix sums are rebuilt lazily after updates,
+    so a range total costs two binary searches and a subtraction per column, O(log n), and listing the
+    periods of a range costs O(log n + k).
+    """
+    def __init__(self, granularity: str):
+        """Initializes an empty series; `granularity` is "day", "week" or "month"."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+        self.granularity = granularity
+        self.keys = []
+        self.columns = {name: [] for name in SCORE_COLUMNS}
+        self._prefix = None
+
+    def key(self, day: date) -> int:
+        """Returns the key of the period containing `day`."""
+        if self.granularity == "day":
+            return day.toordinal()
+        if self.granularity == "week":
+            return day.toordinal() - day.weekday()
+        return day.year * 12 + day.month - 1
+
+    def start(self, key: int) -> date:
+        """Returns the first day of a period."""
+        if self.granularity == "month":
+            return date(key // 12, key % 12 + 1, 1)
+        return date.fromordinal(key)
+
+    def label(self, key: int) -> str:
+        """Returns the display label of a period: "%d-%m-%Y", ISO "%G-W%V" or "%m-%Y" (the monthly report keys)."""
+        if self.granularity == "day":
+            return self.start(key).strftime("%d-%m-%Y")
+        if self.granularity == "week":
+            year, week, _ = self.start(key).isocalendar()
+            return f"{year}-W{week:02d}"
+        return f"{key % 12 + 1:02d}-{key // 12}"
+
+    def add(self, key: int, category: str, score: float, count: int = 1) -> None:
+        """Adds `count` reviews of a sentiment category with a total score of `score` to a period."""
+        position = bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            self.keys.insert(position, key)
+            for column in self.columns.values():
+                column.insert(position, 0)
+        if category not in self.columns:
+            self.columns[category] = [0] * len(self.keys)
+        self.columns[category][position] += count
+        self.columns["score_sum"][position] += score
+        self.columns["score_count"][position] += count
+        self._prefix = None
+
+    def row(self, position: int) -> dict:
+        """Returns the aggregates of the period at a position, with its average score."""
+        row = {name: column[position] for name, column in self.columns.items()}
+        row["average_sentiment_score"] = row["score_sum"] / row["score_count"] if row["score_count"] else 0.0
+        return row
+
+    def positions(self, start: int = None, end: int = None) -> range:
+        """Returns the positions of the periods with keys in [start, end] (None: unbounded)."""
+        low = 0 if start is None else bisect_left(self.keys, start)
+        high = len(self.keys) if end is None else bisect_right(self.keys, end)
+        return range(low, max(low, high))
+
+    def rows(self, start: int = None, end: int = None) -> list:
+        """Returns (key, aggregates) of the periods in [start, end], oldest first."""
+        return [(self.keys[position], self.row(position)) for position in self.positions(start, end)]
+
+    def totals(self, start: int = None, end: int = None) -> dict:
+        """Returns the aggregates summed over the periods in [start, end]."""
+        if self._prefix is None:
+            self._prefix = {name: [0] + list(accumulate(column)) for name, column in self.columns.items()}
+        span = self.positions(start, end)
+        totals = {name: prefix[span.stop] - prefix[span.start] for name, prefix in self._prefix.items()}
+        totals["average_sentiment_score"] = totals["score_sum"] / totals["score_count"] if totals["score_count"] else 0.0
+        totals["periods"] = len(span)
+        return totals
+
+    def to_state(self) -> dict:
+        """Returns the keys and columns as JSON-serializable values."""
+        return {"keys": list(self.keys), "columns": {name: list(column) for name, column in self.columns.items()}}
+
+    @classmethod
+    def from_state(cls, granularity: str, state: dict) -> "PeriodSeries":
+        """Rebuilds a series from `to_state` values."""
+        series = cls(granularity)
+        series.keys = list(state.get("keys", []))
+        series.columns.update({name: list(column) for name, column in state.get("columns", {}).items()})
+        return series
+
+class PeriodIndex:
+    """
+    Day, week and month `PeriodSeries` of a product, updated together. `span` answers the trend
+    analyzer's windows (historical, year, halfyear, quarter, month) as key ranges ending at the latest
+    period, at any granularity.
+    """
+    def __init__(self):
+        """Initializes empty series for every granularity."""
+        self.series = {granularity: PeriodSeries(granularity) for granularity in GRANULARITIES}
+
+    def add(self, day: date, category: str, score: float) -> None:
+        """Records one review of `day` in every granularity."""
+        for series in self.series.values():
+            series.add(series.key(day), category, score)
+
+    def span_bounds(self, time_span: str, granularity: str = "month"):
+        """
+        Returns the (start, end) keys of a time span ending at the latest period, or None when the history
+        is empty or, for a windowed span, not longer than the window.
+        """
+        series = self.series[granularity]
+        if not series.keys:
+            return None
+        first, last = series.keys[0], series.keys[-1]
+        if time_span == "historical":
+            return first, last
+        months = SPAN_MONTHS[time_span]
+        if granularity == "month":
+            start = last - months + 1
+        else:
+            # Periods starting after the same day `months` earlier than the end of the latest period
+            end_day = series.start(last).toordinal() + (6 if granularity == "week" else 0)
+            boundary = shift_months(date.fromordinal(end_day), -months)
+            start = series.key(date.fromordinal(boundary.toordinal() + 1))
+        if start <= first:
+            return None
+        return start, last
+
+    def span(self, time_span: str, granularity: str = "month") -> list:
+        """Returns (label, aggregates) of the periods of a time span, oldest first, or None if unavailable."""
+        bounds = self.span_bounds(time_span, granularity)
+        if bounds is None:
+            return None
+        series = self.series[granularity]
+        return [(series.label(key), row) for key, row in series.rows(*bounds)]
+
+    def to_state(self) -> dict:
+        """Returns every series as JSON-serializable values keyed by granularity."""
+        return {granularity: series.to_state() for granularity, series in self.series.items()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "PeriodIndex":
+        """Rebuilds an index from `to_state` values."""
+        index = cls()
+        for granularity, series_state in state.items():
+            index.series[granularity] = PeriodSeries.from_state(granularity, series_state)
+        return index
+
+    @classmethod
+    def from_monthly_report(cls, monthly_report: dict) -> "PeriodIndex":
+        """
+        Rebuilds the month series of memories saved before the index existed from their "%m-%Y" monthly
+        reports; their day and week series start empty.
+        """
+        index = cls()
+        months = index.series["month"]
+        for month, report in monthly_report.items():
+            month_number, year = (int(part) for part in month.split("-"))
+            key = year * 12 + month_number - 1
+            # Creates the period with its score sum; category counts carry no score of their own
+            months.add(key, "neutral", report.get("score_sum", 0.0), 0)
+            for category, count in report.get("sentiment", {}).items():
+                months.add(key, category, 0.0, count)
+            months.columns["score_count"][bisect_left(months.keys, key)] = report.get("score_count", 0)
+        return index
+
+def shift_months(day: date, months: int) -> date:
+    """Returns `day` moved by a number of calendar months, clamped to the length of the target month."""
+    month_key = day.year * 12 + day.month - 1 + months
+    year, month = month_key // 12, month_key % 12 + 1
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, min(day.day, (next_month - date(year, month, 1)).days))
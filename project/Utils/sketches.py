@@ -0,0 +1,103 @@
+# Bounded-memory summaries of unbounded per-period streams
+import random
+
+class SpaceSaving:
+    """
+    Heavy-hitter sketch (Space-Saving) over a stream of items that keeps at most `capacity` counters.
+    A new item replaces the item with the smallest count and inherits that count as its error, so every
+    reported count overestimates the true count by at most its `errors` entry, and any item occurring more
+    than total / capacity times is guaranteed to be tracked.
+    """
+    def __init__(self, capacity: int = 50):
+        """Initializes an empty sketch."""
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def add(self, item, count: int = 1) -> None:
+        """Counts `count` occurrences of an item."""
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            return
+        evicted = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(evicted)
+        del self.errors[evicted]
+        self.counts[item] = floor + count
+        self.errors[item] = floor
+
+    def top(self, k: int = None, guaranteed: bool = False) -> list:
+        """
+        Returns up to `k` (None: all) tracked (item, count) pairs, most frequent first. Counts are the
+        upper-bound estimates, or with `guaranteed` the lower bounds (estimate minus error), which keep
+        items that only churned through the sketch from outranking steady ones.
+        """
+        if guaranteed:
+            pairs = [(item, count - self.errors[item]) for item, count in self.counts.items()]
+        else:
+            pairs = list(self.counts.items())
+        ranked = sorted(pairs, key=lambda pair: pair[1], reverse=True)
+        return ranked if k is None else ranked[:k]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def to_state(self) -> dict:
+        """Returns the sketch as JSON-serializable values."""
+        return {"capacity": self.capacity, "total": self.total,
+                "counts": [[item, count, self.errors[item]] for item, count in self.counts.items()]}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SpaceSaving":
+        """Rebuilds a sketch from `to_state` values."""
+        sketch = cls(state.get("capacity", 50))
+        sketch.total = state.get("total", 0)
+        for item, count, error in state.get("counts", []):
+            sketch.counts[item] = count
+            sketch.errors[item] = error
+        return sketch
+
+class Reservoir:
+    """
+    Uniform random sample of at most `capacity` items of a stream (reservoir sampling, algorithm R):
+    after n items, each of them is in the sample with probability capacity / n. The random stream is
+    derived from `seed` and the number of items seen, so a restored reservoir continues deterministically.
+    """
+    def __init__(self, capacity: int = 20, seed: int = 0):
+        """Initializes an empty sample."""
+        self.capacity = capacity
+        self.seed = seed
+        self.items = []
+        self.seen = 0
+        self._random = random.Random(seed)
+
+    def add(self, item) -> None:
+        """Offers one item of the stream to the sample."""
+        self.seen += 1
+        if len(self.items) < self.capacity:
+            self.items.append(item)
+            return
+        slot = self._random.randrange(self.seen)
+        if slot < self.capacity:
+            self.items[slot] = item
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def to_state(self) -> dict:
+        """Returns the sample as JSON-serializable values."""
+        return {"capacity": self.capacity, "seed": self.seed, "seen": self.seen, "items": list(self.items)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Reservoir":
+        """Rebuilds a sample from `to_state` values."""
+        reservoir = cls(state.get("capacity", 20), state.get("seed", 0))
+        reservoir.items = list(state.get("items", []))
+        reservoir.seen = state.get("seen", len(reservoir.items))
+        reservoir._random = random.Random(f"{reservoir.seed}:{reservoir.seen}")
+        return reservoir
@@ -1,49 +1,523 @@
-import pickle
-from tqdm import tqdm
-from analyzer.sentiment import SentimentAnalyzerAgent
-from analyzer.summary import ReviewOverviewAgent
-from analyzer.issues import IssueDetectorAgent
-from analyzer.usp import USPDectectorAgent
-from analyzer.trend import TrendAnalyzerAgent
-from memory_manager import ProductMemory
-from context_builder import build_context
-from Utils.helpers import autonomous_task_selection
-
-class MultiAgent:
-    def __init__(self, model: str = "gpt-4o-mini"):
-        self.model = model
-        self.AgentMemory = {} 
-        self.SentimentAnalyzerAgent = SentimentAnalyzerAgent(self.model)
-        self.ReviewOverviewAgent = ReviewOverviewAgent(self.model)
-        self.IssueDetectorAgent = IssueDetectorAgent(self.model)
-        self.USPDectectorAgent = USPDectectorAgent(self.model)
-        self.TrendAnalyzerAgent = TrendAnalyzerAgent(self.model)
-
-    def create_product_memory_and_prioritize_tasks(self, data):
-        tasks_assigned, quality_parameter = autonomous_task_selection(data)
-        product_name = data['product_name'].iloc[0]
-        product_memory = ProductMemory(product_name)
-        if tasks_assigned == []:
-            return product_memory, tasks_assigned, quality_parameter
-
-        for i, row in tqdm(data.iterrows(), total=len(data), desc="Processing Reviews"):
-            row = dict(row)
-            context = build_context(row, product_memory)
-            result = self.SentimentAnalyzerAgent.adaptive_sentiment_analysis(row['customer_review'], context)
-            result = self.SentimentAnalyzerAgent.estimate_weightage(result)
-            product_memory.update(result, context)
-            self.AgentMemory[product_name] = product_memory
-
-        return product_memory, tasks_assigned, quality_parameter
-    
-    def save_product_memory(self, product_name, product_memory):
-        memo_path = rf"C:\Users\debli\OneDrive\Desktop\CV_PROJECT\AGENTIC_AI_BASED_REVIEW_ANALYZER\data\memory\{product_name}.pkl"
-        with open(memo_path, "wb") as f:
-            pickle.dump(product_memory, f)
-
-
-
-
-
-
-
+import asyncio
+import copy
+import time
+from collections import deque
+from tqdm import tqdm
+from analyzer.sentiment import SentimentAnalyzerAgent
+from analyzer.summary import ReviewOverviewAgent
+from analyzer.issues import IssueDetectorAgent
+from analyzer.usp import USPDectectorAgent
+from analyzer.trend import TrendAnalyzerAgent
+from analyzer.local_sentiment import LocalSentimentTier
+from memory_manager import ProductMemory
+from memory_store import ProductMemoryStore
+from context_builder import build_context
+from Utils.helpers import select_tasks, pack_by_token_budget, review_fingerprint
+from Utils.ingestion import DEFAULT_CHUNKSIZE, StreamingQualityAssessor, iter_review_chunks, iter_review_rows
+from Utils.dedup import NearDuplicateIndex, SharedResults
+from Core.escalation import EscalationBudget
+from Core.rate_limit import FairShareLimiter, current_tenant, get_rate_limiter, set_rate_limiter
+
+class MultiAgent:
+    def __init__(self, model: str = "gpt-4o-mini", memory_dir: str = None, history_capacity: int = 1000, local_tier_threshold: float = None, local_tier_audit_rate: float = 0.05, dedup_threshold: float = None,
+                 escalation_model: str = None, escalation_threshold: float = 0.75, escalation_rate: float = 0.1, max_escalations: int = None):
+        """
+        With `escalation_model` set, the agents form a model cascade: `model` (the cheap one) runs first and
+        results whose model_confidence is below `escalation_threshold` (or, for sentiment, whose weightage
+        is 0) are recomputed by `escalation_model`. A run may escalate up to `escalation_rate` of its
+        first-tier results, at most `max_escalations` (see `EscalationBudget`).
+        With `local_tier_threshold` set, reviews the local lexicon tier classifies at or above that
+        confidence skip the sentiment LLM (see `LocalSentimentTier`).
+        With `dedup_threshold` set, reviews whose estimated word-bigram Jaccard similarity to an earlier
+        review reaches it reuse that review's result instead of being analyzed (see `NearDuplicateIndex`).
+        While an `AnalysisJob` runs the agent, it is attached as `job` and receives progress from the engine.
+        """
+        self.model = model
+        self.history_capacity = history_capacity
+        self.memory_store = ProductMemoryStore(memory_dir)
+        self.AgentMemory = {} 
+        self.SentimentAnalyzerAgent = SentimentAnalyzerAgent(self.model)
+        self.ReviewOverviewAgent = ReviewOverviewAgent(self.model)
+        self.IssueDetectorAgent = IssueDetectorAgent(self.model)
+        self.USPDectectorAgent = USPDectectorAgent(self.model)
+        self.TrendAnalyzerAgent = TrendAnalyzerAgent(self.model)
+        self.escalation_model = escalation_model
+        self.escalation_threshold = escalation_threshold
+        self.escalation_budget = EscalationBudget(escalation_rate, max_escalations)
+        self.escalation_agents = {}
+        self.LocalSentimentTier = LocalSentimentTier(local_tier_threshold, local_tier_audit_rate) if local_tier_threshold is not None else None
+        self.dedup_threshold = dedup_threshold
+        self.shared_results = None
+        self.dedup_stats = None
+        self.job = None
+
+    def create_product_memory_and_prioritize_tasks(self, data, max_concurrency: int = 1, batch_token_budget: int = None, epoch_size: int = None, epoch_seconds: float = None, product_memory: ProductMemory = None):
+        """
+        Builds the product memory from a review DataFrame and returns it with the selected tasks.
+        With `max_concurrency > 1` the sentiment calls run concurrently through the async epoch engine
+        (see `process_reviews_async` for `epoch_size` / `epoch_seconds`).
+        With `batch_token_budget` set, reviews are packed into multi-review prompts of at most that many input tokens.
+        When an existing `product_memory` is passed, only reviews whose fingerprint it has not absorbed yet
+        are analyzed and folded into its aggregates.
+        """
+        product_memory, tasks_assigned, quality_parameter, data, duplicate_index = self.prepare_product(data, product_memory)
+        if tasks_assigned:
+            rows = (dict(row) for _, row in data.iterrows())
+            self.ingest_reviews(rows, product_memory, len(data), max_concurrency, batch_token_budget, epoch_size, epoch_seconds, duplicate_index)
+        return product_memory, tasks_assigned, quality_parameter
+
+    async def create_product_memory_async(self, data, max_concurrency: int = 1, batch_token_budget: int = None, epoch_size: int = None, epoch_seconds: float = None, product_memory: ProductMemory = None):
+        """Async variant of `create_product_memory_and_prioritize_tasks` for callers that already run an event loop."""
+        product_memory, tasks_assigned, quality_parameter, data, duplicate_index = self.prepare_product(data, product_memory)
+        if tasks_assigned:
+            rows = (dict(row) for _, row in data.iterrows())
+            await self.ingest_reviews_async(rows, product_memory, len(data), max_concurrency, batch_token_budget, epoch_size, epoch_seconds, duplicate_index)
+        return product_memory, tasks_assigned, quality_parameter
+
+    def prepare_product(self, data, product_memory: ProductMemory = None):
+        """
+        Selects the tasks a review DataFrame supports and returns (product_memory, tasks, quality_parameter,
+        rows still to analyze, near-duplicate index of those rows or None).
+        With an existing `product_memory`, reviews it has absorbed and exact repeats of an earlier row are
+        skipped, and only the remaining rows are assessed: their quality statistics are merged into the
+        memory's running `quality`, so an update costs the delta rather than the whole catalog.
+        """
+        product_name = data['product_name'].iloc[0]
+        incremental = product_memory is not None and bool(product_memory.fingerprints)
+        if product_memory is None:
+            product_memory = ProductMemory(product_name, self.history_capacity)
+        reviews = data
+        if incremental:
+            data = data[self.unseen_mask(data[['customer_review', 'customer_name', 'review_date']].to_dict('records'), set(product_memory.fingerprints))]
+            print(f"Incremental ingestion: {len(data)} new of {len(reviews)} reviews for {product_name}")
+
+        stored = product_memory.quality if incremental else StreamingQualityAssessor()
+        assessor = StreamingQualityAssessor()
+        assessor.update(data if stored.rows else reviews)
+        quality = stored.merged(assessor)
+        quality_parameter = quality.result()
+        tasks_assigned = select_tasks(quality_parameter, quality.rows)
+        if tasks_assigned == []:
+            return product_memory, tasks_assigned, quality_parameter, data, None
+
+        self.AgentMemory[product_name] = product_memory
+        product_memory.quality = quality
+        duplicate_index = self.duplicate_index()
+        if duplicate_index is not None:
+            duplicate_index.add_many(data['customer_review'].tolist())
+        return product_memory, tasks_assigned, quality_parameter, data, duplicate_index
+
+    @staticmethod
+    def unseen_mask(rows, seen: set) -> list:
+        """
+        Returns one flag per review row: False for rows whose fingerprint is in `seen`. The fingerprints of
+        the other rows are added to `seen`, so exact repeats of an earlier row are flagged as well.
+        """
+        mask = []
+        for row in rows:
+            fingerprint = review_fingerprint(row)
+            mask.append(fingerprint not in seen)
+            seen.add(fingerprint)
+        return mask
+
+    def analyze_products(self, datasets, max_concurrency: int = 8, requests_per_minute: float = None, tokens_per_minute: float = None, batch_token_budget: int = None, epoch_size: int = None):
+        """
+        Builds the memories of several products concurrently in one event loop.
+        Each product runs its own async engine with up to `max_concurrency` requests in flight, and all of
+        them share one `requests_per_minute` / `tokens_per_minute` budget split fairly across products
+        (see `FairShareLimiter`), so a large catalog cannot starve small ones. Returns one report per
+        dataset, in input order, with the memory, tasks, quality parameters and completion time.
+        """
+        return asyncio.run(self.analyze_products_async(datasets, max_concurrency, requests_per_minute, tokens_per_minute, batch_token_budget, epoch_size))
+
+    async def analyze_products_async(self, datasets, max_concurrency: int = 8, requests_per_minute: float = None, tokens_per_minute: float = None, batch_token_budget: int = None, epoch_size: int = None):
+        """Async variant of `analyze_products`."""
+        previous_limiter = get_rate_limiter()
+        limiter = FairShareLimiter(requests_per_minute, tokens_per_minute, upstream=previous_limiter)
+        start = time.monotonic()
+
+        async def run_product(data):
+            product_name = data['product_name'].iloc[0]
+            current_tenant.set(product_name)
+            product_memory, tasks_assigned, quality_parameter = await self.product_worker().create_product_memory_async(
+                data, max_concurrency=max_concurrency, batch_token_budget=batch_token_budget, epoch_size=epoch_size)
+            return {
+                "product": product_name,
+                "product_memory": product_memory,
+                "tasks": tasks_assigned,
+                "quality_parameter": quality_parameter,
+                "reviews": len(data),
+                "seconds": round(time.monotonic() - start, 3)
+            }
+
+        set_rate_limiter(limiter)
+        try:
+            reports = await asyncio.gather(*(run_product(data) for data in datasets))
+        finally:
+            set_rate_limiter(previous_limiter)
+        for report in reports:
+            granted = limiter.granted.get(report["product"], {})
+            report["requests"] = granted.get("requests", 0)
+            report["tokens"] = granted.get("tokens", 0)
+            print(f"{report['product']}: {report['reviews']} reviews in {report['seconds']}s ({report['requests']} requests)")
+        return reports
+
+    def product_worker(self):
+        """Returns a copy of this agent sharing its sub-agents and memories but with its own ingestion state."""
+        worker = copy.copy(self)
+        worker.shared_results = None
+        worker.dedup_stats = None
+        worker.job = None
+        worker.escalation_budget = self.escalation_budget.copy()
+        if self.LocalSentimentTier is not None:
+            worker.LocalSentimentTier = self.LocalSentimentTier.copy()
+        return worker
+
+    def create_product_memory_from_stream(self, source, chunksize: int = DEFAULT_CHUNKSIZE, filename: str = None, max_concurrency: int = 1, batch_token_budget: int = None, epoch_size: int = None, epoch_seconds: float = None, product_memory: ProductMemory = None):
+        """
+        Streaming variant of `create_product_memory_and_prioritize_tasks` for files too large to load at once.
+        `source` is a CSV/XLSX path or seekable upload read in two passes of `chunksize` rows: the first
+        computes the data quality metrics and selects tasks, the second feeds rows one at a time into the
+        ingestion engine, so peak memory is bounded by the chunk size and the review vocabulary.
+        With an existing `product_memory`, the first pass decides which rows to skip: reviews the memory has
+        absorbed and exact repeats of an earlier row of the file. The second pass skips exactly those
+        positions, so it analyzes the rows the near-duplicate index was built from. As in `prepare_product`,
+        only the kept rows are assessed and merged into the memory's running quality statistics.
+        """
+        assessor = StreamingQualityAssessor()
+        duplicate_index = self.duplicate_index()
+        incremental = product_memory is not None and bool(product_memory.fingerprints)
+        stored = product_memory.quality if incremental else StreamingQualityAssessor()
+        seen = set(product_memory.fingerprints) if incremental else None
+        skipped = set()
+        position = 0
+        for chunk in iter_review_chunks(source, chunksize, filename):
+            file_chunk = chunk
+            if incremental:
+                keep = self.unseen_mask(chunk.to_dict('records'), seen)
+                skipped.update(position + offset for offset, kept in enumerate(keep) if not kept)
+                position += len(keep)
+                chunk = chunk[keep]
+            assessor.update(chunk if stored.rows else file_chunk)
+            if duplicate_index is not None:
+                duplicate_index.add_many(chunk['customer_review'].tolist())
+        seen = None
+        quality = stored.merged(assessor)
+        quality_parameter = quality.result()
+        tasks_assigned = select_tasks(quality_parameter, quality.rows)
+        product_name = quality.product_name
+        if product_memory is None:
+            product_memory = ProductMemory(product_name, self.history_capacity)
+        if tasks_assigned == []:
+            return product_memory, tasks_assigned, quality_parameter
+
+        self.AgentMemory[product_name] = product_memory
+        product_memory.quality = quality
+        rows = iter_review_rows(source, chunksize, filename)
+        total = assessor.rows
+        if incremental:
+            rows = (row for position, row in enumerate(rows) if position not in skipped)
+            total = position - len(skipped)
+        self.ingest_reviews(rows, product_memory, total, max_concurrency, batch_token_budget, epoch_size, epoch_seconds, duplicate_index)
+        return product_memory, tasks_assigned, quality_parameter
+
+    def duplicate_index(self):
+        """Returns an empty near-duplicate index, or None when deduplication is off."""
+        return NearDuplicateIndex(self.dedup_threshold) if self.dedup_threshold else None
+
+    def ingest_reviews(self, rows, product_memory, total=None, max_concurrency: int = 1, batch_token_budget: int = None, epoch_size: int = None, epoch_seconds: float = None, duplicate_index: NearDuplicateIndex = None):
+        """
+        Groups review rows into units and runs them through the serial or async engine.
+        `duplicate_index` holds the rows in the same order; each row is tagged with its position and its
+        representative, and duplicates take a copy of the representative's result.
+        """
+        units = self.begin_ingestion(rows, product_memory, total, batch_token_budget, duplicate_index)
+        if max_concurrency > 1:
+            asyncio.run(self.process_reviews_async(units, product_memory, max_concurrency, total=total, epoch_size=epoch_size, epoch_seconds=epoch_seconds))
+        else:
+            self.process_reviews(units, product_memory, total=total)
+        self.end_ingestion(duplicate_index)
+
+    async def ingest_reviews_async(self, rows, product_memory, total=None, max_concurrency: int = 1, batch_token_budget: int = None, epoch_size: int = None, epoch_seconds: float = None, duplicate_index: NearDuplicateIndex = None):
+        """Async variant of `ingest_reviews`; always uses the async engine."""
+        units = self.begin_ingestion(rows, product_memory, total, batch_token_budget, duplicate_index)
+        await self.process_reviews_async(units, product_memory, max_concurrency, total=total, epoch_size=epoch_size, epoch_seconds=epoch_seconds)
+        self.end_ingestion(duplicate_index)
+
+    def begin_ingestion(self, rows, product_memory, total, batch_token_budget, duplicate_index):
+        """
+        Sets up the per-run ingestion state and returns the review units to analyze. LLM calls made from
+        here on in this context are attributed to the product (rate limiting, telemetry).
+        """
+        current_tenant.set(product_memory.product_name)
+        self.escalation_budget.reset()
+        if self.LocalSentimentTier is not None:
+            self.LocalSentimentTier.reset()
+        if self.job is not None:
+            self.job.set_total(total)
+        if duplicate_index is not None:
+            self.shared_results = SharedResults(duplicate_index.duplicate_counts())
+            rows = (dict(row, row_index=position, representative=representative)
+                    for position, (row, representative) in enumerate(zip(rows, duplicate_index.representatives)))
+        return self.review_units(rows, batch_token_budget)
+
+    def end_ingestion(self, duplicate_index):
+        """Reports the local tier and near-duplicate counters of a finished run and clears its state."""
+        if self.LocalSentimentTier is not None:
+            tier_stats = self.LocalSentimentTier.summary()
+            print(f"Local tier: {tier_stats['llm_calls_skipped']} of {tier_stats['reviews']} reviews skipped the LLM, "
+                  f"agreement {tier_stats['agreement_rate']} on {tier_stats['audited']} audited")
+        if self.shared_results is not None:
+            print(f"Near-duplicates: {self.shared_results.reused} of {len(duplicate_index)} reviews reused a representative's result")
+            self.dedup_stats = {"reviews": len(duplicate_index), "llm_calls_saved": self.shared_results.reused}
+            self.shared_results = None
+        if self.escalation_model is not None:
+            budget = self.escalation_budget.summary()
+            print(f"Cascade: {budget['escalated']} of {budget['observed']} sentiment results escalated to {self.escalation_model}"
+                  f" ({budget['denied']} over budget)")
+
+    def escalation_agent(self, agent_name: str):
+        """Returns the escalation model's instance of an agent (e.g. "SentimentAnalyzerAgent"), configured like the first tier."""
+        if agent_name not in self.escalation_agents:
+            agent = copy.copy(getattr(self, agent_name))
+            agent.model = self.escalation_model
+            self.escalation_agents[agent_name] = agent
+        return self.escalation_agents[agent_name]
+
+    def needs_escalation(self, result: dict) -> bool:
+        """Returns True if a first-tier result is below the cascade threshold and the budget allows escalating it."""
+        confidence = result.get("model_confidence", 0.0)
+        low = confidence < self.escalation_threshold or result.get("weightage", 1.0) == 0.0
+        return low and self.escalation_budget.try_spend()
+
+    @staticmethod
+    def more_confident(first: dict, second: dict) -> dict:
+        """Returns the escalated result unless it came back less confident than the first tier's (e.g. unparseable)."""
+        return second if second.get("model_confidence", 0.0) >= first.get("model_confidence", 0.0) else first
+
+    def cascaded(self, agent_name: str, call):
+        """
+        Runs `call(agent)` on a report agent (e.g. "ReviewOverviewAgent") and returns its output, a tuple
+        whose first item is the result and last the execution time. In a cascade, a low-confidence result
+        is recomputed by the escalation model and the more confident one is kept; the execution time then
+        covers both calls.
+        """
+        output = call(getattr(self, agent_name))
+        if self.escalation_model is None:
+            return output
+        self.escalation_budget.observe()
+        if not self.needs_escalation(output[0]):
+            return output
+        escalated = call(self.escalation_agent(agent_name))
+        best = escalated if self.more_confident(output[0], escalated[0]) is escalated[0] else output
+        return best[:-1] + (output[-1] + escalated[-1],)
+
+    def sentiment_escalations(self, results, pending):
+        """Returns the positions among `pending` whose first-tier sentiment results get escalated."""
+        if self.escalation_model is None or not pending:
+            return []
+        self.escalation_budget.observe(len(pending))
+        return [i for i in pending if self.needs_escalation(self.SentimentAnalyzerAgent.estimate_weightage(results[i]))]
+
+    @staticmethod
+    def analyze_reviews(agent, reviews, contexts):
+        """Runs a sentiment agent over reviews: one prompt for a single review, a batched prompt otherwise."""
+        if len(reviews) == 1:
+            return [agent.adaptive_sentiment_analysis(reviews[0], contexts[0])]
+        if reviews:
+            return agent.batch_sentiment_analysis(reviews, contexts)
+        return []
+
+    @staticmethod
+    async def analyze_reviews_async(agent, reviews, contexts):
+        """Async variant of `analyze_reviews`."""
+        if len(reviews) == 1:
+            return [await agent.adaptive_sentiment_analysis_async(reviews[0], contexts[0])]
+        if reviews:
+            return await agent.batch_sentiment_analysis_async(reviews, contexts)
+        return []
+
+    def refresh_product_memory(self, data, **kwargs):
+        """
+        Incrementally updates the persisted memory of the product in `data` with its unseen reviews and
+        saves it back. Starts from an empty memory if none has been saved yet.
+        """
+        product_name = data['product_name'].iloc[0]
+        product_memory = self.load_product_memory(product_name)
+        product_memory, tasks_assigned, quality_parameter = self.create_product_memory_and_prioritize_tasks(data, product_memory=product_memory, **kwargs)
+        if tasks_assigned:
+            self.save_product_memory(product_name, product_memory)
+        return product_memory, tasks_assigned, quality_parameter
+
+    def review_units(self, rows, batch_token_budget: int = None):
+        """
+        Groups review rows into units of work, one LLM request each: single rows by default,
+        or token-budgeted batches when `batch_token_budget` is given.
+        """
+        if not batch_token_budget:
+            return ([row] for row in rows)
+        agent = self.SentimentAnalyzerAgent
+        item_budget = max(batch_token_budget - agent.batch_header_tokens(), 1)
+        return pack_by_token_budget(rows, lambda row: agent.batch_item_tokens(row['customer_review']), item_budget, agent.MAX_BATCH_SIZE)
+
+    def duplicate_positions(self, unit):
+        """Returns the positions in a unit whose rows reuse a representative's result."""
+        if self.shared_results is None:
+            return []
+        return [i for i, row in enumerate(unit) if self.shared_results.is_duplicate(row)]
+
+    def screen_unit(self, unit, contexts, skip=()):
+        """
+        Runs the local tier over the rows of a unit not in `skip`. Returns the unit's results, with None
+        where the LLM is needed, and the audited positions; without a local tier every row needs the LLM.
+        """
+        results = [None] * len(unit)
+        if self.LocalSentimentTier is None:
+            return results, {}
+        positions = [i for i in range(len(unit)) if i not in skip]
+        screened, audits = self.LocalSentimentTier.screen([unit[i]['customer_review'] for i in positions], [contexts[i] for i in positions])
+        for i, result in zip(positions, screened):
+            results[i] = result
+        return results, {positions[i]: result for i, result in audits.items()}
+
+    def finish_unit(self, unit, results, audits, duplicates):
+        """Records local tier agreement, weights the analyzed results and publishes representatives' results."""
+        if audits:
+            self.LocalSentimentTier.record_audits(audits, results)
+        for i, row in enumerate(unit):
+            if i in duplicates:
+                continue
+            results[i] = self.SentimentAnalyzerAgent.estimate_weightage(results[i])
+            if self.shared_results is not None:
+                self.shared_results.publish(row, results[i])
+        return results
+
+    def analyze_unit(self, unit, contexts):
+        """Runs sentiment analysis for one unit of review rows and returns weighted results in row order."""
+        duplicates = self.duplicate_positions(unit)
+        results, audits = self.screen_unit(unit, contexts, duplicates)
+        pending = [i for i, result in enumerate(results) if result is None and i not in duplicates]
+        llm_results = self.analyze_reviews(self.SentimentAnalyzerAgent, [unit[i]['customer_review'] for i in pending], [contexts[i] for i in pending])
+        for i, result in zip(pending, llm_results):
+            results[i] = result
+        escalated = self.sentiment_escalations(results, pending)
+        if escalated:
+            stronger = self.analyze_reviews(self.escalation_agent("SentimentAnalyzerAgent"), [unit[i]['customer_review'] for i in escalated], [contexts[i] for i in escalated])
+            for i, result in zip(escalated, stronger):
+                results[i] = self.more_confident(results[i], result)
+        results = self.finish_unit(unit, results, audits, duplicates)
+        for i in duplicates:
+            results[i] = self.shared_results.take(unit[i])
+        return results
+
+    async def analyze_unit_async(self, unit, contexts):
+        """Async variant of `analyze_unit`; duplicates wait for representatives still in flight."""
+        duplicates = self.duplicate_positions(unit)
+        results, audits = self.screen_unit(unit, contexts, duplicates)
+        pending = [i for i, result in enumerate(results) if result is None and i not in duplicates]
+        llm_results = await self.analyze_reviews_async(self.SentimentAnalyzerAgent, [unit[i]['customer_review'] for i in pending], [contexts[i] for i in pending])
+        for i, result in zip(pending, llm_results):
+            results[i] = result
+        escalated = self.sentiment_escalations(results, pending)
+        if escalated:
+            stronger = await self.analyze_reviews_async(self.escalation_agent("SentimentAnalyzerAgent"), [unit[i]['customer_review'] for i in escalated], [contexts[i] for i in escalated])
+            for i, result in zip(escalated, stronger):
+                results[i] = self.more_confident(results[i], result)
+        results = self.finish_unit(unit, results, audits, duplicates)
+        for i in duplicates:
+            results[i] = await self.shared_results.take_async(unit[i])
+        return results
+
+    def process_reviews(self, units, product_memory, total=None):
+        """Analyzes units one at a time, each against the memory left by all previous units."""
+        progress = tqdm(total=total, desc="Processing Reviews")
+        for unit in units:
+            contexts = [build_context(row, product_memory) for row in unit]
+            for result, context in zip(self.analyze_unit(unit, contexts), contexts):
+                product_memory.update(result, context)
+            progress.update(len(unit))
+            if not self.unit_applied(unit, product_memory):
+                break
+        progress.close()
+
+    def unit_applied(self, unit, product_memory) -> bool:
+        """Reports an applied unit to the attached job; returns False once the job has been cancelled."""
+        if self.job is None:
+            return True
+        return self.job.advance(len(unit), product_memory)
+
+    async def process_reviews_async(self, units, product_memory, max_concurrency: int, total=None, epoch_size: int = None, epoch_seconds: float = None):
+        """
+        Analyzes units with up to `max_concurrency` requests in flight. Results are applied to the live
+        memory in row order.
+
+        By default the window stays full: a new unit starts as soon as any request finishes, and its reviews
+        are contextualized against the memory as applied so far, so how much of it they see depends on
+        request latency.
+
+        With `epoch_size` or `epoch_seconds` set, units run in epochs instead. Every review of an epoch is
+        contextualized against an immutable snapshot of the memory taken when the epoch starts, and the
+        snapshot is refreshed once the epoch is fully applied. An epoch closes after `epoch_size` reviews,
+        or earlier once `epoch_seconds` have elapsed. Count-based epochs are deterministic for a given
+        `epoch_size`; time-based refreshes depend on request latency.
+
+        Once the attached job is cancelled no new unit is started; units already in flight are applied.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        progress = tqdm(total=total, desc="Processing Reviews")
+        units = iter(units)
+        running = True
+        epochs = bool(epoch_size or epoch_seconds)
+
+        async def run_unit(unit, contexts):
+            try:
+                return await self.analyze_unit_async(unit, contexts)
+            finally:
+                semaphore.release()
+
+        def apply(unit, contexts, unit_results):
+            nonlocal running
+            for result, context in zip(unit_results, contexts):
+                product_memory.update(result, context)
+            progress.update(len(unit))
+            running = self.unit_applied(unit, product_memory) and running
+
+        while running:
+            snapshot = product_memory.snapshot() if epochs else product_memory
+            epoch_start = time.monotonic()
+            in_flight = deque()
+            epoch_units, epoch_reviews = 0, 0
+            for unit in units:
+                await semaphore.acquire()
+                while in_flight and in_flight[0][2].done():
+                    unit_done, contexts_done, task = in_flight.popleft()
+                    apply(unit_done, contexts_done, task.result())
+                if not running:
+                    semaphore.release()
+                    break
+
+                contexts = [build_context(row, snapshot) for row in unit]
+                in_flight.append((unit, contexts, asyncio.ensure_future(run_unit(unit, contexts))))
+                epoch_units += 1
+                epoch_reviews += len(unit)
+
+                epoch_full = bool(epoch_size) and epoch_reviews >= epoch_size
+                if epoch_full or (epoch_seconds and time.monotonic() - epoch_start >= epoch_seconds):
+                    break
+
+            if epoch_units == 0:
+                break
+            while in_flight:
+                unit_done, contexts_done, task = in_flight.popleft()
+                apply(unit_done, contexts_done, await task)
+        progress.close()
+    
+    def save_product_memory(self, product_name, product_memory):
+        """Persists a product memory to the memory store and returns the file it was written to."""
+        return self.memory_store.save(product_memory)
+
+    def load_product_memory(self, product_name, with_history: bool = True):
+        """Returns the persisted memory of a product, or None if it has never been saved."""
+        if not self.memory_store.exists(product_name):
+            return None
+        return self.memory_store.load(product_name, with_history=with_history, history_capacity=self.history_capacity)
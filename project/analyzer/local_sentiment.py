@@ -0,0 +1,164 @@
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List
+
+POSITIVE_WORDS = {
+    "good", "great", "excellent", "amazing", "awesome", "love", "loved", "loves", "perfect", "best", "nice",
+    "fantastic", "wonderful", "happy", "satisfied", "recommend", "recommended", "superb", "fast", "smooth",
+    "beautiful", "brilliant", "outstanding", "impressive", "reliable", "worth", "solid", "excelent", "exellent",
+    "pleased", "easy", "fine", "cool", "incredible", "stunning", "premium", "durable", "crisp", "bright"
+}
+NEGATIVE_WORDS = {
+    "bad", "poor", "terrible", "awful", "horrible", "worst", "hate", "hated", "broken", "broke", "defective",
+    "disappointed", "disappointing", "useless", "waste", "slow", "lag", "lags", "laggy", "heating", "hot",
+    "problem", "problems", "issue", "issues", "faulty", "return", "returned", "refund", "cheap", "crash",
+    "crashes", "dead", "died", "fake", "scam", "junk", "garbage", "annoying", "stopped", "unusable", "drain", "drains"
+}
+NEGATIONS = {"not", "no", "never", "dont", "don't", "didnt", "didn't", "doesnt", "doesn't", "isnt", "isn't",
+             "wasnt", "wasn't", "cant", "can't", "wont", "won't", "hardly", "nothing", "without"}
+INTENSIFIERS = {"very", "really", "extremely", "super", "so", "absolutely", "totally", "highly", "incredibly"}
+CONTRAST_MARKERS = {"but", "however", "although", "though", "except", "yet", "unfortunately", "otherwise"}
+ASPECTS = {
+    "battery": "battery life", "charge": "charging", "charging": "charging", "charger": "charging",
+    "camera": "camera", "photos": "camera", "pictures": "camera", "screen": "display", "display": "display",
+    "price": "price", "value": "value for money", "money": "value for money", "cost": "price",
+    "speed": "performance", "fast": "performance", "performance": "performance", "slow": "performance",
+    "lag": "performance", "sound": "audio", "speaker": "audio", "audio": "audio", "signal": "network",
+    "network": "network", "wifi": "network", "delivery": "delivery", "shipping": "delivery",
+    "seller": "seller", "heating": "heating issue", "hot": "heating issue", "quality": "build quality",
+    "design": "design", "storage": "storage", "memory": "storage", "software": "software", "update": "software"
+}
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+class LocalSentimentTier:
+    """
+    Cheap first tier in front of the sentiment LLM.
+    Scores a review from a small polarity lexicon (with negation and intensifier handling) and its star
+    rating, and returns a result in the same schema as `SentimentAnalyzerAgent.parse_response`. Only
+    short, single-polarity reviews whose text agrees with their rating reach `confidence_threshold`;
+    everything else, and a deterministic `audit_rate` sample of the confident ones, goes to the LLM.
+    Audited reviews are used to measure how often the local label agrees with the LLM.
+    """
+    def __init__(self, confidence_threshold: float = 0.8, audit_rate: float = 0.05, max_words: int = 60):
+        """Initializes the tier and its per-run counters."""
+        self.confidence_threshold = confidence_threshold
+        self.audit_rate = audit_rate
+        self.max_words = max_words
+        self.stats = Counter()
+
+    def reset(self) -> None:
+        """Clears the per-run counters; called when an ingestion run starts."""
+        self.stats = Counter()
+
+    def copy(self) -> "LocalSentimentTier":
+        """Returns a tier with the same settings and its own, empty counters."""
+        return LocalSentimentTier(self.confidence_threshold, self.audit_rate, self.max_words)
+
+    def classify(self, review: str, context: Dict) -> Dict:
+        """Returns a sentiment result for one review without calling the LLM."""
+        words = WORD_PATTERN.findall(str(review).lower())
+        positives, negatives, drivers = [], [], []
+        intensity_hits = 0
+        for i, word in enumerate(words):
+            if word in ASPECTS and ASPECTS[word] not in drivers:
+                drivers.append(ASPECTS[word])
+            if word in INTENSIFIERS:
+                intensity_hits += 1
+            if word not in POSITIVE_WORDS and word not in NEGATIVE_WORDS:
+                continue
+            negated = any(previous in NEGATIONS for previous in words[max(0, i - 3):i])
+            if (word in POSITIVE_WORDS) != negated:
+                positives.append(word if not negated else f"not {word}")
+            else:
+                negatives.append(word if not negated else f"not {word}")
+
+        rating = context.get("rating", 3)
+        rating_polarity = (rating - 3) / 2
+        hits = len(positives) + len(negatives)
+        text_polarity = (len(positives) - len(negatives)) / hits if hits else 0.0
+        contrast = any(word in CONTRAST_MARKERS for word in words)
+        disagrees = rating_polarity * text_polarity < 0 or (hits and rating_polarity == 0)
+        mixed_signals = bool(positives and negatives) or contrast or bool(disagrees)
+
+        score = max(-1.0, min(1.0, 0.5 * rating_polarity + 0.5 * text_polarity))
+        if mixed_signals or abs(score) < 0.3:
+            category = "mixed" if positives and negatives else "neutral"
+        else:
+            category = "positive" if score > 0 else "negative"
+
+        # Confidence grows with rating extremity and lexical evidence, and drops for long or ambiguous text
+        confidence = 0.35 + 0.3 * abs(rating_polarity) + 0.1 * min(hits, 3)
+        if len(words) > self.max_words:
+            confidence -= 0.2
+        if mixed_signals:
+            confidence -= 0.3
+        if not hits:
+            confidence -= 0.2
+        confidence = round(max(0.0, min(confidence, 0.95)), 2)
+
+        exclamations = str(review).count("!")
+        emotional_intensity = round(min(1.0, 0.4 + 0.15 * intensity_hits + 0.1 * min(exclamations, 3) + 0.1 * min(hits, 3)), 2)
+        cues = (positives if category == "positive" else negatives if category == "negative" else positives + negatives)[:3]
+
+        return {
+            "sentiment_category": category,
+            "sentiment_score": round(score, 2),
+            "model_confidence": confidence,
+            "key_drivers": drivers[:5],
+            "emotional_intensity": emotional_intensity,
+            "mixed_signals": mixed_signals,
+            "conflicting_phrases": (positives + negatives) if positives and negatives else [],
+            "justification": f"{rating}-star review with {category} wording ({', '.join(cues) or 'no strong cues'}).",
+            "trust_tag": "high_trust" if context.get("verified_purchase") and context.get("quality_score", 0) >= 0.7 else "low_trust",
+            "persona_adjusted": False,
+            "analysis_tier": "local"
+        }
+
+    def is_audited(self, context: Dict) -> bool:
+        """Deterministically selects about `audit_rate` of reviews for the held-out agreement sample."""
+        key = context.get("review_fingerprint") or f"{context.get('reviewer_name')}|{context.get('review_date')}"
+        return zlib.crc32(str(key).encode("utf-8")) % 10000 < self.audit_rate * 10000
+
+    def screen(self, reviews: List[str], contexts: List[Dict]):
+        """
+        Classifies a unit of reviews locally. Returns the list of accepted local results, with None for
+        reviews that must go to the LLM, and a {position: local result} dict of audited reviews.
+        """
+        results, audits = [], {}
+        for position, (review, context) in enumerate(zip(reviews, contexts)):
+            self.stats["reviews"] += 1
+            result = self.classify(review, context)
+            if result["model_confidence"] < self.confidence_threshold or result["mixed_signals"]:
+                self.stats["escalated"] += 1
+                results.append(None)
+            elif self.is_audited(context):
+                audits[position] = result
+                results.append(None)
+            else:
+                self.stats["llm_calls_skipped"] += 1
+                results.append(result)
+        return results, audits
+
+    def record_audits(self, audits: Dict, results: List[Dict]) -> None:
+        """Compares audited local labels with the LLM results that replaced them."""
+        for position, local_result in audits.items():
+            llm_result = results[position]
+            if not llm_result:
+                continue
+            self.stats["audited"] += 1
+            if llm_result.get("sentiment_category") == local_result["sentiment_category"]:
+                self.stats["agreed"] += 1
+
+    def summary(self) -> Dict:
+        """Returns the per-run counters with the skip and agreement rates."""
+        reviews = self.stats["reviews"]
+        audited = self.stats["audited"]
+        return {
+            "reviews": reviews,
+            "llm_calls_skipped": self.stats["llm_calls_skipped"],
+            "escalated": self.stats["escalated"],
+            "audited": audited,
+            "skip_rate": round(self.stats["llm_calls_skipped"] / reviews, 3) if reviews else 0.0,
+            "agreement_rate": round(self.stats["agreed"] / audited, 3) if audited else None
+        }
@@ -1,271 +1,439 @@
-from typing import Dict
-import re
-import json
-from Utils.helpers import calculate_days_passed
-from Core.model_runner import run_llm_model
-
-class SentimentAnalyzerAgent:
-    def __init__(self, model: str = "gpt-3.5-turbo"):
-        """Initialize the sentiment analyzer with a specified LLM model."""
-        self.model = model
-
-    @staticmethod
-    def build_adaptive_prompt(review: str, context: Dict) :
-        """Constructs a detailed sentiment analysis prompt using review text and context for the LLM."""
-        quality_score = context.get('quality_score', 'unknown')
-        verified = context.get('verified_purchase', False)
-        rating = context.get('rating', 'unknown')
-        review_length = context.get('review_length', 'unknown')
-        helpfulness_ratio = context.get('helpfulness_ratio', 0.0)
-        sentiment_trend = context.get('sentiment_trend', 'unknown')
-        recent_issues = ', '.join(context.get('recent_issues', []))
-        top_usps = ', '.join(context.get('top_usps', []))
-        persona_mode = context.get('persona_mode', 'balanced')
-        base_confidence = context.get('base_confidence', 0.7)
-        review_date = context.get('review_date', 'unknown')
-        reviewer_name = context.get('reviewer_name', 'unknown')
-        
-        FEW_SHOT_EXAMPLES = {
-            "positive": """
-        Example: Strong Positive Review
-        Review: "Absolutely love the display and battery life! Feels like a flagship phone. Will recommend it to friends."
-        Context: Verified Purchase = True, Helpfulness Ratio = 0.85, Sentiment Trend = Mostly Positive
-
-        Expected Output:
-        {
-        "sentiment_category": "positive",
-        "sentiment_score": 0.91,
-        "model_confidence": 0.96,
-        "key_drivers": ["display quality", "battery life", "recommendation"],
-        "emotional_intensity": 0.85,
-        "mixed_signals": false,
-        "conflicting_phrases": [],
-        "justification": "Reviewer praises display and battery, and expresses willingness to recommend.",
-        "trust_tag": "high_trust",
-        "persona_adjusted": true
-        }
-        """,
-
-            "negative": """
-        Example: Strong Negative Review
-        Review: "Camera is decent, but the phone heats up really badly and lags during games. Regret buying this."
-        Context: Verified Purchase = True, Helpfulness Ratio = 0.9, Sentiment Trend = Mostly Negative
-
-        Expected Output:
-        {
-        "sentiment_category": "negative",
-        "sentiment_score": -0.75,
-        "model_confidence": 0.89,
-        "key_drivers": ["heating issue", "gaming lag", "regret"],
-        "emotional_intensity": 0.92,
-        "mixed_signals": true,
-        "conflicting_phrases": ["camera is decent", "regret buying this"],
-        "justification": "Despite a neutral comment on the camera, the strong emotional regret and major issues dominate the sentiment.",
-        "trust_tag": "high_trust",
-        "persona_adjusted": true
-        }
-        """,
-
-            "neutral": """
-        Example: Neutral Review
-        Review: "It’s okay, not bad but nothing special either."
-        Context: Verified Purchase = False, Helpfulness Ratio = 0.1, Sentiment Trend = Mostly Neutral
-
-        Expected Output:
-        {
-        "sentiment_category": "neutral",
-        "sentiment_score": 0.05,
-        "model_confidence": 0.62,
-        "key_drivers": ["average experience", "lack of enthusiasm"],
-        "emotional_intensity": 0.2,
-        "mixed_signals": false,
-        "conflicting_phrases": [],
-        "justification": "The reviewer gives a neutral stance with no strong praise or complaint.",
-        "trust_tag": "low_trust",
-        "persona_adjusted": false
-        }
-        """,
-
-            "mixed": """
-        Example: Mixed Signals Review
-        Review: "The phone looks stylish and works fine, but I had to replace it in 2 weeks because of charging issues."
-        Context: Verified Purchase = True, Helpfulness Ratio = 0.7, Sentiment Trend = Mixed
-
-        Expected Output:
-        {
-        "sentiment_category": "negative",
-        "sentiment_score": -0.4,
-        "model_confidence": 0.75,
-        "key_drivers": ["charging issues", "short product lifespan"],
-        "emotional_intensity": 0.7,
-        "mixed_signals": true,
-        "conflicting_phrases": ["looks stylish", "had to replace it"],
-        "justification": "Although appearance is praised, the functional issue leads to a negative overall impression.",
-        "trust_tag": "medium_trust",
-        "persona_adjusted": true
-        }
-        """,
-
-            "default": """
-        Example: General Balanced Review
-        Review: "The phone is fast and sleek, but the camera quality is just average. Not sure if it’s worth the price."
-        Context: Verified Purchase = True, Helpfulness Ratio = 0.5, Sentiment Trend = Unknown
-
-        Expected Output:
-        {
-        "sentiment_category": "neutral",
-        "sentiment_score": 0.1,
-        "model_confidence": 0.68,
-        "key_drivers": ["performance", "camera quality", "value concern"],
-        "emotional_intensity": 0.5,
-        "mixed_signals": true,
-        "conflicting_phrases": ["fast and sleek", "just average", "not sure if it’s worth the price"],
-        "justification": "Performance is appreciated but concerns about price and camera introduce ambivalence.",
-        "trust_tag": "medium_trust",
-        "persona_adjusted": true
-        }
-        """
-        }
-        if sentiment_trend == 'unknown':
-            example = FEW_SHOT_EXAMPLES['default']
-        else:
-            example = FEW_SHOT_EXAMPLES[sentiment_trend]
-
-        prompt = f"""
-        You are an advanced adaptive sentiment analysis AI with access to review metadata and product memory.
-
-        Your task is to assess the sentiment of the following customer review, considering not just the text but the full context below.
-
-        ===========================
-        Review: {review}
-        Review Date: {review_date}
-        Reviewer: {reviewer_name}
-        ===========================
-
-        Review Metadata:
-        - Verified Purchase: {verified}
-        - Star Rating: {rating}
-        - Review Length: {review_length}
-        - Helpfulness Ratio: {helpfulness_ratio:.2f}
-        - Quality Score: {quality_score}
-        
-        If star rating sentiment and review sentiment are mismatched, star rating should be neglected and review should be given weightage.
-
-        Product Memory Context:
-        - Sentiment Trend: {sentiment_trend}
-        - Recent Top Issues: {recent_issues}
-        - Top Praised Features (USPs): {top_usps}
-
-        Persona Mode: {persona_mode}
-        Expected Base Confidence Threshold: {base_confidence}
-
-        ---
-        Analyze this review carefully, adapting to the trustworthiness of the reviewer based helpfulness ratio and overall product trends. 
-        If the review seems contradictory, mixed, or unusually emotional, reflect that in your response.
-
-        Include justification and emotional insight.
-
-        Use the format below for output:
-
-        {{
-        "sentiment_category": "positive|negative|neutral|mixed",
-        "sentiment_score": float (-1.0 to +1.0),
-        "model_confidence": float (0 to 1),
-        "key_drivers": ["list", "of", "sentiment", "drivers"],
-        "emotional_intensity": float (0 to 1),
-        "mixed_signals": true|false,
-        "conflicting_phrases": ["list", "if", "any"],
-        "justification": "short explanation",
-        "trust_tag": "high_trust|low_trust",
-        "persona_adjusted": true|false
-        }}
-
-        Here are examples to guide your thinking:
-        {example}
-
-        Now analyze the input review with all the above context.
-        """
-        return prompt
-
-    def adaptive_sentiment_analysis(self, review: str, context: Dict):
-        """Performs adaptive sentiment analysis by sending a constructed prompt to the LLM and parsing its output."""
-        prompt = self.build_adaptive_prompt(review, context)
-        response, _ = run_llm_model(self.model, prompt, max_retries=5)
-        try:
-            cleaned_response = re.findall(r"\{.*?\}", response, flags=re.DOTALL)
-            if cleaned_response:
-                result = json.loads(cleaned_response[0])
-                return result
-        except (json.JSONDecodeError, IndexError) as e:
-            print(f"Failed to parse through LLM output: {e}")
-            return {
-            "sentiment_category": "neutral",
-            "sentiment_score": 0.0,
-            "model_confidence": 0.0,
-            "key_drivers": [],
-            "emotional_intensity": 0.0,
-            "mixed_signals": False,
-            "conflicting_phrases": [],
-            "justification": "",
-            "trust_tag": "",
-            "persona_adjusted": False
-        }
-
-    def estimate_weightage(self, result):
-        """Estimates the confidence-based weightage of a sentiment result using heuristics and model confidence."""
-        HEURISTIC_WEIGHTS = {
-            "persona_adjusted": 0.1,
-            "no_conflict": 0.1,
-            "has_key_drivers": 0.1,
-            "no_mixed_signals": 0.1
-        }
-        CONFIDENCE_BIAS_TERM = 0.4
-        HIGH_CONFIDENCE_THRESHOLD = 0.7
-
-        score = 0
-
-        if result.get("persona_adjusted", False):
-            score += HEURISTIC_WEIGHTS["persona_adjusted"]
-
-        if not result.get("conflicting_phrases"):
-            score += HEURISTIC_WEIGHTS["no_conflict"]
-
-        if result.get("key_drivers"):
-            score += HEURISTIC_WEIGHTS["has_key_drivers"]
-
-        if not result.get("mixed_signals", False):
-            score += HEURISTIC_WEIGHTS["no_mixed_signals"]
-
-        model_confidence = result.get("model_confidence", 0)
-        adjusted_conf = (score + model_confidence) / (model_confidence + CONFIDENCE_BIAS_TERM)
-        result["adjusted_model_confidence"] = adjusted_conf
-        result["weightage"] = 1.0 if adjusted_conf > HIGH_CONFIDENCE_THRESHOLD else 0.0
-        return result
-
-    def overall_sentiment(self, product_memory):
-        """Computes the overall sentiment score for a product based on historical sentiment data and time decay."""
-        add_score = 0
-        for item in product_memory.sentiment_history:
-            days_since = calculate_days_passed(item['context']['review_date'])
-            if days_since > 365:
-                add_score += ((item['result']['weightage'] * item['result']['sentiment_score']) * 0.5)
-            else:
-                add_score += (item['result']['weightage'] * item['result']['sentiment_score'])
-        
-        overall_sentiment_score = add_score/len(product_memory.sentiment_history)
-
-        if overall_sentiment_score > 0.75:
-            overall_sentiment = "Highly Positive"
-        elif overall_sentiment_score > 0.55:
-            overall_sentiment = "Positive"
-        elif overall_sentiment_score > 0.45:
-            overall_sentiment = "Neutral"
-        elif overall_sentiment_score > 0.25:
-            overall_sentiment = "Negative"
-        else:
-            overall_sentiment = "Highly Negative"
-
-        product_memory.overall_sentiment = overall_sentiment
-        product_memory.overall_sentiment_score = overall_sentiment_score
-        
+from typing import Dict, List
+import asyncio
+from collections import Counter
+from Utils.helpers import calculate_days_passed, estimate_tokens
+from Core.model_runner import run_llm_model, run_llm_model_async
+from Core.structured_output import Schema, coerce, extract_json, extract_json_list
+
+class SentimentAnalyzerAgent:
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        """Initialize the sentiment analyzer with a specified LLM model."""
+        self.model = model
+        self.batch_stats = Counter()
+
+    BATCH_ITEM_METADATA_TOKENS = 90
+    BATCH_OUTPUT_TOKENS_PER_REVIEW = 160
+    MAX_BATCH_SIZE = 20
+    OUTPUT_SCHEMA = Schema(
+        required={"sentiment_category": str, "sentiment_score": float, "model_confidence": float,
+                  "key_drivers": list, "emotional_intensity": float, "justification": str},
+        optional={"mixed_signals": (bool, False), "conflicting_phrases": (list, []), "trust_tag": (str, ""), "persona_adjusted": (bool, False)}
+    )
+    RESULT_KEYS = set(OUTPUT_SCHEMA.required)
+
+    FEW_SHOT_EXAMPLES = {
+        "positive": """
+        Example: Strong Positive Review
+        Review: "Absolutely love the display and battery life! Feels like a flagship phone. Will recommend it to friends."
+        Context: Verified Purchase = True, Helpfulness Ratio = 0.85, Sentiment Trend = Mostly Positive
+
+        Expected Output:
+        {
+        "sentiment_category": "positive",
+        "sentiment_score": 0.91,
+        "model_confidence": 0.96,
+        "key_drivers": ["display quality", "battery life", "recommendation"],
+        "emotional_intensity": 0.85,
+        "mixed_signals": false,
+        "conflicting_phrases": [],
+        "justification": "Reviewer praises display and battery, and expresses willingness to recommend.",
+        "trust_tag": "high_trust",
+        "persona_adjusted": true
+        }
+        """,
+
+        "negative": """
+        Example: Strong Negative Review
+        Review: "Camera is decent, but the phone heats up really badly and lags during games. Regret buying this."
+        Context: Verified Purchase = True, Helpfulness Ratio = 0.9, Sentiment Trend = Mostly Negative
+
+        Expected Output:
+        {
+        "sentiment_category": "negative",
+        "sentiment_score": -0.75,
+        "model_confidence": 0.89,
+        "key_drivers": ["heating issue", "gaming lag", "regret"],
+        "emotional_intensity": 0.92,
+        "mixed_signals": true,
+        "conflicting_phrases": ["camera is decent", "regret buying this"],
+        "justification": "Despite a neutral comment on the camera, the strong emotional regret and major issues dominate the sentiment.",
+        "trust_tag": "high_trust",
+        "persona_adjusted": true
+        }
+        """,
+
+        "neutral": """
+        Example: Neutral Review
+        Review: "It’s okay, not bad but nothing special either."
+        Context: Verified Purchase = False, Helpfulness Ratio = 0.1, Sentiment Trend = Mostly Neutral
+
+        Expected Output:
+        {
+        "sentiment_category": "neutral",
+        "sentiment_score": 0.05,
+        "model_confidence": 0.62,
+        "key_drivers": ["average experience", "lack of enthusiasm"],
+        "emotional_intensity": 0.2,
+        "mixed_signals": false,
+        "conflicting_phrases": [],
+        "justification": "The reviewer gives a neutral stance with no strong praise or complaint.",
+        "trust_tag": "low_trust",
+        "persona_adjusted": false
+        }
+        """,
+
+        "mixed": """
+        Example: Mixed Signals Review
+        Review: "The phone looks stylish and works fine, but I had to replace it in 2 weeks because of charging issues."
+        Context: Verified Purchase = True, Helpfulness Ratio = 0.7, Sentiment Trend = Mixed
+
+        Expected Output:
+        {
+        "sentiment_category": "negative",
+        "sentiment_score": -0.4,
+        "model_confidence": 0.75,
+        "key_drivers": ["charging issues", "short product lifespan"],
+        "emotional_intensity": 0.7,
+        "mixed_signals": true,
+        "conflicting_phrases": ["looks stylish", "had to replace it"],
+        "justification": "Although appearance is praised, the functional issue leads to a negative overall impression.",
+        "trust_tag": "medium_trust",
+        "persona_adjusted": true
+        }
+        """,
+
+        "default": """
+        Example: General Balanced Review
+        Review: "The phone is fast and sleek, but the camera quality is just average. Not sure if it’s worth the price."
+        Context: Verified Purchase = True, Helpfulness Ratio = 0.5, Sentiment Trend = Unknown
+
+        Expected Output:
+        {
+        "sentiment_category": "neutral",
+        "sentiment_score": 0.1,
+        "model_confidence": 0.68,
+        "key_drivers": ["performance", "camera quality", "value concern"],
+        "emotional_intensity": 0.5,
+        "mixed_signals": true,
+        "conflicting_phrases": ["fast and sleek", "just average", "not sure if it’s worth the price"],
+        "justification": "Performance is appreciated but concerns about price and camera introduce ambivalence.",
+        "trust_tag": "medium_trust",
+        "persona_adjusted": true
+        }
+        """
+    }
+
+    @staticmethod
+    def build_adaptive_prompt(review: str, context: Dict) :
+        """Constructs a detailed sentiment analysis prompt using review text and context for the LLM."""
+        quality_score = context.get('quality_score', 'unknown')
+        verified = context.get('verified_purchase', False)
+        rating = context.get('rating', 'unknown')
+        review_length = context.get('review_length', 'unknown')
+        helpfulness_ratio = context.get('helpfulness_ratio', 0.0)
+        sentiment_trend = context.get('sentiment_trend', 'unknown')
+        recent_issues = ', '.join(context.get('recent_issues', []))
+        top_usps = ', '.join(context.get('top_usps', []))
+        persona_mode = context.get('persona_mode', 'balanced')
+        base_confidence = context.get('base_confidence', 0.7)
+        review_date = context.get('review_date', 'unknown')
+        reviewer_name = context.get('reviewer_name', 'unknown')
+        
+        if sentiment_trend == 'unknown':
+            example = SentimentAnalyzerAgent.FEW_SHOT_EXAMPLES['default']
+        else:
+            example = SentimentAnalyzerAgent.FEW_SHOT_EXAMPLES[sentiment_trend]
+
+        prompt = f"""
+        You are an advanced adaptive sentiment analysis AI with access to review metadata and product memory.
+
+        Your task is to assess the sentiment of the following customer review, considering not just the text but the full context below.
+
+        ===========================
+        Review: {review}
+        Review Date: {review_date}
+        Reviewer: {reviewer_name}
+        ===========================
+
+        Review Metadata:
+        - Verified Purchase: {verified}
+        - Star Rating: {rating}
+        - Review Length: {review_length}
+        - Helpfulness Ratio: {helpfulness_ratio:.2f}
+        - Quality Score: {quality_score}
+        
+        If star rating sentiment and review sentiment are mismatched, star rating should be neglected and review should be given weightage.
+
+        Product Memory Context:
+        - Sentiment Trend: {sentiment_trend}
+        - Recent Top Issues: {recent_issues}
+        - Top Praised Features (USPs): {top_usps}
+
+        Persona Mode: {persona_mode}
+        Expected Base Confidence Threshold: {base_confidence}
+
+        ---
+        Analyze this review carefully, adapting to the trustworthiness of the reviewer based helpfulness ratio and overall product trends. 
+        If the review seems contradictory, mixed, or unusually emotional, reflect that in your response.
+
+        Include justification and emotional insight.
+
+        Use the format below for output:
+
+        {{
+        "sentiment_category": "positive|negative|neutral|mixed",
+        "sentiment_score": float (-1.0 to +1.0),
+        "model_confidence": float (0 to 1),
+        "key_drivers": ["list", "of", "sentiment", "drivers"],
+        "emotional_intensity": float (0 to 1),
+        "mixed_signals": true|false,
+        "conflicting_phrases": ["list", "if", "any"],
+        "justification": "short explanation",
+        "trust_tag": "high_trust|low_trust",
+        "persona_adjusted": true|false
+        }}
+
+        Here are examples to guide your thinking:
+        {example}
+
+        Now analyze the input review with all the above context.
+        """
+        return prompt
+
+    def adaptive_sentiment_analysis(self, review: str, context: Dict):
+        """Performs adaptive sentiment analysis by sending a constructed prompt to the LLM and parsing its output."""
+        prompt = self.build_adaptive_prompt(review, context)
+        response, _ = run_llm_model(self.model, prompt, max_retries=5, agent="sentiment")
+        return self.parse_response(response, self.model)
+
+    async def adaptive_sentiment_analysis_async(self, review: str, context: Dict):
+        """Async variant of `adaptive_sentiment_analysis` used by the concurrent ingestion mode."""
+        prompt = self.build_adaptive_prompt(review, context)
+        response, _ = await run_llm_model_async(self.model, prompt, max_retries=5, agent="sentiment")
+        return self.parse_response(response, self.model)
+
+    @staticmethod
+    def parse_response(response: str, model: str = None):
+        """Extracts the sentiment JSON object from a raw LLM response, or returns a neutral zero-confidence result."""
+        result = extract_json(response, SentimentAnalyzerAgent.OUTPUT_SCHEMA, agent="sentiment", model=model)
+        if result is not None:
+            return result
+        return {
+            "sentiment_category": "neutral",
+            "sentiment_score": 0.0,
+            "model_confidence": 0.0,
+            "key_drivers": [],
+            "emotional_intensity": 0.0,
+            "mixed_signals": False,
+            "conflicting_phrases": [],
+            "justification": "",
+            "trust_tag": "",
+            "persona_adjusted": False
+        }
+
+    @staticmethod
+    def build_batch_item(index: int, review: str, context: Dict):
+        """Renders one review and its own metadata as a numbered block of a batched prompt."""
+        return f"""
+        =========== Review {index} ===========
+        Review: {review}
+        Review Date: {context.get('review_date', 'unknown')}
+        Reviewer: {context.get('reviewer_name', 'unknown')}
+        - Verified Purchase: {context.get('verified_purchase', False)}
+        - Star Rating: {context.get('rating', 'unknown')}
+        - Review Length: {context.get('review_length', 'unknown')}
+        - Helpfulness Ratio: {context.get('helpfulness_ratio', 0.0):.2f}
+        - Quality Score: {context.get('quality_score', 'unknown')}
+        - Persona Mode: {context.get('persona_mode', 'balanced')}
+        - Expected Base Confidence Threshold: {context.get('base_confidence', 0.7)}
+        """
+
+    @staticmethod
+    def build_batch_prompt(reviews: List[str], contexts: List[Dict]):
+        """
+        Constructs a single prompt that analyzes several reviews at once. Instructions, product memory
+        context and the few-shot example are written once, while every review keeps its own metadata.
+        Contexts of one batch are built from the same memory state, so the first one supplies the shared fields.
+        """
+        shared_context = contexts[0] if contexts else {}
+        sentiment_trend = shared_context.get('sentiment_trend', 'unknown')
+        recent_issues = ', '.join(shared_context.get('recent_issues', []))
+        top_usps = ', '.join(shared_context.get('top_usps', []))
+
+        if sentiment_trend == 'unknown':
+            example = SentimentAnalyzerAgent.FEW_SHOT_EXAMPLES['default']
+        else:
+            example = SentimentAnalyzerAgent.FEW_SHOT_EXAMPLES[sentiment_trend]
+
+        review_blocks = "".join(
+            SentimentAnalyzerAgent.build_batch_item(index, review, context)
+            for index, (review, context) in enumerate(zip(reviews, contexts), start=1)
+        )
+
+        prompt = f"""
+        You are an advanced adaptive sentiment analysis AI with access to review metadata and product memory.
+
+        Your task is to assess the sentiment of each of the {len(reviews)} customer reviews below independently,
+        considering not just the text but its own metadata and the shared product context.
+
+        Product Memory Context (shared by all reviews):
+        - Sentiment Trend: {sentiment_trend}
+        - Recent Top Issues: {recent_issues}
+        - Top Praised Features (USPs): {top_usps}
+
+        If star rating sentiment and review sentiment are mismatched, star rating should be neglected and review should be given weightage.
+        Adapt to the trustworthiness of each reviewer based on helpfulness ratio, persona mode and overall product trends.
+        If a review seems contradictory, mixed, or unusually emotional, reflect that in its result.
+
+        Return ONLY a JSON array with exactly one object per review, in the same order, each in the format below:
+
+        [
+        {{
+        "review_index": int (the number of the review),
+        "sentiment_category": "positive|negative|neutral|mixed",
+        "sentiment_score": float (-1.0 to +1.0),
+        "model_confidence": float (0 to 1),
+        "key_drivers": ["list", "of", "sentiment", "drivers"],
+        "emotional_intensity": float (0 to 1),
+        "mixed_signals": true|false,
+        "conflicting_phrases": ["list", "if", "any"],
+        "justification": "short explanation",
+        "trust_tag": "high_trust|low_trust",
+        "persona_adjusted": true|false
+        }}
+        ]
+
+        Here is an example of a single review result to guide your thinking:
+        {example}
+
+        Reviews:
+        {review_blocks}
+
+        Now analyze every review above and return the JSON array.
+        """
+        return prompt
+
+    @staticmethod
+    def parse_batch_response(response: str, batch_size: int, model: str = None):
+        """
+        Extracts per-review results from a batched LLM response; complete items of a truncated array are kept.
+        Returns a list aligned with the batch in which missing or malformed items are None.
+        """
+        results = [None] * batch_size
+        items = extract_json_list(response, SentimentAnalyzerAgent.OUTPUT_SCHEMA, agent="sentiment", model=model)
+        for position, item in enumerate(items):
+            if item is None:
+                continue
+            index = coerce(item.pop("review_index", position + 1), int)
+            if index is not None and 1 <= index <= batch_size and results[index - 1] is None:
+                results[index - 1] = item
+        return results
+
+    def batch_header_tokens(self):
+        """Returns the estimated token cost of the shared part of a batched prompt."""
+        return estimate_tokens(self.build_batch_prompt([], []))
+
+    def batch_item_tokens(self, review: str):
+        """Returns the estimated token cost one review adds to a batched prompt."""
+        return estimate_tokens(str(review)) + self.BATCH_ITEM_METADATA_TOKENS
+
+    def batch_sentiment_analysis(self, reviews: List[str], contexts: List[Dict]):
+        """
+        Analyzes a batch of reviews with one LLM request and returns results in batch order.
+        Reviews whose item is missing or malformed fall back to the single-review path.
+        """
+        if len(reviews) == 1:
+            return [self.adaptive_sentiment_analysis(reviews[0], contexts[0])]
+
+        prompt = self.build_batch_prompt(reviews, contexts)
+        max_tokens = self.BATCH_OUTPUT_TOKENS_PER_REVIEW * len(reviews) + 200
+        response, _ = run_llm_model(self.model, prompt, max_retries=5, max_tokens=max_tokens, agent="sentiment")
+        results = self.parse_batch_response(response, len(reviews), self.model)
+        self.batch_stats["batches"] += 1
+        self.batch_stats["batched_reviews"] += len(reviews)
+
+        for i, result in enumerate(results):
+            if result is None:
+                self.batch_stats["fallbacks"] += 1
+                results[i] = self.adaptive_sentiment_analysis(reviews[i], contexts[i])
+        return results
+
+    async def batch_sentiment_analysis_async(self, reviews: List[str], contexts: List[Dict]):
+        """Async variant of `batch_sentiment_analysis`; fallbacks of one batch run concurrently."""
+        if len(reviews) == 1:
+            return [await self.adaptive_sentiment_analysis_async(reviews[0], contexts[0])]
+
+        prompt = self.build_batch_prompt(reviews, contexts)
+        max_tokens = self.BATCH_OUTPUT_TOKENS_PER_REVIEW * len(reviews) + 200
+        response, _ = await run_llm_model_async(self.model, prompt, max_retries=5, max_tokens=max_tokens, agent="sentiment")
+        results = self.parse_batch_response(response, len(reviews), self.model)
+        self.batch_stats["batches"] += 1
+        self.batch_stats["batched_reviews"] += len(reviews)
+
+        failed = [i for i, result in enumerate(results) if result is None]
+        self.batch_stats["fallbacks"] += len(failed)
+        fallbacks = await asyncio.gather(*[
+            self.adaptive_sentiment_analysis_async(reviews[i], contexts[i]) for i in failed
+        ])
+        for i, result in zip(failed, fallbacks):
+            results[i] = result
+        return results
+
+    def estimate_weightage(self, result):
+        """Estimates the confidence-based weightage of a sentiment result using heuristics and model confidence."""
+        HEURISTIC_WEIGHTS = {
+            "persona_adjusted": 0.1,
+            "no_conflict": 0.1,
+            "has_key_drivers": 0.1,
+            "no_mixed_signals": 0.1
+        }
+        CONFIDENCE_BIAS_TERM = 0.4
+        HIGH_CONFIDENCE_THRESHOLD = 0.7
+
+        score = 0
+
+        if result.get("persona_adjusted", False):
+            score += HEURISTIC_WEIGHTS["persona_adjusted"]
+
+        if not result.get("conflicting_phrases"):
+            score += HEURISTIC_WEIGHTS["no_conflict"]
+
+        if result.get("key_drivers"):
+            score += HEURISTIC_WEIGHTS["has_key_drivers"]
+
+        if not result.get("mixed_signals", False):
+            score += HEURISTIC_WEIGHTS["no_mixed_signals"]
+
+        model_confidence = result.get("model_confidence", 0)
+        adjusted_conf = (score + model_confidence) / (model_confidence + CONFIDENCE_BIAS_TERM)
+        result["adjusted_model_confidence"] = adjusted_conf
+        result["weightage"] = 1.0 if adjusted_conf > HIGH_CONFIDENCE_THRESHOLD else 0.0
+        return result
+
+    def overall_sentiment(self, product_memory):
+        """Computes the overall sentiment score for a product based on historical sentiment data and time decay."""
+        add_score = 0
+        for item in product_memory.sentiment_history:
+            days_since = calculate_days_passed(item['context']['review_date'])
+            if days_since > 365:
+                add_score += ((item['result']['weightage'] * item['result']['sentiment_score']) * 0.5)
+            else:
+                add_score += (item['result']['weightage'] * item['result']['sentiment_score'])
+        
+        overall_sentiment_score = add_score/len(product_memory.sentiment_history)
+
+        if overall_sentiment_score > 0.75:
+            overall_sentiment = "Highly Positive"
+        elif overall_sentiment_score > 0.55:
+            overall_sentiment = "Positive"
+        elif overall_sentiment_score > 0.45:
+            overall_sentiment = "Neutral"
+        elif overall_sentiment_score > 0.25:
+            overall_sentiment = "Negative"
+        else:
+            overall_sentiment = "Highly Negative"
+
+        product_memory.overall_sentiment = overall_sentiment
+        product_memory.overall_sentiment_score = overall_sentiment_score
+        
         return overall_sentiment, overall_sentiment_score
\ No newline at end of file
@@ -1,115 +1,115 @@
-import re
-import json
-from Core.model_runner import run_llm_model
-
-class ReviewOverviewAgent:
-    def __init__(self, model: str = "gpt-3.5-turbo"):
-        """Initializes the review overview agent with a specified LLM model."""
-        self.model = model
-
-    @staticmethod
-    def build_adaptive_prompt(product_memory):
-        """
-        Builds a detailed prompt for summarizing product reviews using sentiment trends,
-        top praised features (USPs), and common issues from product memory.
-        """
-        product_name = product_memory.product_name
-        overall_sentiment = product_memory.overall_sentiment
-        overall_sentiment_score = product_memory.overall_sentiment_score
-        usps = sorted(product_memory.usps.items(), key = lambda item: item[1], reverse=True)
-        issues = sorted(product_memory.issues.items(), key = lambda item: item[1], reverse=True)
-        usps_justification = product_memory.usp_justification
-        issues_justification = product_memory.issue_justification
-
-        top_usps = ', '.join([f"{feature} (frequency: {count})" for feature, count in usps[:5]])
-        top_issues = ', '.join([f"{feature} (frequency: {count})" for feature, count in issues[:5]])
-
-        example_summary = """
-        Example Summary:
-        {
-        "summary": "Customers generally have a highly positive impression of the product. Praise centers on its battery life, crisp display, and responsive performance. 
-        Many noted that the device feels premium and delivers consistently on daily reliability, especially for users engaged in multitasking or extensive media consumption. 
-        The seamless software experience, build quality, and charging speed were also mentioned frequently, adding to the overall appeal.
-        Users appreciated the thoughtfully designed user interface and minimal bloatware, which enhanced day-to-day usability. Long battery endurance stood out for commuters and travelers, 
-        while the vibrant display drew praise from those who frequently stream videos or engage in gaming. There were repeated mentions of smooth app switching and minimal lag, 
-        which suggests the device’s internal performance is tuned well for real-world usage scenarios. However, the product is not without criticisms. 
-        Some users pointed out issues with the durability of the charging port after a few months of usage, and a smaller but vocal group noted inconsistent camera quality in low-light conditions. 
-        A handful of reviews flagged heating during extended gaming sessions. While these concerns were significant for a subset of customers, they did not generally outweigh the phone’s strengths.
-        Overall, the tone of the feedback is confident and enthusiastic, reflecting a strong alignment between user expectations and actual experience. 
-        The review landscape shows that while some functional improvements could elevate the product further, the current feature set is already meeting — and often exceeding — consumer 
-        needs across multiple usage profiles.",
-        "model_confidence": 0.92
-        }"""
-
-        prompt = f"""
-        You are a customer insights and sentiment analysis AI tasked with generating a human-readable review summary
-        for the product: **{product_name}**.
-
-        You will be provided with:
-        - The most praised features (USPs) and common issues.
-        - Justifications or extracted phrases behind those praises or complaints.
-        - An aggregated overall sentiment and sentiment score.
-
-        Your goal is to generate a clear, structured, and emotionally aligned overview that could be shown on a product page,
-        executive summary, or review dashboard.
-
-        ======================
-        Product: {product_name}
-
-        Overall Sentiment Summary:
-        - Trend: {overall_sentiment}
-        - Sentiment Score: {overall_sentiment_score:.2f} (range: -1.0 to +1.0)
-
-        Top Praised Features (USPs):
-        {top_usps}
-
-        USP Justifications:
-        {usps_justification}
-
-        Top Reported Issues:
-        {top_issues}
-
-        Issue Justifications:
-        {issues_justification}
-        ======================
-
-        🧠 Write a concise overview that:
-        - Starts with the overall customer impression and emotional tone.
-        - Highlights the most appreciated features with brief context.
-        - Points out common issues, neutrally and constructively.
-        - Reflects emotional intensity based on sentiment score.
-        - Does **not** include raw counts — use them to prioritize content only.
-
-        🎯 Format as a short paragraph (approx. 300–350 words) suitable for business reports or customer-facing summaries.
-
-        Use the example below as guidance:
-        {example_summary}
-
-        Generate the review summary below in the following JSON format:
-        {{
-            "summary": "<insert full review summary here>",
-            "model_confidence": "float (range: 0.0 to 1.0, indicating how confident you are in the quality and accuracy of the summary)"
-        }}
-        """
-        return prompt
-    
-    def create_review_summary(self, product_memory):
-        """
-        Generates a JSON-formatted review summary using LLM output based on
-        the product's review memory and contextual metadata.
-        """
-        prompt = self.build_adaptive_prompt(product_memory)
-        response, execution_time = run_llm_model(self.model, prompt, max_retries=5)
-
-        try:
-            cleaned_response = re.findall(r"\{.*?\}", response, flags=re.DOTALL)
-            if cleaned_response:
-                result = json.loads(cleaned_response[0])
-                return result, execution_time
-            
-        except (json.JSONDecodeError, IndexError) as e:
-            print(f"Failed to parse through LLM output: {e}")
-            return {
-            "summary": "",
-            "model_confidence": 0.0
-        }, execution_time
+from Core.model_runner import run_llm_model
+from Core.structured_output import Schema, extract_json
+from Utils.evidence import DEFAULT_EVIDENCE_TOKEN_BUDGET, select_evidence, format_evidence
+
+class ReviewOverviewAgent:
+    OUTPUT_SCHEMA = Schema(required={"summary": str, "model_confidence": float})
+
+    def __init__(self, model: str = "gpt-3.5-turbo", evidence_token_budget: int = DEFAULT_EVIDENCE_TOKEN_BUDGET):
+        """Initializes the review overview agent with a specified LLM model and justification token budget."""
+        self.model = model
+        self.evidence_token_budget = evidence_token_budget
+
+    @staticmethod
+    def build_adaptive_prompt(product_memory, evidence_token_budget: int = DEFAULT_EVIDENCE_TOKEN_BUDGET):
+        """
+        Builds a detailed prompt for summarizing product reviews using sentiment trends,
+        top praised features (USPs), and common issues from product memory.
+        Justifications are a diverse subset selected within `evidence_token_budget`, split between USPs and issues.
+        """
+        product_name = product_memory.product_name
+        overall_sentiment = product_memory.overall_sentiment
+        overall_sentiment_score = product_memory.overall_sentiment_score
+        usps = sorted(product_memory.usps.items(), key = lambda item: item[1], reverse=True)
+        issues = sorted(product_memory.issues.items(), key = lambda item: item[1], reverse=True)
+        usps_justification = format_evidence(select_evidence(product_memory.usp_justification, product_memory.usp_evidence, product_memory.usps, evidence_token_budget // 2))
+        issues_justification = format_evidence(select_evidence(product_memory.issue_justification, product_memory.issue_evidence, product_memory.issues, evidence_token_budget // 2))
+
+        top_usps = ', '.join([f"{feature} (frequency: {count})" for feature, count in usps[:5]])
+        top_issues = ', '.join([f"{feature} (frequency: {count})" for feature, count in issues[:5]])
+
+        example_summary = """
+        Example Summary:
+        {
+        "summary": "Customers generally have a highly positive impression of the product. Praise centers on its battery life, crisp display, and responsive performance. 
+        Many noted that the device feels premium and delivers consistently on daily reliability, especially for users engaged in multitasking or extensive media consumption. 
+        The seamless software experience, build quality, and charging speed were also mentioned frequently, adding to the overall appeal.
+        Users appreciated the thoughtfully designed user interface and minimal bloatware, which enhanced day-to-day usability. Long battery endurance stood out for commuters and travelers, 
+        while the vibrant display drew praise from those who frequently stream videos or engage in gaming. There were repeated mentions of smooth app switching and minimal lag, 
+        which suggests the device’s internal performance is tuned well for real-world usage scenarios. However, the product is not without criticisms. 
+        Some users pointed out issues with the durability of the charging port after a few months of usage, and a smaller but vocal group noted inconsistent camera quality in low-light conditions. 
+        A handful of reviews flagged heating during extended gaming sessions. While these concerns were significant for a subset of customers, they did not generally outweigh the phone’s strengths.
+        Overall, the tone of the feedback is confident and enthusiastic, reflecting a strong alignment between user expectations and actual experience. 
+        The review landscape shows that while some functional improvements could elevate the product further, the current feature set is already meeting — and often exceeding — consumer 
+        needs across multiple usage profiles.",
+        "model_confidence": 0.92
+        }"""
+
+        prompt = f"""
+        You are a customer insights and sentiment analysis AI tasked with generating a human-readable review summary
+        for the product: **{product_name}**.
+
+        You will be provided with:
+        - The most praised features (USPs) and common issues.
+        - Justifications or extracted phrases behind those praises or complaints.
+        - An aggregated overall sentiment and sentiment score.
+
+        Your goal is to generate a clear, structured, and emotionally aligned overview that could be shown on a product page,
+        executive summary, or review dashboard.
+
+        ======================
+        Product: {product_name}
+
+        Overall Sentiment Summary:
+        - Trend: {overall_sentiment}
+        - Sentiment Score: {overall_sentiment_score:.2f} (range: -1.0 to +1.0)
+
+        Top Praised Features (USPs):
+        {top_usps}
+
+        USP Justifications:
+        {usps_justification}
+
+        Top Reported Issues:
+        {top_issues}
+
+        Issue Justifications:
+        {issues_justification}
+        ======================
+
+        🧠 Write a concise overview that:
+        - Starts with the overall customer impression and emotional tone.
+        - Highlights the most appreciated features with brief context.
+        - Points out common issues, neutrally and constructively.
+        - Reflects emotional intensity based on sentiment score.
+        - Does **not** include raw counts — use them to prioritize content only.
+
+        🎯 Format as a short paragraph (approx. 300–350 words) suitable for business reports or customer-facing summaries.
+
+        Use the example below as guidance:
+        {example_summary}
+
+        Generate the review summary below in the following JSON format:
+        {{
+            "summary": "<insert full review summary here>",
+            "model_confidence": "float (range: 0.0 to 1.0, indicating how confident you are in the quality and accuracy of the summary)"
+        }}
+        """
+        return prompt
+    
+    def create_review_summary(self, product_memory, refresh_cache: bool = False):
+        """
+        Generates a JSON-formatted review summary using LLM output based on
+        the product's review memory and contextual metadata.
+        With `refresh_cache`, a cached response is ignored and replaced, so a rejected output can be retried.
+        """
+        prompt = self.build_adaptive_prompt(product_memory, self.evidence_token_budget)
+        response, execution_time = run_llm_model(self.model, prompt, max_retries=5, agent="summary", product=product_memory.product_name, refresh_cache=refresh_cache)
+
+        result = extract_json(response, self.OUTPUT_SCHEMA, agent="summary", model=self.model, product=product_memory.product_name)
+        if result is not None:
+            return result, execution_time
+        return {
+            "summary": "",
+            "model_confidence": 0.0
+        }, execution_time
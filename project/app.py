@@ -1,289 +1,425 @@
-# app.py
-
-import streamlit as st
-import pandas as pd
-import pickle
-import openai
-import os
-from Core.self_evaluation import self_evaluate
-from analyzer.base import MultiAgent
-from analyzer.trend import TrendAnalyzerAgent
-from memory_manager import ProductMemory
-
-st.set_page_config(page_title="📊 Agentic Review Analyzer", layout="wide")
-
-st.title("🤖 Agentic AI Review Analyzer")
-
-st.sidebar.header("🔧 Configuration Options")
-# Model Choice
-model_choice = st.sidebar.selectbox(
-    label="Choose LLM Model",
-    options=["gpt-4o-mini", "gpt-4.1-nano"],
-    index=1
-)
-# API Key Input
-api_key = st.sidebar.text_input(
-    label="🔑 Enter your OpenAI API Key",
-    type="password",
-    help="This key is used only during your session and not stored."
-)
-# Display in main area for debug 
-st.write("Selected Model:", model_choice)
-if not api_key:
-    st.warning("⚠️ Please enter your OpenAI API Key in the sidebar to continue.")
-    st.stop()
-openai.api_key = api_key
-
-agent = MultiAgent(model=model_choice)
-
-# Initialize session state variables
-if "product_memory" not in st.session_state:
-    st.session_state.product_memory = None
-if "tasks" not in st.session_state:
-    st.session_state.tasks = None
-if "quality_parameter" not in st.session_state:
-    st.session_state.quality_parameter = None
-if "last_uploaded_file" not in st.session_state:
-    st.session_state.last_uploaded_file = None
-
-# Upload File
-uploaded_file = st.file_uploader("Upload Review Dataset (CSV)", type=["csv", "xlsx"])
-
-if uploaded_file:
-
-    # Clear cached analysis if new file uploaded
-    if "last_uploaded_file" in st.session_state and uploaded_file.name != st.session_state.last_uploaded_file:
-        st.session_state.pop("product_memory", None)
-        st.session_state.pop("tasks", None)
-        st.session_state.pop("quality_parameter", None)
-    st.session_state.last_uploaded_file = uploaded_file.name
-
-    # Load dataset
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-
-    # Validate essential columns
-    required_cols = {"customer_review", "rating", "verified_purchase", "review_date", "customer_name", "helpful_votes", "total_votes", "review_length"}
-    if not required_cols.issubset(df.columns):
-        st.error(f"Dataset must contain: {', '.join(required_cols)}")
-        st.stop()
-
-   # Run multi-agent analysis only once
-    if "product_memory" not in st.session_state:
-        with st.spinner("Running Multi-Agent Analysis..."):
-            product_memory, tasks, quality_parameter = agent.create_product_memory_and_prioritize_tasks(df)
-            st.session_state.product_memory = product_memory
-            st.session_state.tasks = tasks
-            st.session_state.quality_parameter = quality_parameter
-    else:
-        product_memory = st.session_state.product_memory
-        tasks = st.session_state.tasks
-        quality_parameter = st.session_state.quality_parameter
-
-    #Data Quality Parameter
-    with st.expander("📊 Data Quality Parameter", expanded=False):
-        st.json(st.session_state.quality_parameter)
-        print(tasks)
-
-    # Validate Data Completeness
-    if tasks == []:
-        st.error(f"Data contains missing values (completeness ratio: {st.session_state.quality_parameter['review_completeness']}). Please handle null entries before proceeding.")
-        st.stop()
-    st.success("✅ Initial Analysis Complete! Expand below to explore data quality insights.")
-
-    # Save Memory Option
-    if st.sidebar.button("💾 Save Memory"):
-        save_dir = r"C:\Users\debli\OneDrive\Desktop\CV_PROJECT\AGENTIC_AI_BASED_REVIEW_ANALYZER\data\memory"
-        os.makedirs(save_dir, exist_ok=True)
-        path = os.path.join(save_dir, f"{st.session_state.product_memory.product_name}.pkl")
-        
-        with open(path, "wb") as f:
-            pickle.dump(st.session_state.product_memoryy, f)
-
-        st.sidebar.success(f"Memory saved at:\n📂 `{path}`")
-
-    # Product Summary
-    with st.expander("📄 Product Summary", expanded=False):
-        if st.session_state.product_memory is not None:
-            summary = st.session_state.product_memory.generate_summary()
-            st.json(summary)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-
-
-    # Overall Sentiment 
-    with st.expander("💬 Overall Sentiment Analysis", expanded=False):
-        if st.session_state.product_memory is not None:
-            overall_sentiment, overall_sentiment_score = agent.SentimentAnalyzerAgent.overall_sentiment(st.session_state.product_memory)
-
-            # Color mapping
-            sentiment_color = {
-                "Positive": "#34d399",  # Green
-                "Neutral": "#facc15",   # Yellow
-                "Negative": "#f87171",  # Red
-                "Mixed": "#60a5fa"      # Blue
-            }.get(overall_sentiment, "#e5e7eb")  # Default gray
-
-            # Icon mapping
-            sentiment_icon = {
-                "Positive": "😊",
-                "Neutral": "😐",
-                "Negative": "😠",
-                "Mixed": "🤔"
-            }.get(overall_sentiment, "💬")
-
-            # Render UI block
-            html_block = f"""
-                <div style="background-color: #1e1e1e; border-left: 6px solid {sentiment_color}; padding: 1.3rem 1.5rem; border-radius: 10px; box-shadow: 0 0 8px rgba(255,255,255,0.04); margin-top: 0.5rem;">
-                    <h4 style="margin: 0; color: {sentiment_color};">{sentiment_icon} {overall_sentiment} Sentiment</h4> 
-                    <p style="font-size: 1.05rem; margin-top: 0.5rem; color: #e5e7eb;">
-                        Sentiment Score: <span style="color: {sentiment_color}; font-weight: bold;"> {overall_sentiment_score:.2f} </span>
-                    </p>
-                </div>
-            """
-            st.markdown(html_block, unsafe_allow_html=True)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-
-    # Review Overview
-    with st.expander("🧠 AI-Generated Review Summary", expanded=False):
-        if st.session_state.product_memory is not None:
-            result, execution_time = agent.ReviewOverviewAgent.create_review_summary(st.session_state.product_memory)
-            retry = self_evaluate(result, execution_time)
-            if retry:
-                result, execution_time = agent.ReviewOverviewAgent.create_review_summary(st.session_state.product_memory)
-
-            summary = result["summary"]
-            confidence = result["model_confidence"]
-
-            html_block = f"""
-                <div style="background-color: #1e1e1e; border-radius: 12px; padding: 1.2rem 1.5rem; margin-top: 0.5rem; box-shadow: 0 0 10px rgba(255,255,255,0.05);">
-                    <h4 style="margin-top: 0; color: #c084fc;">🔍 AI Summary Insight</h4>
-                    <p style="font-size: 1.05rem; line-height: 1.6; color: #e5e7eb; margin-bottom: 1rem;">
-                        {summary}
-                    </p>
-                    <p style="font-size: 0.9rem; color: #9ca3af;">
-                        🤖 <strong>Model Confidence:</strong> <span style="color: {'#34d399' if confidence >= 0.8 else '#facc15' if confidence >= 0.5 else '#f87171'};">{confidence:.2f}</span>
-                    </p>
-                </div>
-            """
-            st.markdown(html_block, unsafe_allow_html=True)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-
-    # Top USPs
-    with st.expander("✨ Top Praised Features (USPs)", expanded=False):
-        if st.session_state.product_memory is not None:
-            result, _ = agent.USPDectectorAgent.detect_usps(st.session_state.product_memory)
-            retry = self_evaluate(result, execution_time)
-            if retry:
-                result, execution_time = agent.USPDectectorAgent.detect_usps(st.session_state.product_memory)
-
-            for usp in result['top_usps']:
-                feature = usp['feature']
-                mentions = usp['positive_mentions']
-                justification = usp['justification']
-
-                html_block = f"""
-                    <div style="border-left: 5px solid #4ade80; background-color: #1e1e1e; padding: 0.75rem 1rem; border-radius: 10px; margin-bottom: 0.8rem;">
-                        <h4 style="margin: 0 0 0.2rem 0;">🌟 {feature}</h4>
-                        <p style="margin: 0.2rem 0;"><span style="background-color: #10b98133; color: #10b981; padding: 0.2rem 0.5rem; border-radius: 5px; font-weight: bold;">{mentions} mentions</span></p>
-                        <p style="margin: 0.3rem 0; color: #d1d5db;"><em>“{justification}”</em></p>
-                    </div>
-                """
-                st.markdown(html_block, unsafe_allow_html=True)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-
-    # Top Issues
-    with st.expander("⚠️ Top Complaints (Issues)", expanded=False):
-        if st.session_state.product_memory is not None:
-            result, _ = agent.IssueDetectorAgent.detect_issues(st.session_state.product_memory)
-            retry = self_evaluate(result, execution_time)
-            if retry:
-                result, execution_time = agent.IssueDetectorAgent.detect_issues(st.session_state.product_memory)
-
-            for issue in result['top_issues']:
-                feature = issue['feature']
-                mentions = issue['negative_mentions']
-                justification = issue['justification']
-
-                html_block = f"""
-                    <div style="border-left: 5px solid #ef4444; background-color: #2a2a2a; padding: 0.75rem 1rem; border-radius: 10px; margin-bottom: 0.8rem;">
-                        <h4 style="margin: 0 0 0.2rem 0;">🚫 {feature}</h4>
-                        <p style="margin: 0.2rem 0;">
-                            <span style="background-color: #f8717133; color: #f87171; padding: 0.2rem 0.5rem; border-radius: 5px; font-weight: bold;">
-                                {mentions} complaints
-                            </span>
-                        </p>
-                        <p style="margin: 0.3rem 0; color: #fca5a5;"><em>“{justification}”</em></p>
-                    </div>
-                """
-                st.markdown(html_block, unsafe_allow_html=True)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-            
-
-    # Trend Chart
-    with st.expander("📈 Sentiment Trend Over Time", expanded=False):
-        if st.session_state.product_memory is not None:
-            trend_result, trend_dict, _ = agent.TrendAnalyzerAgent.analyze_trend(st.session_state.product_memory, "historical")
-            df_trend, metrics = agent.TrendAnalyzerAgent.compute_trend_metrics(trend_dict)
-
-            # Display chart
-            st.markdown("### 🔄 Sentiment Evolution")
-            agent.TrendAnalyzerAgent.visualize_trend(df_trend, metrics)
-
-            # Display model confidence with color coding
-            confidence = trend_result["model_confidence"]
-            confidence_color = (
-                "#34d399" if confidence >= 0.8 else 
-                "#facc15" if confidence >= 0.5 else 
-                "#f87171"
-            )
-
-            # Card-like summary and confidence report
-            html_block = f"""
-                <div style="background-color: #1e1e1e; border-left: 5px solid #60a5fa;
-                            padding: 1rem 1.2rem; border-radius: 10px; margin-top: 1rem;">
-                    <p style="margin-top: 0.5rem; color: #e5e7eb; line-height: 1.5;">
-                        {trend_result["trend_analysis_report"]}
-                    </p>
-                    <p style="margin: 0; font-size: 0.9rem; color: #9ca3af;">
-                        🤖 <strong>Model Confidence:</strong> 
-                        <span style="color: {confidence_color};">{confidence:.2f}</span>
-                    </p>
-                </div>
-            """
-            st.markdown(html_block, unsafe_allow_html=True)
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
-
-    # Recent Processed Reviews
-    with st.expander("🕵️‍♂️ Recent Processed Reviews", expanded=False):
-        if st.session_state.product_memory is not None:
-            recent_reviews = st.session_state.product_memory.get_recent_reviews(n=5)
-            
-            for idx, review in enumerate(recent_reviews, start=1):
-                review_date = review['context']['review_date']
-                sentiment = review['result']['sentiment_category']
-                score = review['result']['sentiment_score']
-                key_drivers = review['result']['key_drivers']
-                justification = review['result']['justification']
-
-                with st.container():
-                    html_block = f"""
-                        <div style="border: 1px solid #444; border-radius: 12px; padding: 1rem; margin-bottom: 1rem; background-color: #1e1e1e;">
-                            <h4 style="margin-bottom: 0.3rem;">📝 Review {idx}</h4>
-                            <p style="margin: 0.2rem 0;"><strong>📅 Date:</strong> {review_date}</p>
-                            <p style="margin: 0.2rem 0;"><strong>🎯 Sentiment:</strong> <span style="color: {'#34c759' if sentiment=='Positive' else '#ff3b30' if sentiment=='Negative' else '#ffd60a'};">{sentiment}</span> (Score: {score:.2f})</p>
-                            <p style="margin: 0.2rem 0;"><strong>🧠 Key Drivers:</strong> {key_drivers}</p>
-                            <p style="margin: 0.2rem 0;"><strong>🔍 Justification:</strong> {justification}</p>
-                        </div>
-                    """
-                    st.markdown(html_block, unsafe_allow_html=True)
-
-        else:
-            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+# app.py
+
+import io
+import time
+import streamlit as st
+import pandas as pd
+import openai
+from Core.self_evaluation import self_evaluate
+from Core.llm_cache import get_cache
+from Core.agent_memo import AgentMemo
+from Core.analysis_job import AnalysisJob
+from Core.telemetry import MODEL_PRICES, telemetry
+from analyzer.base import MultiAgent
+from memory_store import DEFAULT_MEMORY_DIR
+from Utils.ingestion import REQUIRED_COLUMNS, iter_review_chunks, missing_columns
+
+st.set_page_config(page_title="📊 Agentic Review Analyzer", layout="wide")
+
+st.title("🤖 Agentic AI Review Analyzer")
+
+st.sidebar.header("🔧 Configuration Options")
+# Model Choice
+model_choice = st.sidebar.selectbox(
+    label="Choose LLM Model",
+    options=["gpt-4o-mini", "gpt-4.1-nano"],
+    index=1
+)
+# API Key Input
+api_key = st.sidebar.text_input(
+    label="🔑 Enter your OpenAI API Key",
+    type="password",
+    help="This key is used only during your session and not stored."
+)
+# Display in main area for debug 
+st.write("Selected Model:", model_choice)
+if not api_key:
+    st.warning("⚠️ Please enter your OpenAI API Key in the sidebar to continue.")
+    st.stop()
+openai.api_key = api_key
+
+# Response cache counters
+cache = get_cache()
+if cache is not None:
+    cache_stats = cache.stats()
+    st.sidebar.caption(f"🗄️ LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['entries']} entries)")
+
+# LLM telemetry of the current run (since the dataset was uploaded)
+run_mark = st.session_state.get("telemetry_mark")
+if run_mark is not None:
+    run_totals = telemetry.totals(run_mark)
+    latency = f"p50 ≤ {run_totals['latency_p50']}s, p95 ≤ {run_totals['latency_p95']}s" if run_totals["latency_p50"] is not None else "no requests yet"
+    st.sidebar.caption(f"💸 This run: ${run_totals['cost_usd']:.4f} over {run_totals['calls']} LLM calls "
+                       f"({run_totals['cache_hits']} cached, {run_totals['failures']} failed); latency {latency}")
+    if run_totals["parse_failure_rate"] is not None:
+        st.sidebar.caption(f"🧩 Unparseable responses: {run_totals['parse_failure_rate']:.1%} "
+                           f"({run_totals['parse_repaired']} repaired locally)")
+    with st.sidebar.expander("📈 LLM telemetry", expanded=False):
+        st.download_button("⬇️ This run (JSON)", telemetry.to_json(run_mark), file_name="llm_telemetry.json", mime="application/json")
+        st.download_button("⬇️ All calls (Prometheus)", telemetry.to_prometheus(), file_name="llm_telemetry.prom", mime="text/plain")
+
+# Memory Store Location
+memory_dir = st.sidebar.text_input(
+    label="📂 Memory directory",
+    value=DEFAULT_MEMORY_DIR,
+    help="Folder where saved product memories are stored."
+)
+
+# Local First Tier
+use_local_tier = st.sidebar.checkbox(
+    label="⚡ Skip LLM on easy reviews",
+    value=False,
+    help="Short single-polarity reviews that agree with their star rating are scored locally instead of by the LLM."
+)
+
+# Near-Duplicate Reuse
+use_dedup = st.sidebar.checkbox(
+    label="♻️ Reuse results for near-duplicate reviews",
+    value=False,
+    help="Copy-pasted and templated reviews reuse the analysis of the first matching review."
+)
+
+# Model Cascade
+use_cascade = st.sidebar.checkbox(
+    label="🪜 Cheaper model first",
+    value=False,
+    help="Runs the cheapest model first and re-runs only low-confidence results on the selected model, for at most 10% of the calls of a run."
+)
+first_tier_model, escalation_model = model_choice, None
+if use_cascade:
+    cheaper = [model for model in MODEL_PRICES if sum(MODEL_PRICES[model]) < sum(MODEL_PRICES.get(model_choice, (0.0, 0.0)))]
+    if cheaper:
+        first_tier_model, escalation_model = min(cheaper, key=lambda model: sum(MODEL_PRICES[model])), model_choice
+        st.sidebar.caption(f"🪜 {first_tier_model} first, low-confidence results escalate to {model_choice}")
+    else:
+        st.sidebar.caption(f"🪜 No model is cheaper than {model_choice}; choose a stronger model to cascade.")
+
+# Build the agents once per configuration instead of on every rerun
+agent_config = (model_choice, memory_dir, use_local_tier, use_dedup, use_cascade)
+if st.session_state.get("agent_config") != agent_config:
+    st.session_state.agent = MultiAgent(model=first_tier_model, memory_dir=memory_dir, local_tier_threshold=0.8 if use_local_tier else None, dedup_threshold=0.8 if use_dedup else None,
+                                        escalation_model=escalation_model)
+    st.session_state.agent_config = agent_config
+agent = st.session_state.agent
+
+# Initialize session state variables
+if "agent_memo" not in st.session_state:
+    st.session_state.agent_memo = AgentMemo()
+if "product_memory" not in st.session_state:
+    st.session_state.product_memory = None
+if "tasks" not in st.session_state:
+    st.session_state.tasks = None
+if "quality_parameter" not in st.session_state:
+    st.session_state.quality_parameter = None
+if "last_uploaded_file" not in st.session_state:
+    st.session_state.last_uploaded_file = None
+
+# Upload File
+uploaded_file = st.file_uploader("Upload Review Dataset (CSV)", type=["csv", "xlsx"])
+
+if uploaded_file:
+
+    # Clear cached analysis if new file uploaded
+    if "last_uploaded_file" in st.session_state and uploaded_file.name != st.session_state.last_uploaded_file:
+        st.session_state.pop("product_memory", None)
+        st.session_state.pop("tasks", None)
+        st.session_state.pop("quality_parameter", None)
+        st.session_state.agent_memo.invalidate()
+        agent.escalation_budget.reset()
+        st.session_state.telemetry_mark = telemetry.mark()
+        previous_job = st.session_state.pop("analysis_job", None)
+        if previous_job is not None:
+            previous_job.cancel()
+    st.session_state.last_uploaded_file = uploaded_file.name
+
+    # Validate essential columns from the header; the dataset itself is streamed in chunks
+    header = next(iter_review_chunks(uploaded_file, chunksize=1, filename=uploaded_file.name), pd.DataFrame())
+    if missing_columns(header.columns):
+        st.error(f"Dataset must contain: {', '.join(REQUIRED_COLUMNS)}")
+        st.stop()
+
+   # Run multi-agent analysis only once, as a background job on a private copy of the upload
+    if st.session_state.get("product_memory") is None:
+        job = st.session_state.get("analysis_job")
+        if job is None:
+            job = AnalysisJob(agent, io.BytesIO(uploaded_file.getvalue()), filename=uploaded_file.name).start()
+            st.session_state.analysis_job = job
+
+        if job.is_running():
+            progress = job.progress()
+            st.info(f"⏳ Multi-Agent Analysis {progress['status']}...")
+            if progress["total"]:
+                st.progress(min(progress["done"] / progress["total"], 1.0))
+            done_col, speed_col, eta_col, cost_col = st.columns(4)
+            done_col.metric("Reviews analyzed", f"{progress['done']}" + (f" / {progress['total']}" if progress["total"] else ""))
+            speed_col.metric("Throughput", f"{progress['throughput']:.1f} reviews/s")
+            eta_col.metric("ETA", f"{progress['eta_seconds']:.0f}s" if progress["eta_seconds"] is not None else "–")
+            cost_col.metric("Cost so far", f"${progress['cost_usd']:.4f}")
+            if job.memory_view is not None:
+                with st.expander("🔎 Partial results", expanded=False):
+                    st.json(job.memory_view)
+            if st.button("⏹️ Cancel analysis"):
+                job.cancel()
+            time.sleep(1)
+            st.rerun()
+
+        if job.status == "failed":
+            st.error(f"Analysis failed: {job.error}")
+            st.stop()
+        if job.status == "cancelled":
+            st.warning(f"Analysis cancelled after {job.done} reviews; the results below cover the reviews processed so far.")
+        product_memory, tasks, quality_parameter = job.product_memory, job.tasks, job.quality_parameter
+        st.session_state.product_memory = product_memory
+        st.session_state.tasks = tasks
+        st.session_state.quality_parameter = quality_parameter
+        st.session_state.local_tier_stats = job.agent.LocalSentimentTier.summary() if job.agent.LocalSentimentTier else None
+        st.session_state.dedup_stats = job.agent.dedup_stats
+        st.session_state.escalation_stats = job.agent.escalation_budget.summary()
+    else:
+        product_memory = st.session_state.product_memory
+        tasks = st.session_state.tasks
+        quality_parameter = st.session_state.quality_parameter
+
+    #Data Quality Parameter
+    with st.expander("📊 Data Quality Parameter", expanded=False):
+        st.json(st.session_state.quality_parameter)
+        print(tasks)
+
+    # Validate Data Completeness
+    if tasks == []:
+        st.error(f"Data contains missing values (completeness ratio: {st.session_state.quality_parameter['review_completeness']}). Please handle null entries before proceeding.")
+        st.stop()
+    st.success("✅ Initial Analysis Complete! Expand below to explore data quality insights.")
+    tier_stats = st.session_state.get("local_tier_stats")
+    if tier_stats:
+        st.sidebar.caption(f"⚡ Local tier: {tier_stats['llm_calls_skipped']}/{tier_stats['reviews']} LLM calls skipped, agreement {tier_stats['agreement_rate']} on {tier_stats['audited']} audited")
+    dedup_stats = st.session_state.get("dedup_stats")
+    if dedup_stats:
+        st.sidebar.caption(f"♻️ Near-duplicates: {dedup_stats['llm_calls_saved']}/{dedup_stats['reviews']} reviews reused an earlier result")
+    escalations = st.session_state.get("escalation_stats")
+    if agent.escalation_model is not None and escalations:
+        st.sidebar.caption(f"🪜 Escalated {escalations['escalated']} of {escalations['observed']} sentiment results to {agent.escalation_model}"
+                           f" ({escalations['denied']} over budget)")
+
+    def memoized_agent_output(name: str, label: str, run):
+        """
+        Returns the memoized output of a report agent for the current memory and model. The agent runs only
+        when its section's button is pressed: once to generate, and again on refresh. Returns None until then.
+        """
+        memo = st.session_state.agent_memo
+        key = memo.key(st.session_state.product_memory, name, (agent.model, agent.escalation_model))
+        cached = memo.has(key)
+        clicked = st.button("🔄 Refresh" if cached else f"▶️ {label}", key=f"run_{name}")
+        if not cached and not clicked:
+            return None
+        with st.spinner(f"Running {label.lower()}..."):
+            return memo.get_or_run(key, run, refresh=cached and clicked)
+
+    def evaluated(agent_name: str, call):
+        """
+        Returns a runner of `call(agent)` on a report agent. With the model cascade, low-confidence results
+        escalate to the stronger model; otherwise the call is retried once if self-evaluation asks to.
+        Either way, re-runs come out of the run's escalation budget. A retry bypasses the response cache,
+        which would otherwise return the rejected response again, and replaces the cached entry.
+        """
+        def run_with_retry():
+            if agent.escalation_model is not None:
+                return agent.cascaded(agent_name, call)
+            result, execution_time = call(getattr(agent, agent_name))
+            agent.escalation_budget.observe()
+            if self_evaluate(result, execution_time) and agent.escalation_budget.try_spend():
+                result, execution_time = call(getattr(agent, agent_name), refresh_cache=True)
+            return result, execution_time
+        return run_with_retry
+
+    # Save Memory Option
+    if st.sidebar.button("💾 Save Memory"):
+        path = agent.save_product_memory(st.session_state.product_memory.product_name, st.session_state.product_memory)
+        st.sidebar.success(f"Memory saved at:\n📂 `{path}`")
+
+    # Product Summary
+    with st.expander("📄 Product Summary", expanded=False):
+        if st.session_state.product_memory is not None:
+            summary = st.session_state.product_memory.generate_summary()
+            st.json(summary)
+        else:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+
+
+    # Overall Sentiment 
+    with st.expander("💬 Overall Sentiment Analysis", expanded=False):
+        if st.session_state.product_memory is not None:
+            overall_sentiment, overall_sentiment_score = agent.SentimentAnalyzerAgent.overall_sentiment(st.session_state.product_memory)
+
+            # Color mapping
+            sentiment_color = {
+                "Positive": "#34d399",  # Green
+                "Neutral": "#facc15",   # Yellow
+                "Negative": "#f87171",  # Red
+                "Mixed": "#60a5fa"      # Blue
+            }.get(overall_sentiment, "#e5e7eb")  # Default gray
+
+            # Icon mapping
+            sentiment_icon = {
+                "Positive": "😊",
+                "Neutral": "😐",
+                "Negative": "😠",
+                "Mixed": "🤔"
+            }.get(overall_sentiment, "💬")
+
+            # Render UI block
+            html_block = f"""
+                <div style="background-color: #1e1e1e; border-left: 6px solid {sentiment_color}; padding: 1.3rem 1.5rem; border-radius: 10px; box-shadow: 0 0 8px rgba(255,255,255,0.04); margin-top: 0.5rem;">
+                    <h4 style="margin: 0; color: {sentiment_color};">{sentiment_icon} {overall_sentiment} Sentiment</h4> 
+                    <p style="font-size: 1.05rem; margin-top: 0.5rem; color: #e5e7eb;">
+                        Sentiment Score: <span style="color: {sentiment_color}; font-weight: bold;"> {overall_sentiment_score:.2f} </span>
+                    </p>
+                </div>
+            """
+            st.markdown(html_block, unsafe_allow_html=True)
+        else:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+
+    # Review Overview
+    with st.expander("🧠 AI-Generated Review Summary", expanded=False):
+        output = None
+        if st.session_state.product_memory is not None:
+            output = memoized_agent_output("summary", "Generate summary", evaluated("ReviewOverviewAgent", lambda overview_agent, **options: overview_agent.create_review_summary(st.session_state.product_memory, **options)))
+        if output is not None:
+            result, execution_time = output
+
+            summary = result["summary"]
+            confidence = result["model_confidence"]
+
+            html_block = f"""
+                <div style="background-color: #1e1e1e; border-radius: 12px; padding: 1.2rem 1.5rem; margin-top: 0.5rem; box-shadow: 0 0 10px rgba(255,255,255,0.05);">
+                    <h4 style="margin-top: 0; color: #c084fc;">🔍 AI Summary Insight</h4>
+                    <p style="font-size: 1.05rem; line-height: 1.6; color: #e5e7eb; margin-bottom: 1rem;">
+                        {summary}
+                    </p>
+                    <p style="font-size: 0.9rem; color: #9ca3af;">
+                        🤖 <strong>Model Confidence:</strong> <span style="color: {'#34d399' if confidence >= 0.8 else '#facc15' if confidence >= 0.5 else '#f87171'};">{confidence:.2f}</span>
+                    </p>
+                </div>
+            """
+            st.markdown(html_block, unsafe_allow_html=True)
+        elif st.session_state.product_memory is None:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+
+    # Top USPs
+    with st.expander("✨ Top Praised Features (USPs)", expanded=False):
+        output = None
+        if st.session_state.product_memory is not None:
+            output = memoized_agent_output("usps", "Detect USPs", evaluated("USPDectectorAgent", lambda usp_agent, **options: usp_agent.detect_usps(st.session_state.product_memory, **options)))
+        if output is not None:
+            result, _ = output
+
+            for usp in result['top_usps']:
+                feature = usp['feature']
+                mentions = usp['positive_mentions']
+                justification = usp['justification']
+
+                html_block = f"""
+                    <div style="border-left: 5px solid #4ade80; background-color: #1e1e1e; padding: 0.75rem 1rem; border-radius: 10px; margin-bottom: 0.8rem;">
+                        <h4 style="margin: 0 0 0.2rem 0;">🌟 {feature}</h4>
+                        <p style="margin: 0.2rem 0;"><span style="background-color: #10b98133; color: #10b981; padding: 0.2rem 0.5rem; border-radius: 5px; font-weight: bold;">{mentions} mentions</span></p>
+                        <p style="margin: 0.3rem 0; color: #d1d5db;"><em>“{justification}”</em></p>
+                    </div>
+                """
+                st.markdown(html_block, unsafe_allow_html=True)
+        elif st.session_state.product_memory is None:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+
+    # Top Issues
+    with st.expander("⚠️ Top Complaints (Issues)", expanded=False):
+        output = None
+        if st.session_state.product_memory is not None:
+            output = memoized_agent_output("issues", "Detect issues", evaluated("IssueDetectorAgent", lambda issue_agent, **options: issue_agent.detect_issues(st.session_state.product_memory, **options)))
+        if output is not None:
+            result, _ = output
+
+            for issue in result['top_issues']:
+                feature = issue['feature']
+                mentions = issue['negative_mentions']
+                justification = issue['justification']
+
+                html_block = f"""
+                    <div style="border-left: 5px solid #ef4444; background-color: #2a2a2a; padding: 0.75rem 1rem; border-radius: 10px; margin-bottom: 0.8rem;">
+                        <h4 style="margin: 0 0 0.2rem 0;">🚫 {feature}</h4>
+                        <p style="margin: 0.2rem 0;">
+                            <span style="background-color: #f8717133; color: #f87171; padding: 0.2rem 0.5rem; border-radius: 5px; font-weight: bold;">
+                                {mentions} complaints
+                            </span>
+                        </p>
+                        <p style="margin: 0.3rem 0; color: #fca5a5;"><em>“{justification}”</em></p>
+                    </div>
+                """
+                st.markdown(html_block, unsafe_allow_html=True)
+        elif st.session_state.product_memory is None:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+            
+
+    # Trend Chart
+    with st.expander("📈 Sentiment Trend Over Time", expanded=False):
+        output = None
+        if st.session_state.product_memory is not None:
+            output = memoized_agent_output("trend", "Analyze trend", lambda: agent.cascaded("TrendAnalyzerAgent", lambda trend_agent: trend_agent.analyze_trend(st.session_state.product_memory, "historical")))
+        if output is not None:
+            trend_result, trend_dict, _ = output
+            df_trend, metrics = agent.TrendAnalyzerAgent.compute_trend_metrics(trend_dict)
+
+            # Display chart
+            st.markdown("### 🔄 Sentiment Evolution")
+            agent.TrendAnalyzerAgent.visualize_trend(df_trend, metrics)
+
+            # Display model confidence with color coding
+            confidence = trend_result["model_confidence"]
+            confidence_color = (
+                "#34d399" if confidence >= 0.8 else 
+                "#facc15" if confidence >= 0.5 else 
+                "#f87171"
+            )
+
+            # Card-like summary and confidence report
+            html_block = f"""
+                <div style="background-color: #1e1e1e; border-left: 5px solid #60a5fa;
+                            padding: 1rem 1.2rem; border-radius: 10px; margin-top: 1rem;">
+                    <p style="margin-top: 0.5rem; color: #e5e7eb; line-height: 1.5;">
+                        {trend_result["trend_analysis_report"]}
+                    </p>
+                    <p style="margin: 0; font-size: 0.9rem; color: #9ca3af;">
+                        🤖 <strong>Model Confidence:</strong> 
+                        <span style="color: {confidence_color};">{confidence:.2f}</span>
+                    </p>
+                </div>
+            """
+            st.markdown(html_block, unsafe_allow_html=True)
+        elif st.session_state.product_memory is None:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
+
+    # Recent Processed Reviews
+    with st.expander("🕵️‍♂️ Recent Processed Reviews", expanded=False):
+        if st.session_state.product_memory is not None:
+            recent_reviews = st.session_state.product_memory.get_recent_reviews(n=5)
+            
+            for idx, review in enumerate(recent_reviews, start=1):
+                review_date = review['context']['review_date']
+                sentiment = review['result']['sentiment_category']
+                score = review['result']['sentiment_score']
+                key_drivers = review['result']['key_drivers']
+                justification = review['result']['justification']
+
+                with st.container():
+                    html_block = f"""
+                        <div style="border: 1px solid #444; border-radius: 12px; padding: 1rem; margin-bottom: 1rem; background-color: #1e1e1e;">
+                            <h4 style="margin-bottom: 0.3rem;">📝 Review {idx}</h4>
+                            <p style="margin: 0.2rem 0;"><strong>📅 Date:</strong> {review_date}</p>
+                            <p style="margin: 0.2rem 0;"><strong>🎯 Sentiment:</strong> <span style="color: {'#34c759' if sentiment=='Positive' else '#ff3b30' if sentiment=='Negative' else '#ffd60a'};">{sentiment}</span> (Score: {score:.2f})</p>
+                            <p style="margin: 0.2rem 0;"><strong>🧠 Key Drivers:</strong> {key_drivers}</p>
+                            <p style="margin: 0.2rem 0;"><strong>🔍 Justification:</strong> {justification}</p>
+                        </div>
+                    """
+                    st.markdown(html_block, unsafe_allow_html=True)
+
+        else:
+            st.info("ℹ️ Product memory not available. Please upload a valid dataset.")
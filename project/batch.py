@@ -0,0 +1,163 @@
+# Headless batch analysis of a directory of product review files
+#
+#   python batch.py data/ --output-dir reports/ --workers 4 --requests-per-minute 500
+#
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+import openai
+from Core.rate_limit import SharedRateLimiter, set_rate_limiter
+from Core.telemetry import telemetry
+from analyzer.base import MultiAgent
+from Utils.ingestion import iter_review_chunks
+
+MANIFEST_NAME = "manifest.json"
+
+def init_worker(rate_limiter, api_base):
+    """Pool initializer: installs the shared rate limiter and the API endpoint in a worker process."""
+    set_rate_limiter(rate_limiter)
+    if api_base:
+        openai.api_base = api_base
+
+def report_name(path: str) -> str:
+    """Returns the report file name of a review file."""
+    return os.path.splitext(os.path.basename(path))[0] + ".json"
+
+def product_name_of(path: str) -> str:
+    """Reads the product name from the first row of a review file, for incremental runs."""
+    first = next(iter_review_chunks(path, chunksize=1), None)
+    return str(first["product_name"].iloc[0]) if first is not None and len(first) else ""
+
+def analyze_product(path: str, options: dict) -> dict:
+    """
+    Builds the product memory of one review file, runs the tasks selected for it and writes its JSON
+    report. Returns the manifest entry of the file; failures are reported, not raised, so one bad file
+    does not stop the batch.
+    """
+    start = time.perf_counter()
+    telemetry_mark = telemetry.mark()
+    try:
+        agent = MultiAgent(model=options["model"], memory_dir=options["memory_dir"],
+                           local_tier_threshold=options["local_tier_threshold"], dedup_threshold=options["dedup_threshold"],
+                           escalation_model=options["escalation_model"], escalation_threshold=options["escalation_threshold"],
+                           escalation_rate=options["escalation_rate"])
+        product_memory = agent.load_product_memory(product_name_of(path)) if options["incremental"] else None
+        product_memory, tasks, quality_parameter = agent.create_product_memory_from_stream(
+            path, max_concurrency=options["max_concurrency"], batch_token_budget=options["batch_token_budget"], product_memory=product_memory)
+
+        report = {
+            "product": product_memory.product_name,
+            "source": os.path.basename(path),
+            "tasks": tasks,
+            "quality_parameter": quality_parameter,
+            "local_tier": agent.LocalSentimentTier.summary() if agent.LocalSentimentTier else None,
+            "dedup": agent.dedup_stats
+        }
+        if tasks:
+            overall_sentiment, overall_sentiment_score = agent.SentimentAnalyzerAgent.overall_sentiment(product_memory)
+            report["overall_sentiment"] = {"label": overall_sentiment, "score": overall_sentiment_score}
+            report["summary"], _ = agent.cascaded("ReviewOverviewAgent", lambda overview_agent: overview_agent.create_review_summary(product_memory))
+            if "usps" in tasks:
+                report["usps"], _ = agent.cascaded("USPDectectorAgent", lambda usp_agent: usp_agent.detect_usps(product_memory))
+            if "issues" in tasks:
+                report["issues"], _ = agent.cascaded("IssueDetectorAgent", lambda issue_agent: issue_agent.detect_issues(product_memory))
+            if "trend_analysis" in tasks:
+                report["trend"], _, _ = agent.cascaded("TrendAnalyzerAgent", lambda trend_agent: trend_agent.analyze_trend(product_memory, "historical"))
+            if options["save_memory"]:
+                agent.save_product_memory(product_memory.product_name, product_memory)
+        if agent.escalation_model is not None:
+            report["cascade"] = dict(agent.escalation_budget.summary(), first_tier=options["model"], escalation_model=agent.escalation_model)
+        report["memory"] = product_memory.generate_summary()
+        report["telemetry"] = json.loads(telemetry.to_json(telemetry_mark))
+
+        report_path = os.path.join(options["output_dir"], report_name(path))
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return {"status": "done", "product": product_memory.product_name, "tasks": tasks, "report": report_path,
+                "seconds": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        print(f"Failed to analyze {path}: {str(e)}")
+        return {"status": "failed", "error": str(e), "seconds": round(time.perf_counter() - start, 3)}
+
+def analyze_product_task(task):
+    """`imap_unordered` adapter: analyzes one (path, options) pair and returns (path, manifest entry)."""
+    path, options = task
+    return path, analyze_product(path, options)
+
+def load_manifest(path: str) -> dict:
+    """Returns the manifest at `path`, or an empty one."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """Atomically rewrites the manifest, so an interrupted batch never leaves it half-written."""
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze every product review file in a directory and write JSON reports.")
+    parser.add_argument("data_dir", help="Directory of product review files (*.csv, *.xlsx).")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Products analyzed in parallel.")
+    parser.add_argument("--requests-per-minute", type=float, default=500, help="Global API request rate shared by all workers.")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--escalation-model", default=None, help="Stronger model that re-runs low-confidence results of --model.")
+    parser.add_argument("--escalation-threshold", type=float, default=0.75, help="Model confidence below which results escalate.")
+    parser.add_argument("--escalation-rate", type=float, default=0.1, help="Share of a product's results that may escalate.")
+    parser.add_argument("--max-concurrency", type=int, default=1, help="Sentiment requests in flight per product.")
+    parser.add_argument("--batch-token-budget", type=int, default=None)
+    parser.add_argument("--local-tier-threshold", type=float, default=None)
+    parser.add_argument("--dedup-threshold", type=float, default=None)
+    parser.add_argument("--memory-dir", default=None)
+    parser.add_argument("--save-memory", action="store_true", help="Persist every product memory to the memory store.")
+    parser.add_argument("--incremental", action="store_true", help="Start from the saved memory of each product.")
+    parser.add_argument("--api-base", default=None, help="Alternative API endpoint, e.g. the local stand-in server.")
+    parser.add_argument("--force", action="store_true", help="Re-analyze products the manifest lists as done.")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    paths = sorted(glob.glob(os.path.join(args.data_dir, "*.csv")) + glob.glob(os.path.join(args.data_dir, "*.xlsx")))
+    pending = [path for path in paths if args.force or manifest.get(os.path.basename(path), {}).get("status") != "done"]
+    print(f"{len(paths)} files, {len(paths) - len(pending)} already done, {len(pending)} to analyze")
+    if not pending:
+        return
+
+    options = {
+        "model": args.model,
+        "escalation_model": args.escalation_model,
+        "escalation_threshold": args.escalation_threshold,
+        "escalation_rate": args.escalation_rate,
+        "memory_dir": args.memory_dir,
+        "local_tier_threshold": args.local_tier_threshold,
+        "dedup_threshold": args.dedup_threshold,
+        "max_concurrency": args.max_concurrency,
+        "batch_token_budget": args.batch_token_budget,
+        "save_memory": args.save_memory,
+        "incremental": args.incremental,
+        "output_dir": args.output_dir
+    }
+    # Spawned workers open their own response cache and memory store connections
+    context = multiprocessing.get_context("spawn")
+    rate_limiter = SharedRateLimiter(args.requests_per_minute, context=context)
+    start = time.perf_counter()
+    with context.Pool(min(args.workers, len(pending)), initializer=init_worker, initargs=(rate_limiter, args.api_base)) as pool:
+        for path, entry in pool.imap_unordered(analyze_product_task, [(path, options) for path in pending]):
+            manifest[os.path.basename(path)] = dict(entry, finished_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            save_manifest(manifest_path, manifest)
+            print(f"{entry['status']:>6}  {os.path.basename(path)}  ({entry['seconds']}s)" + (f"  {entry['error']}" if entry["status"] == "failed" else ""))
+
+    failed = [name for name, entry in manifest.items() if entry.get("status") == "failed"]
+    print(f"\nFinished in {time.perf_counter() - start:.1f}s; reports in {args.output_dir}" + (f"; {len(failed)} failed: {', '.join(failed)}" if failed else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Data quality assessment: per-row legacy implementation vs. the columnar assess_data_quality
+#
+#   python -m benchmarks.data_quality --rows 1000000
+#
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from Utils.helpers import assess_data_quality, calculate_days_passed, english_stopwords, tokenize_words
+
+PHRASES = [
+    "battery life is great", "display quality is stunning", "camera struggles in low light",
+    "phone heats up while charging", "value for money", "performance is smooth", "charging is slow",
+    "build quality feels premium", "speaker is too quiet", "software updates are frequent"
+]
+
+def synthetic_reviews(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Returns `rows` reviews shaped like the files in data/, with random dates over four years."""
+    rng = np.random.default_rng(seed)
+    phrases = np.array(PHRASES)
+    reviews = pd.Series(phrases[rng.integers(0, len(PHRASES), rows)]) + " and " + pd.Series(phrases[rng.integers(0, len(PHRASES), rows)]) + "."
+    dates = pd.Timestamp("2016-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, rows), unit="D")
+    return pd.DataFrame({
+        "product_name": "Synthetic Phone",
+        "customer_name": "Customer " + pd.Series(np.arange(rows)).astype(str),
+        "customer_review": reviews,
+        "rating": rng.integers(1, 6, rows),
+        "verified_purchase": rng.random(rows) < 0.9,
+        "review_date": dates.strftime("%d-%m-%Y"),
+        "helpful_votes": rng.integers(0, 50, rows),
+        "total_votes": rng.integers(50, 100, rows),
+        "review_length": reviews.str.len()
+    })
+
+def legacy_assess_data_quality(df: pd.DataFrame):
+    """
+    The previous implementation: per-row strptime, Python max/min and per-token stemming. Tokens and
+    stopwords come from the same helpers as `assess_data_quality` (NLTK data when installed, the built-in
+    fallback otherwise), so both sides do comparable work on machines without NLTK data.
+    """
+    from nltk.stem import PorterStemmer
+    quality_metrics = {}
+    avg_review_len = df['review_length'].mean()
+    quality_metrics['review_length_ratio'] = round(min(avg_review_len/100, 1), 2)
+
+    dates = df['review_date'].apply(lambda x: calculate_days_passed(x))
+    date_range = max(dates) - min(dates)
+    quality_metrics['temporal_spread'] = round(min(date_range/365, 1), 2)
+
+    stemmer = PorterStemmer()
+    all_reviews = " ".join(df['customer_review'].dropna().astype(str).apply(lambda x: x.lower()).tolist())
+    tokens = tokenize_words(all_reviews)
+    stop_words = english_stopwords()
+    filtered_tokens = [stemmer.stem(token) for token in tokens if token.isalpha() and token not in stop_words]
+    quality_metrics['vocab_richness'] = len(set(filtered_tokens))/len(filtered_tokens)
+
+    verified_purchase = df[df['verified_purchase'] == True]
+    quality_metrics['verified_purchase_ratio'] = round(len(verified_purchase)/len(df), 2)
+
+    quality_metrics['rating_mean'] = round(df['rating'].mean(), 2)
+    quality_metrics['rating_std'] = round(df['rating'].std(), 2)
+
+    empty_ratio = df.isnull().sum().sum()/(len(df) * len(df.columns))
+    quality_metrics['review_completeness'] = round((1 - empty_ratio), 2)
+    return quality_metrics
+
+def timed(fn, df):
+    """Returns (result, seconds) of one call."""
+    start = time.perf_counter()
+    result = fn(df)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and columnar data quality assessment.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the current implementation.")
+    args = parser.parse_args()
+
+    df = synthetic_reviews(args.rows)
+    print(f"{args.rows} synthetic reviews")
+    current, current_seconds = timed(assess_data_quality, df)
+    print(f"columnar: {current_seconds:8.2f}s  {current}")
+    if args.skip_legacy:
+        return
+    legacy, legacy_seconds = timed(legacy_assess_data_quality, df)
+    print(f"legacy  : {legacy_seconds:8.2f}s  {legacy}")
+    print(f"speedup : {legacy_seconds / current_seconds:.1f}x, identical metrics: {legacy == current}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Memory per retained review: list-of-dicts history vs. SentimentHistory ring buffer
+#
+#   python -m benchmarks.history_memory --reviews 1000
+#
+import argparse
+import random
+import time
+import tracemalloc
+from sentiment_history import SentimentHistory
+
+DRIVERS = ["battery life", "display quality", "camera", "heating issue", "price", "performance", "charging issues", "build quality"]
+CATEGORIES = ["positive", "negative", "neutral", "mixed"]
+
+def synthetic_review(i: int, rng: random.Random):
+    """Returns a (result, context) pair shaped like the ones ProductMemory.update receives."""
+    result = {
+        "sentiment_category": rng.choice(CATEGORIES),
+        "sentiment_score": round(rng.uniform(-1, 1), 2),
+        "model_confidence": round(rng.uniform(0.5, 1), 2),
+        "key_drivers": rng.sample(DRIVERS, 3),
+        "emotional_intensity": round(rng.random(), 2),
+        "mixed_signals": rng.random() < 0.3,
+        "conflicting_phrases": [],
+        "justification": f"Reviewer {i} comments on {rng.choice(DRIVERS)} and overall value for money.",
+        "trust_tag": rng.choice(["high_trust", "low_trust"]),
+        "persona_adjusted": True,
+        "adjusted_model_confidence": round(rng.uniform(0.5, 1.5), 3),
+        "weightage": 1.0
+    }
+    context = {
+        "verified_purchase": True,
+        "rating": rng.randint(1, 5),
+        "review_length": rng.randint(50, 1500),
+        "helpfulness_helpfulness_ratio": round(rng.random(), 2),
+        "quality_score": 0.8,
+        "base_confidence": 0.8,
+        "persona_mode": "Balanced",
+        "sentiment_trend": "positive",
+        "recent_issues": rng.sample(DRIVERS, 3),
+        "top_usps": rng.sample(DRIVERS, 3),
+        "review_date": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2019",
+        "reviewer_name": f"Customer {i}",
+        "review_fingerprint": f"{rng.getrandbits(160):040x}"
+    }
+    return result, context
+
+def measure_memory(build, reviews):
+    """Returns the bytes still allocated after building a history from freshly generated reviews."""
+    tracemalloc.start()
+    history = build(reviews)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return retained
+
+def measure_time(build, reviews):
+    """Returns the seconds spent appending pre-generated reviews, without tracing overhead."""
+    pregenerated = list(reviews())
+    start = time.perf_counter()
+    build(lambda: iter(pregenerated))
+    return time.perf_counter() - start
+
+def build_list(reviews, capacity):
+    """Legacy layout: a list of {"result", "context"} dicts evicted with pop(0)."""
+    history = []
+    for result, context in reviews():
+        history.append({"result": result, "context": context})
+        if len(history) > capacity:
+            history.pop(0)
+    return history
+
+def build_ring(reviews, capacity):
+    """Column-wise ring buffer."""
+    history = SentimentHistory(capacity)
+    for result, context in reviews():
+        history.append(result, context)
+    return history
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory per retained review of the two history layouts.")
+    parser.add_argument("--reviews", type=int, default=5000, help="Number of reviews appended.")
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args()
+
+    def reviews():
+        rng = random.Random(7)
+        return (synthetic_review(i, rng) for i in range(args.reviews))
+
+    retained = min(args.reviews, args.capacity)
+    layouts = [
+        ("list of dicts", lambda r: build_list(r, args.capacity)),
+        ("SentimentHistory", lambda r: build_ring(r, args.capacity))
+    ]
+    print(f"{args.reviews} reviews appended, {retained} retained")
+    results = []
+    for name, build in layouts:
+        retained_bytes = measure_memory(build, reviews)
+        seconds = measure_time(build, reviews)
+        results.append(retained_bytes)
+        print(f"{name:<17}: {retained_bytes / retained:8.0f} bytes/review  {seconds / args.reviews * 1e6:6.2f} us/append")
+    print(f"reduction        : {1 - results[1] / results[0]:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Cold start time of the analysis stack
+#
+#   python -m benchmarks.startup --runs 10
+#
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["nltk", "matplotlib", "plotly", "scipy", "streamlit"]
+
+def time_import(module: str) -> float:
+    """Returns the wall seconds a fresh interpreter needs to import `module`."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=PROJECT_DIR, check=True)
+    return time.perf_counter() - start
+
+def import_profile(module: str, top: int):
+    """Returns the `top` slowest top-level packages by cumulative import time and the heavy modules loaded."""
+    probe = f"import sys, {module}; print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=PROJECT_DIR,
+                               check=True, capture_output=True, text=True)
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        package = name.split(".")[0]
+        # -X importtime indents nested imports; the outermost entry of a package carries its full cost
+        if name == package or package not in cumulative:
+            cumulative[package] = max(cumulative.get(package, 0), int(parts[1]))
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return slowest, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the analysis stack.")
+    parser.add_argument("--module", default="analyzer.base")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest packages listed.")
+    args = parser.parse_args()
+
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    print(f"import {args.module}: median {statistics.median(timings):.3f}s, min {min(timings):.3f}s over {args.runs} runs")
+
+    slowest, loaded = import_profile(args.module, args.top)
+    print("\nSlowest packages (cumulative import time):")
+    for package, micros in slowest:
+        print(f"  {package:<24} {micros / 1e6:7.3f}s")
+    print(f"\nHeavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# End-to-end throughput benchmark against the local stand-in server
+#
+#   python -m benchmarks.throughput --scale 4 --max-concurrency 16 --latency-mean 0.5
+#
+import argparse
+import glob
+import json
+import os
+import time
+import openai
+import pandas as pd
+from Core.llm_cache import set_cache
+from Core.mock_llm_server import MockLLMBackend, MockLLMServer
+from Core.resilience import get_request_controller
+from analyzer.base import MultiAgent
+
+def percentile(values, q):
+    """Returns the q-th percentile (0-100) of a list using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def scale_up(df: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """Returns `factor` copies of a review dataset with distinct reviewers and review texts."""
+    if factor <= 1:
+        return df
+    copies = []
+    for copy in range(factor):
+        scaled = df.copy()
+        if copy:
+            scaled["customer_name"] = scaled["customer_name"].astype(str) + f" #{copy}"
+            scaled["customer_review"] = scaled["customer_review"].astype(str) + f" (copy {copy})"
+        copies.append(scaled)
+    return pd.concat(copies, ignore_index=True)
+
+def run_product(agent: MultiAgent, df: pd.DataFrame, args) -> dict:
+    """Runs ingestion plus the downstream agents selected for one product and times both phases."""
+    start = time.perf_counter()
+    product_memory, tasks, _ = agent.create_product_memory_and_prioritize_tasks(
+        df, max_concurrency=args.max_concurrency, batch_token_budget=args.batch_token_budget, epoch_size=args.epoch_size)
+    ingestion_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if tasks:
+        agent.SentimentAnalyzerAgent.overall_sentiment(product_memory)
+        agent.ReviewOverviewAgent.create_review_summary(product_memory)
+        if "usps" in tasks:
+            agent.USPDectectorAgent.detect_usps(product_memory)
+        if "issues" in tasks:
+            agent.IssueDetectorAgent.detect_issues(product_memory)
+        if "trend_analysis" in tasks:
+            agent.TrendAnalyzerAgent.analyze_trend(product_memory, "historical")
+    agents_time = time.perf_counter() - start
+
+    return {
+        "product": product_memory.product_name,
+        "reviews": len(df),
+        "tasks": tasks,
+        "ingestion_seconds": round(ingestion_time, 3),
+        "agents_seconds": round(agents_time, 3),
+        "reviews_per_second": round(len(df) / ingestion_time, 2) if tasks and ingestion_time else 0.0,
+        "dedup": agent.dedup_stats
+    }
+
+def summarize(backend: MockLLMBackend, products: list, wall_time: float) -> dict:
+    """Aggregates per-product timings and the stand-in server's request log into one report."""
+    latencies = [request["latency"] for request in backend.requests if request["status"] == 200]
+    total_reviews = sum(product["reviews"] for product in products if product["tasks"])
+    return {
+        "products": products,
+        "wall_seconds": round(wall_time, 3),
+        "reviews": total_reviews,
+        "reviews_per_second": round(total_reviews / wall_time, 2) if wall_time else 0.0,
+        "requests": len(backend.requests),
+        "status_counts": backend.status_counts,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "prompt_tokens": sum(request["prompt_tokens"] for request in backend.requests),
+        "completion_tokens": sum(request["completion_tokens"] for request in backend.requests),
+        "request_controller": get_request_controller().summary() if get_request_controller() else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MultiAgent throughput against the local stand-in LLM server.")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+    parser.add_argument("--scale", type=int, default=1, help="Synthetic scale-up factor applied to every dataset.")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--max-concurrency", type=int, default=1)
+    parser.add_argument("--batch-token-budget", type=int, default=None)
+    parser.add_argument("--epoch-size", type=int, default=None)
+    parser.add_argument("--latency", choices=["constant", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.5)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-interval", type=float, default=0.0)
+    parser.add_argument("--burst-duration", type=float, default=0.0)
+    parser.add_argument("--server-concurrency", type=int, default=0, help="Concurrent requests the stand-in serves before answering 429.")
+    parser.add_argument("--dedup-threshold", type=float, default=None, help="Reuse results of near-duplicate reviews at this similarity.")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the persistent response cache enabled.")
+    parser.add_argument("--output", default=None, help="Optional path of a JSON report.")
+    args = parser.parse_args()
+
+    if not args.use_cache:
+        set_cache(None)
+    backend = MockLLMBackend(args.latency, args.latency_mean, args.latency_spread, args.error_rate, args.burst_interval, args.burst_duration,
+                             max_concurrency=args.server_concurrency)
+    server = MockLLMServer(backend).start()
+    openai.api_key = "sk-local-stand-in"
+    openai.api_base = server.url
+
+    agent = MultiAgent(model=args.model, dedup_threshold=args.dedup_threshold)
+    products = []
+    start = time.perf_counter()
+    try:
+        for path in sorted(glob.glob(os.path.join(args.data_dir, "*.csv"))):
+            df = scale_up(pd.read_csv(path), args.scale)
+            products.append(run_product(agent, df, args))
+    finally:
+        server.stop()
+    report = summarize(backend, products, time.perf_counter() - start)
+
+    for product in report["products"]:
+        print(f"{product['product'][:50]:<50} {product['reviews']:>7} reviews  {product['reviews_per_second']:>8} reviews/s  tasks={product['tasks']}")
+    print(f"\nTotal: {report['reviews']} reviews in {report['wall_seconds']}s ({report['reviews_per_second']} reviews/s)")
+    print(f"Requests: {report['requests']} {report['status_counts']}")
+    print(f"Latency p50/p95/p99: {report['latency_p50']}s / {report['latency_p95']}s / {report['latency_p99']}s")
+    print(f"Tokens: {report['prompt_tokens']} prompt / {report['completion_tokens']} completion")
+    if report["request_controller"]:
+        print(f"Request controller: {report['request_controller']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
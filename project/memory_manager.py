@@ -1,132 +1,351 @@
-# memory_manager.py
-from collections import defaultdict, Counter
-from datetime import datetime
-
-class ProductMemory:
-    """
-    Tracks and analyzes customer sentiment, USPs, and issues for a product over time.
-    Stores sentiment history, monthly trends, and key insights for summary reporting.
-    """
-    def __init__(self, product_name: str):
-        """Initializes memory for a specific product, setting up tracking structures."""
-        self.product_name = product_name
-        self.stats = Counter()
-        self.usps = Counter()
-        self.issues = Counter()
-        self.usp_justification = set()
-        self.issue_justification = set()
-        self.reviewers = set()
-        self.sentiment_history = []
-        self.overall_sentiment = 'unknown'
-        self.overall_sentiment_score = 0.0
-
-        def default_monthly_report():
-            """Returns a default dictionary structure for monthly sentiment reports."""
-            return {
-                'sentiment': Counter(),
-                'score_sum': 0.0,
-                'score_count': 0,
-                'average_sentiment_score': 0.0,
-                'key_drivers': [],
-                'justification': []
-            }
-    
-        self.monthly_report = defaultdict(default_monthly_report)
-        
-    def update(self, result: dict, context: dict) -> None:
-        """Updates memory with a new review result and its associated context."""
-        self.sentiment_history.append({
-            "result": result,
-            "context": context
-        })
-        if len(self.sentiment_history) > 1000:
-            self.sentiment_history.pop(0)
-
-        cat = result.get("sentiment_category", "neutral")
-        score = result['sentiment_score']
-        confidence_score = result.get("model_confidence", 0.0)
-        if confidence_score >= 0.7:
-            self.stats[cat] += 1
-            if context["verified_purchase"]:
-                self.stats[f"verified_{cat}"] += 1
-
-            try:
-                month = datetime.strptime(context["review_date"], "%d-%m-%Y").strftime("%m-%Y")
-                self.monthly_report[month]['sentiment'][cat] += 1
-                self.monthly_report[month]['score_sum'] += score
-                self.monthly_report[month]['score_count'] += 1
-                
-                count = self.monthly_report[month]['score_count']
-                total = self.monthly_report[month]['score_sum']
-                self.monthly_report[month]['average_sentiment_score'] = total / count
-
-                self.monthly_report[month]['key_drivers'].extend(result['key_drivers'])
-                self.monthly_report[month]['justification'].append(result['justification'])
-
-            except Exception as e:
-                print(f"Failed to update in monthly report: {str(e)}")
-                pass
-
-            if cat == 'positive' and result['emotional_intensity'] > 0.7:
-                for usp in result.get("key_drivers", []):
-                    self.usps[usp.lower()] += 1
-                    self.usp_justification.add(result.get('justification', 'No justification provided'))
-
-            if cat == 'negative' and result['emotional_intensity'] > 0.7:
-                for issue in result.get("key_drivers", []):
-                    self.issues[issue.lower()] += 1
-                    self.issue_justification.add(result.get('justification', 'No justification provided'))
-
-            self.reviewers.add(context["reviewer_name"])
-
-    def get_sentiment_trend(self) -> str:
-        """Returns the dominant sentiment trend (positive/negative/neutral) or 'unknown'."""
-        if sum(self.stats.values()) < 10:
-            return "unknown"
-        else:
-            trend = max(self.stats, key=self.stats.get)
-            return trend
-
-    def get_top_usps(self, limit: int = 3) -> list[str]:
-        """Returns the top N unique selling points (USPs) based on frequency."""
-        return [usp for usp, _ in self.usps.most_common(limit)]
-
-    def get_top_issues(self, limit: int = 3) -> list[str]:
-        """Returns the top N issues mentioned in reviews based on frequency."""
-        return [issue for issue, _ in self.issues.most_common(limit)]
-
-    def generate_summary(self) -> dict:
-        """Generates a summary of review sentiment, trends, top USPs/issues, and monthly insights."""
-        total_reviews = len(self.sentiment_history)
-        total_reviews = len(self.sentiment_history)
-        top_usps = self.get_top_usps()
-        top_issues = self.get_top_issues()
-        sentiment_trend = self.get_sentiment_trend()
-
-        monthly_summary = {}
-        for month, report in self.monthly_report.items():
-            monthly_summary[month] = {
-                "sentiment_breakdown": dict(report["sentiment"]),
-                "average_sentiment_score": round(report["average_sentiment_score"], 3),
-                "key_drivers": list(set(report["key_drivers"])),
-                "justifications": report["justification"]
-            }
-
-        return {
-            "product_name": self.product_name,
-            "overall_sentiment_trend": sentiment_trend,
-            "total_reviews_analyzed": total_reviews,
-            "sentiment_distribution": dict(self.stats),
-            "top_usps": top_usps,
-            "top_issues": top_issues,
-            "unique_reviewers_count": len(self.reviewers),
-            "monthly_analysis": monthly_summary
-        }
-
-    def get_recent_reviews(self, n: int = 5) -> list[dict]:
-        """Returns the most recent N sentiment-analyzed reviews."""
-        return self.sentiment_history[-n:]
-
-    def filter_by_sentiment(self, sentiment: str = "negative") -> list[dict]:
-        """Returns all reviews matching a specific sentiment category."""
-        return [entry for entry in self.sentiment_history if entry["result"].get("sentiment_category") == sentiment]
+# memory_manager.py
+from collections import defaultdict, Counter
+from datetime import datetime
+from functools import partial
+from sentiment_history import SentimentHistory
+from Utils.driver_index import DriverIndex
+from Utils.ingestion import StreamingQualityAssessor
+from Utils.period_index import PeriodIndex
+from Utils.sketches import SpaceSaving, Reservoir
+
+DRIVER_SKETCH_SIZE = 50
+JUSTIFICATION_SAMPLE_SIZE = 20
+MONTHLY_TOP_DRIVERS = 10
+
+def default_monthly_report(driver_sketch_size: int = DRIVER_SKETCH_SIZE, justification_sample_size: int = JUSTIFICATION_SAMPLE_SIZE):
+    """
+    Returns a default dictionary structure for monthly sentiment reports. Key drivers are counted in a
+    Space-Saving heavy-hitter sketch and justifications are reservoir-sampled, so a month's report stays
+    bounded however many reviews it absorbs.
+    """
+    return {
+        'sentiment': Counter(),
+        'score_sum': 0.0,
+        'score_count': 0,
+        'average_sentiment_score': 0.0,
+        'key_drivers': SpaceSaving(driver_sketch_size),
+        'justification': Reservoir(justification_sample_size)
+    }
+
+class ProductMemory:
+    """
+    Tracks and analyzes customer sentiment, USPs, and issues for a product over time.
+    Stores sentiment history, monthly trends, and key insights for summary reporting.
+    """
+    def __init__(self, product_name: str, history_capacity: int = 1000, driver_sketch_size: int = DRIVER_SKETCH_SIZE, justification_sample_size: int = JUSTIFICATION_SAMPLE_SIZE):
+        """
+        Initializes memory for a specific product, setting up tracking structures.
+        `history_capacity` bounds how many analyzed reviews are retained in `sentiment_history`.
+        USP and issue drivers are counted per canonical cluster of `usp_index` / `issue_index`.
+        `fingerprints` can be loaded lazily: when `fingerprint_loader` is set, it is called on first access.
+        `quality` holds the running data quality statistics of the reviews ingested into the memory, so an
+        incremental update only assesses its new rows.
+        `version` grows with every update, so outputs derived from the memory can be cached per version.
+        `period_index` keeps the monthly report's counts and score sums in chronological order at day,
+        week and month granularity, for trend spans and range totals.
+        Each month tracks at most `driver_sketch_size` key drivers and a uniform sample of
+        `justification_sample_size` justifications.
+        """
+        self.product_name = product_name
+        self.version = 0
+        self.stats = Counter()
+        self.usps = Counter()
+        self.issues = Counter()
+        self.usp_justification = set()
+        self.issue_justification = set()
+        self.usp_evidence = {}
+        self.issue_evidence = {}
+        self.usp_index = DriverIndex()
+        self.issue_index = DriverIndex()
+        self.reviewers = set()
+        self._fingerprints = set()
+        self.fingerprint_loader = None
+        self.quality = StreamingQualityAssessor()
+        self.sentiment_history = SentimentHistory(history_capacity)
+        self.overall_sentiment = 'unknown'
+        self.overall_sentiment_score = 0.0
+        self.monthly_report = defaultdict(partial(default_monthly_report, driver_sketch_size, justification_sample_size))
+        self.period_index = PeriodIndex()
+        
+    def update(self, result: dict, context: dict) -> None:
+        """Updates memory with a new review result and its associated context."""
+        self.version += 1
+        self.sentiment_history.append(result, context)
+        if context.get("review_fingerprint"):
+            self.fingerprints.add(context["review_fingerprint"])
+
+        cat = result.get("sentiment_category", "neutral")
+        score = result['sentiment_score']
+        confidence_score = result.get("model_confidence", 0.0)
+        if confidence_score >= 0.7:
+            self.stats[cat] += 1
+            if context["verified_purchase"]:
+                self.stats[f"verified_{cat}"] += 1
+
+            try:
+                day = datetime.strptime(context["review_date"], "%d-%m-%Y").date()
+                month = day.strftime("%m-%Y")
+                self.period_index.add(day, cat, score)
+                self.monthly_report[month]['sentiment'][cat] += 1
+                self.monthly_report[month]['score_sum'] += score
+                self.monthly_report[month]['score_count'] += 1
+                
+                count = self.monthly_report[month]['score_count']
+                total = self.monthly_report[month]['score_sum']
+                self.monthly_report[month]['average_sentiment_score'] = total / count
+
+                for driver in dict.fromkeys(str(driver).strip().lower() for driver in result['key_drivers']):
+                    if driver:
+                        self.monthly_report[month]['key_drivers'].add(driver)
+                self.monthly_report[month]['justification'].add(result['justification'])
+
+            except Exception as e:
+                print(f"Failed to update in monthly report: {str(e)}")
+                pass
+
+            if cat == 'positive' and result['emotional_intensity'] > 0.7:
+                drivers = list(dict.fromkeys(self.usp_index.canonical(usp) for usp in result.get("key_drivers", [])))
+                for usp in drivers:
+                    self.usps[usp] += 1
+                    self.usp_justification.add(result.get('justification', 'No justification provided'))
+                self.add_evidence(self.usp_evidence, result, drivers)
+
+            if cat == 'negative' and result['emotional_intensity'] > 0.7:
+                drivers = list(dict.fromkeys(self.issue_index.canonical(issue) for issue in result.get("key_drivers", [])))
+                for issue in drivers:
+                    self.issues[issue] += 1
+                    self.issue_justification.add(result.get('justification', 'No justification provided'))
+                self.add_evidence(self.issue_evidence, result, drivers)
+
+            self.reviewers.add(context["reviewer_name"])
+
+    @staticmethod
+    def add_evidence(evidence: dict, result: dict, drivers: list) -> None:
+        """Records the canonical drivers, peak emotional intensity and repeat count behind a justification."""
+        if not drivers:
+            return
+        justification = result.get('justification', 'No justification provided')
+        meta = evidence.setdefault(justification, {"drivers": [], "intensity": 0.0, "count": 0})
+        meta["count"] += 1
+        meta["intensity"] = max(meta["intensity"], float(result.get("emotional_intensity", 0.0)))
+        for driver in drivers:
+            if driver not in meta["drivers"]:
+                meta["drivers"].append(driver)
+
+    @property
+    def fingerprints(self) -> set:
+        """Returns the fingerprints of every absorbed review, loading them first if they were deferred."""
+        if self.fingerprint_loader is not None:
+            loader, self.fingerprint_loader = self.fingerprint_loader, None
+            self._fingerprints.update(loader() or [])
+        return self._fingerprints
+
+    def has_absorbed(self, fingerprint: str) -> bool:
+        """Returns True if a review with this fingerprint has already been folded into the memory."""
+        return fingerprint in self.fingerprints
+
+    def get_sentiment_trend(self) -> str:
+        """Returns the dominant sentiment trend (positive/negative/neutral) or 'unknown'."""
+        if sum(self.stats.values()) < 10:
+            return "unknown"
+        else:
+            trend = max(self.stats, key=self.stats.get)
+            return trend
+
+    def get_top_usps(self, limit: int = 3) -> list[str]:
+        """Returns the top N unique selling points (USPs) based on frequency."""
+        return [usp for usp, _ in self.usps.most_common(limit)]
+
+    def get_top_issues(self, limit: int = 3) -> list[str]:
+        """Returns the top N issues mentioned in reviews based on frequency."""
+        return [issue for issue, _ in self.issues.most_common(limit)]
+
+    def generate_summary(self) -> dict:
+        """Generates a summary of review sentiment, trends, top USPs/issues, and monthly insights."""
+        total_reviews = len(self.sentiment_history)
+        total_reviews = len(self.sentiment_history)
+        top_usps = self.get_top_usps()
+        top_issues = self.get_top_issues()
+        sentiment_trend = self.get_sentiment_trend()
+
+        monthly_summary = {}
+        months = self.period_index.series["month"]
+        for key in months.keys:
+            month = months.label(key)
+            report = self.monthly_report[month]
+            monthly_summary[month] = {
+                "sentiment_breakdown": dict(report["sentiment"]),
+                "average_sentiment_score": round(report["average_sentiment_score"], 3),
+                "key_drivers": [driver for driver, _ in report["key_drivers"].top(MONTHLY_TOP_DRIVERS, guaranteed=True)],
+                "justifications": list(report["justification"].items)
+            }
+
+        return {
+            "product_name": self.product_name,
+            "overall_sentiment_trend": sentiment_trend,
+            "total_reviews_analyzed": total_reviews,
+            "sentiment_distribution": dict(self.stats),
+            "top_usps": top_usps,
+            "top_issues": top_issues,
+            "unique_reviewers_count": len(self.reviewers),
+            "monthly_analysis": monthly_summary
+        }
+
+    def monthly_digest(self, month: str, top_k: int = MONTHLY_TOP_DRIVERS) -> dict:
+        """Returns a month's sentiment counts, average score, top-k key drivers with guaranteed counts and sampled justifications."""
+        report = self.monthly_report.get(month)
+        if report is None:
+            return {}
+        return {
+            "sentiment": dict(report["sentiment"]),
+            "average_sentiment_score": round(report["average_sentiment_score"], 3),
+            "key_drivers": dict(report["key_drivers"].top(top_k, guaranteed=True)),
+            "justification": list(report["justification"].items)
+        }
+
+    def to_state(self) -> dict:
+        """Returns the aggregates of the memory as JSON-serializable values keyed by aggregate name."""
+        return {
+            "stats": dict(self.stats),
+            "usps": dict(self.usps),
+            "issues": dict(self.issues),
+            "usp_justification": sorted(self.usp_justification),
+            "issue_justification": sorted(self.issue_justification),
+            "usp_evidence": self.usp_evidence,
+            "issue_evidence": self.issue_evidence,
+            "usp_clusters": self.usp_index.to_state(),
+            "issue_clusters": self.issue_index.to_state(),
+            "reviewers": sorted(self.reviewers),
+            "fingerprints": sorted(self.fingerprints),
+            "quality": self.quality.to_state(),
+            "period_index": self.period_index.to_state(),
+            "monthly_report": {
+                month: dict(report, sentiment=dict(report['sentiment']), key_drivers=report['key_drivers'].to_state(),
+                            justification=report['justification'].to_state())
+                for month, report in self.monthly_report.items()
+            },
+            "overall": {
+                "overall_sentiment": self.overall_sentiment,
+                "overall_sentiment_score": self.overall_sentiment_score
+            }
+        }
+
+    @classmethod
+    def from_state(cls, product_name: str, state: dict, history: list = None, history_capacity: int = 1000, **kwargs) -> "ProductMemory":
+        """
+        Rebuilds a memory from `to_state` aggregates and optional history entries. `kwargs` are the sketch
+        sizes of new months; restored months keep the sizes they were saved with.
+        """
+        memory = cls(product_name, history_capacity, **kwargs)
+        memory.stats.update(state.get("stats", {}))
+        memory.usp_index, memory.usps = cls.restore_clusters(state.get("usp_clusters"), state.get("usps", {}))
+        memory.issue_index, memory.issues = cls.restore_clusters(state.get("issue_clusters"), state.get("issues", {}))
+        memory.usp_justification.update(state.get("usp_justification", []))
+        memory.issue_justification.update(state.get("issue_justification", []))
+        memory.usp_evidence.update(state.get("usp_evidence", {}))
+        memory.issue_evidence.update(state.get("issue_evidence", {}))
+        for index, evidence in ((memory.usp_index, memory.usp_evidence), (memory.issue_index, memory.issue_evidence)):
+            for meta in evidence.values():
+                meta["drivers"] = list(dict.fromkeys(index.canonical(driver) for driver in meta["drivers"]))
+        memory.reviewers.update(state.get("reviewers", []))
+        memory.fingerprints.update(state.get("fingerprints", []))
+        if "quality" in state:
+            memory.quality = StreamingQualityAssessor.from_state(state["quality"])
+        for month, report in state.get("monthly_report", {}).items():
+            restored = memory.monthly_report[month]
+            restored.update(report, sentiment=Counter(report.get("sentiment", {})))
+            restored['key_drivers'], restored['justification'] = cls.restore_sketches(
+                report.get("key_drivers"), report.get("justification"), memory.monthly_report.default_factory())
+        if "period_index" in state:
+            memory.period_index = PeriodIndex.from_state(state["period_index"])
+        else:
+            memory.period_index = PeriodIndex.from_monthly_report(state.get("monthly_report", {}))
+        overall = state.get("overall", {})
+        memory.overall_sentiment = overall.get("overall_sentiment", memory.overall_sentiment)
+        memory.overall_sentiment_score = overall.get("overall_sentiment_score", memory.overall_sentiment_score)
+        for entry in history or []:
+            memory.sentiment_history.append(entry["result"], entry["context"])
+        return memory
+
+    @staticmethod
+    def restore_clusters(cluster_state: dict, counts: dict):
+        """
+        Rebuilds a driver index and its counter. Memories saved before drivers were clustered have raw
+        phrases as keys; those are replayed most frequent first, so the common phrasing labels each cluster.
+        """
+        if cluster_state is not None:
+            return DriverIndex.from_state(cluster_state), Counter(counts)
+        index, clustered = DriverIndex(), Counter()
+        for driver, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+            clustered[index.canonical(driver)] += count
+        return index, clustered
+
+    @staticmethod
+    def restore_sketches(drivers, justifications, default: dict):
+        """
+        Rebuilds a month's driver sketch and justification sample. Memories saved before the sketches
+        existed hold plain lists; those are replayed into the sketches of `default`, an empty monthly report.
+        """
+        if isinstance(drivers, dict):
+            sketch = SpaceSaving.from_state(drivers)
+        else:
+            sketch = default['key_drivers']
+            for driver in drivers or []:
+                if str(driver).strip():
+                    sketch.add(str(driver).strip().lower())
+        if isinstance(justifications, dict):
+            sample = Reservoir.from_state(justifications)
+        else:
+            sample = default['justification']
+            for justification in justifications or []:
+                sample.add(justification)
+        return sketch, sample
+
+    def snapshot(self, top_k: int = 10) -> "MemorySnapshot":
+        """Returns an immutable snapshot of the trend and top USPs/issues used to build review contexts."""
+        return MemorySnapshot(
+            product_name=self.product_name,
+            sentiment_trend=self.get_sentiment_trend(),
+            top_issues=self.get_top_issues(limit=top_k),
+            top_usps=self.get_top_usps(limit=top_k),
+            reviews_absorbed=len(self.sentiment_history)
+        )
+
+    def get_recent_reviews(self, n: int = 5) -> list[dict]:
+        """Returns the most recent N sentiment-analyzed reviews."""
+        return self.sentiment_history[-n:]
+
+    def filter_by_sentiment(self, sentiment: str = "negative") -> list[dict]:
+        """Returns all reviews matching a specific sentiment category."""
+        return [entry for entry in self.sentiment_history if entry["result"].get("sentiment_category") == sentiment]
+
+class MemorySnapshot:
+    """
+    Immutable view of the ProductMemory state that `build_context` reads.
+    All reviews of an ingestion epoch are contextualized against the same snapshot, so they no longer
+    depend on each other and can be analyzed in parallel.
+    """
+    __slots__ = ("product_name", "sentiment_trend", "top_issues", "top_usps", "reviews_absorbed")
+
+    def __init__(self, product_name: str, sentiment_trend: str, top_issues: list, top_usps: list, reviews_absorbed: int):
+        """Freezes the given memory state."""
+        object.__setattr__(self, "product_name", product_name)
+        object.__setattr__(self, "sentiment_trend", sentiment_trend)
+        object.__setattr__(self, "top_issues", tuple(top_issues))
+        object.__setattr__(self, "top_usps", tuple(top_usps))
+        object.__setattr__(self, "reviews_absorbed", reviews_absorbed)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MemorySnapshot is immutable")
+
+    def get_sentiment_trend(self) -> str:
+        """Returns the dominant sentiment trend at snapshot time."""
+        return self.sentiment_trend
+
+    def get_top_usps(self, limit: int = 3) -> list[str]:
+        """Returns the top N USPs at snapshot time."""
+        return list(self.top_usps[:limit])
+
+    def get_top_issues(self, limit: int = 3) -> list[str]:
+        """Returns the top N issues at snapshot time."""
+        return list(self.top_issues[:limit])
@@ -0,0 +1,147 @@
+# memory_store.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from urllib.request import pathname2url
+from memory_manager import ProductMemory
+
+SCHEMA_VERSION = 1
+DEFAULT_MEMORY_DIR = os.environ.get(
+    "REVIEW_ANALYZER_MEMORY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "memory")
+)
+
+def _to_json(value) -> str:
+    """Serializes a value, unwrapping numpy scalars that pandas rows leave in review contexts."""
+    return json.dumps(value, ensure_ascii=False, default=lambda obj: obj.item() if hasattr(obj, "item") else str(obj))
+
+class ProductMemoryStore:
+    """
+    Versioned on-disk store of ProductMemory objects with one SQLite file per product under `root_dir`.
+    Every aggregate (stats, usps, issues, monthly_report, ...) is a separate row that can be read on its own,
+    and per-review history lives in its own table, so opening a product never deserializes the history
+    unless asked to. Reads use read-only connections and the database runs in WAL mode, so readers never
+    take the write path or wait for a save in progress.
+    """
+    def __init__(self, root_dir: str = None):
+        """Uses `root_dir`, or REVIEW_ANALYZER_MEMORY_DIR / data/memory by default."""
+        self.root_dir = root_dir or DEFAULT_MEMORY_DIR
+
+    def path(self, product_name: str) -> str:
+        """Returns the database file of a product; names are slugged and suffixed with a short hash."""
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", product_name).strip("_")[:80]
+        digest = hashlib.sha1(product_name.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.root_dir, f"{slug}-{digest}.sqlite")
+
+    def exists(self, product_name: str) -> bool:
+        """Returns True if a memory has been saved for the product."""
+        return os.path.exists(self.path(product_name))
+
+    def _connect(self, product_name: str, create: bool = False):
+        """
+        Opens a product database and checks its version. With `create` the connection is writable and
+        creates the schema; otherwise it is read-only.
+        """
+        path = self.path(product_name)
+        if not create:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No saved memory for product '{product_name}' in {self.root_dir}")
+            conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+            return self._check_version(conn, path)
+        os.makedirs(self.root_dir, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS aggregates (name TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS history (seq INTEGER PRIMARY KEY, result TEXT NOT NULL, context TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('product_name', ?)", (product_name,))
+        return self._check_version(conn, path)
+
+    @staticmethod
+    def _check_version(conn, path: str):
+        """Returns the connection if its schema version is current; closes it and raises otherwise."""
+        version = int(conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0])
+        if version != SCHEMA_VERSION:
+            conn.close()
+            raise ValueError(f"Memory store {path} has schema version {version}, expected {SCHEMA_VERSION}")
+        return conn
+
+    def save(self, product_memory: ProductMemory) -> str:
+        """Writes all aggregates and the retained history of a memory in one transaction; returns the file path."""
+        conn = self._connect(product_memory.product_name, create=True)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO aggregates (name, payload) VALUES (?, ?)",
+                    [(name, _to_json(value)) for name, value in product_memory.to_state().items()]
+                )
+                conn.execute("DELETE FROM history")
+                conn.executemany(
+                    "INSERT INTO history (seq, result, context) VALUES (?, ?, ?)",
+                    [(seq, _to_json(entry["result"]), _to_json(entry["context"])) for seq, entry in enumerate(product_memory.sentiment_history)]
+                )
+        finally:
+            conn.close()
+        return self.path(product_memory.product_name)
+
+    def load_aggregate(self, product_name: str, name: str):
+        """Returns one aggregate (e.g. "stats" or "monthly_report") without touching the rest of the memory."""
+        conn = self._connect(product_name)
+        try:
+            row = conn.execute("SELECT payload FROM aggregates WHERE name = ?", (name,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def load_history(self, product_name: str, limit: int = None) -> list[dict]:
+        """Returns retained history entries in insertion order, optionally only the most recent `limit`."""
+        conn = self._connect(product_name)
+        try:
+            if limit is None:
+                rows = conn.execute("SELECT result, context FROM history ORDER BY seq").fetchall()
+            else:
+                rows = conn.execute("SELECT result, context FROM history ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()[::-1]
+        finally:
+            conn.close()
+        return [{"result": json.loads(result), "context": json.loads(context)} for result, context in rows]
+
+    def load(self, product_name: str, with_history: bool = False, history_capacity: int = 1000) -> ProductMemory:
+        """
+        Rebuilds a ProductMemory from its aggregates. History is only read when `with_history` is set;
+        it is needed to continue ingesting into the memory or to recompute the overall sentiment.
+        Review fingerprints are read with the history; otherwise the memory fetches them through
+        `load_aggregate` the first time they are accessed.
+        """
+        conn = self._connect(product_name)
+        try:
+            query = "SELECT name, payload FROM aggregates" + ("" if with_history else " WHERE name != 'fingerprints'")
+            state = {name: json.loads(payload) for name, payload in conn.execute(query)}
+        finally:
+            conn.close()
+        history = self.load_history(product_name) if with_history else None
+        memory = ProductMemory.from_state(product_name, state, history, history_capacity)
+        if not with_history:
+            memory.fingerprint_loader = lambda: self.load_aggregate(product_name, "fingerprints")
+        return memory
+
+    def list_products(self) -> list[str]:
+        """Returns the names of all products saved under the root directory."""
+        if not os.path.isdir(self.root_dir):
+            return []
+        products = []
+        for filename in sorted(os.listdir(self.root_dir)):
+            if filename.endswith(".sqlite"):
+                conn = sqlite3.connect(os.path.join(self.root_dir, filename))
+                try:
+                    row = conn.execute("SELECT value FROM meta WHERE key = 'product_name'").fetchone()
+                except sqlite3.DatabaseError:
+                    row = None
+                finally:
+                    conn.close()
+                if row:
+                    products.append(row[0])
+        return products
@@ -0,0 +1,122 @@
+# sentiment_history.py
+import sys
+from array import array
+
+RESULT_FLOATS = ("sentiment_score", "model_confidence", "emotional_intensity", "adjusted_model_confidence", "weightage")
+RESULT_FLAGS = ("mixed_signals", "persona_adjusted")
+RESULT_LABELS = ("sentiment_category", "trust_tag")
+RESULT_PHRASES = ("key_drivers", "conflicting_phrases")
+CONTEXT_FLOATS = ("helpfulness_helpfulness_ratio", "quality_score", "base_confidence")
+CONTEXT_INTS = ("rating", "review_length")
+CONTEXT_LABELS = ("persona_mode", "sentiment_trend", "review_date")
+RESULT_FIELDS = set(RESULT_FLOATS + RESULT_FLAGS + RESULT_LABELS + RESULT_PHRASES + ("justification",))
+
+def _intern(value):
+    """Interns short categorical strings so repeated labels share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class SentimentHistory:
+    """
+    Fixed-capacity ring buffer of analyzed reviews stored column-wise.
+    Numeric fields live in typed arrays, categorical strings and key drivers are interned, and the
+    per-review copies of memory context (recent issues, top USPs) are not retained. Appending past
+    capacity overwrites the oldest record in O(1). Reading yields {"result": ..., "context": ...}
+    entries in insertion order, matching the list of dicts it replaces.
+    """
+    def __init__(self, capacity: int = 1000):
+        """Preallocates storage for `capacity` records."""
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._floats = {field: array("d", bytes(8 * capacity)) for field in RESULT_FLOATS + CONTEXT_FLOATS}
+        self._flags = {field: array("b", bytes(capacity)) for field in RESULT_FLAGS + ("verified_purchase",)}
+        self._ints = {field: array("q", bytes(8 * capacity)) for field in CONTEXT_INTS}
+        self._objects = {field: [None] * capacity for field in RESULT_LABELS + RESULT_PHRASES + CONTEXT_LABELS + ("justification", "reviewer_name", "extra")}
+        self._result_floats = [(field, self._floats[field]) for field in RESULT_FLOATS]
+        self._result_flags = [(field, self._flags[field]) for field in RESULT_FLAGS]
+        self._result_labels = [(field, self._objects[field]) for field in RESULT_LABELS]
+        self._result_phrases = [(field, self._objects[field]) for field in RESULT_PHRASES]
+        self._context_floats = [(field, self._floats[field]) for field in CONTEXT_FLOATS]
+        self._context_ints = [(field, self._ints[field]) for field in CONTEXT_INTS]
+        self._context_labels = [(field, self._objects[field]) for field in CONTEXT_LABELS]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, result: dict, context: dict) -> None:
+        """Stores one review result and its context, evicting the oldest record when full."""
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        for field, column in self._result_floats:
+            column[slot] = float(result.get(field, 0.0) or 0.0)
+        for field, column in self._result_flags:
+            column[slot] = bool(result.get(field, False))
+        for field, column in self._result_labels:
+            column[slot] = _intern(result.get(field, ""))
+        for field, column in self._result_phrases:
+            column[slot] = tuple(map(_intern, result.get(field) or ()))
+        self._objects["justification"][slot] = result.get("justification", "")
+        extra = None
+        if not RESULT_FIELDS.issuperset(result):
+            extra = {key: value for key, value in result.items() if key not in RESULT_FIELDS}
+        self._objects["extra"][slot] = extra
+
+        for field, column in self._context_floats:
+            column[slot] = float(context.get(field, 0.0) or 0.0)
+        for field, column in self._context_ints:
+            column[slot] = int(context.get(field, 0) or 0)
+        for field, column in self._context_labels:
+            column[slot] = _intern(context.get(field, "unknown"))
+        self._flags["verified_purchase"][slot] = bool(context.get("verified_purchase", False))
+        self._objects["reviewer_name"][slot] = context.get("reviewer_name", "")
+
+    def _entry(self, slot: int) -> dict:
+        """Rebuilds the {"result", "context"} view of one slot."""
+        result = {field: self._floats[field][slot] for field in RESULT_FLOATS}
+        result.update({field: bool(self._flags[field][slot]) for field in RESULT_FLAGS})
+        result.update({field: self._objects[field][slot] for field in RESULT_LABELS})
+        result.update({field: list(self._objects[field][slot]) for field in RESULT_PHRASES})
+        result["justification"] = self._objects["justification"][slot]
+        if self._objects["extra"][slot]:
+            result.update(self._objects["extra"][slot])
+
+        context = {field: self._floats[field][slot] for field in CONTEXT_FLOATS}
+        context.update({field: self._ints[field][slot] for field in CONTEXT_INTS})
+        context.update({field: self._objects[field][slot] for field in CONTEXT_LABELS})
+        context["verified_purchase"] = bool(self._flags["verified_purchase"][slot])
+        context["reviewer_name"] = self._objects["reviewer_name"][slot]
+        return {"result": result, "context": context}
+
+    def __iter__(self):
+        for offset in range(self._size):
+            yield self._entry((self._start + offset) % self.capacity)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry((self._start + offset) % self.capacity) for offset in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("history index out of range")
+        return self._entry((self._start + index) % self.capacity)
+
+    def column(self, field: str) -> list:
+        """Returns one stored result/context field for all retained records, oldest first."""
+        store = self._floats.get(field) or self._ints.get(field) or self._flags.get(field)
+        if store is None:
+            store = self._objects[field]
+        return [store[(self._start + offset) % self.capacity] for offset in range(self._size)]
+
+    def clear(self) -> None:
+        """Drops all records while keeping the allocated storage."""
+        self._start = 0
+        self._size = 0
+        for column in self._objects.values():
+            column[:] = [None] * self.capacity
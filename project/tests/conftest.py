@@ -0,0 +1,5 @@
+# Makes the project modules importable as in the app (e.g. `from analyzer.base import MultiAgent`)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
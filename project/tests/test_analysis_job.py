@@ -0,0 +1,43 @@
+# Background analysis jobs on a shared agent
+import csv
+import time
+from analyzer.base import MultiAgent
+from Core.analysis_job import AnalysisJob
+
+HEADER = ["product_name", "brand_name", "customer_name", "verified_purchase", "rating", "customer_review",
+          "helpful_votes", "review_date", "total_votes", "review_length"]
+
+def slow_classify(review, context):
+    """Stands in for the sentiment LLM, slowly enough for a job to be cancelled mid-run."""
+    time.sleep(0.01)
+    return {"sentiment_category": "positive", "sentiment_score": 0.8, "model_confidence": 0.9, "key_drivers": [],
+            "emotional_intensity": 0.5, "justification": "", "persona_adjusted": True}
+
+def write_reviews(path, count):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(count):
+            text = f"Review number {i} says the phone works well"
+            writer.writerow(["Phone", "Brand", f"customer {i}", True, 5, text, 1, f"{1 + i % 28:02d}-01-2020", 2, len(text)])
+
+def test_jobs_run_on_their_own_workers(tmp_path):
+    path = tmp_path / "reviews.csv"
+    write_reviews(path, 60)
+    agent = MultiAgent("test-model", local_tier_threshold=0.99)
+    agent.SentimentAnalyzerAgent.adaptive_sentiment_analysis = slow_classify
+
+    first = AnalysisJob(agent, str(path)).start()
+    while first.done == 0 and first.is_running():
+        time.sleep(0.005)
+    second = AnalysisJob(agent, str(path)).start()
+    first.cancel()
+    first.join(10)
+    second.join(10)
+
+    assert agent.job is None
+    assert first.agent is not agent and second.agent is not agent and first.agent is not second.agent
+    assert first.status == "cancelled" and first.done < 60
+    assert second.status == "done" and second.done == second.total == 60
+    assert second.agent.LocalSentimentTier.summary()["reviews"] == 60
+    assert agent.LocalSentimentTier.summary()["reviews"] == 0
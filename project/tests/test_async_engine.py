@@ -0,0 +1,52 @@
+# Concurrent review engine (MultiAgent.process_reviews_async)
+import asyncio
+from analyzer.base import MultiAgent
+from memory_manager import ProductMemory
+
+def review_rows(count):
+    for i in range(count):
+        yield {"customer_review": f"review {i}", "verified_purchase": True, "rating": 5, "review_length": 200, "helpful_votes": 1,
+               "total_votes": 2, "review_date": f"{1 + i % 28:02d}-{1 + i % 12:02d}-2020", "customer_name": f"customer {i}"}
+
+def classify(review, context):
+    """Stands in for the sentiment LLM."""
+    negative = int(review.split()[1]) % 3 == 0
+    return {"sentiment_category": "negative" if negative else "positive", "sentiment_score": -0.7 if negative else 0.8,
+            "model_confidence": 0.9, "key_drivers": ["battery"], "emotional_intensity": 0.9, "justification": review, "persona_adjusted": True}
+
+def engine(delays):
+    """Returns an agent whose async sentiment calls take `delays(i)` seconds, and the order they finish in."""
+    agent = MultiAgent("test-model")
+    finished, in_flight, peak = [], [0], [0]
+
+    async def analyze(review, context):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(delays(int(review.split()[1])))
+        in_flight[0] -= 1
+        finished.append(int(review.split()[1]))
+        return classify(review, context)
+
+    agent.SentimentAnalyzerAgent.adaptive_sentiment_analysis = classify
+    agent.SentimentAnalyzerAgent.adaptive_sentiment_analysis_async = analyze
+    return agent, finished, peak
+
+def test_slow_request_does_not_hold_back_the_window():
+    agent, finished, peak = engine(lambda i: 0.3 if i == 0 else 0.005)
+    memory = ProductMemory("Phone")
+    asyncio.run(agent.process_reviews_async(agent.review_units(review_rows(40)), memory, max_concurrency=4))
+
+    assert finished[-1] == 0
+    assert peak[0] == 4
+    assert [entry["result"]["justification"] for entry in memory.sentiment_history] == [f"review {i}" for i in range(40)]
+
+def test_results_match_the_serial_engine_with_and_without_epochs():
+    serial, _, _ = engine(lambda i: 0.0)
+    expected = ProductMemory("Phone")
+    serial.process_reviews(serial.review_units(review_rows(60)), expected)
+    for epoch_size in (None, 8):
+        agent, _, _ = engine(lambda i: 0.001 * (i % 5))
+        memory = ProductMemory("Phone")
+        asyncio.run(agent.process_reviews_async(agent.review_units(review_rows(60)), memory, max_concurrency=6, epoch_size=epoch_size))
+        assert memory.stats == expected.stats
+        assert memory.usps == expected.usps and memory.issues == expected.issues
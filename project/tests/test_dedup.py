@@ -0,0 +1,46 @@
+# Near-duplicate detection with the MinHash/LSH index and result sharing between duplicates
+import asyncio
+from collections import Counter
+from Utils.dedup import NearDuplicateIndex, SharedResults
+
+BASE = "the battery easily lasts two full days and the display stays bright and sharp in direct sunlight"
+
+def test_exact_and_near_duplicates_map_to_first_review():
+    index = NearDuplicateIndex(threshold=0.5)
+    reviews = [BASE, "Camera struggles in low light and the phone heats up while charging", BASE,
+               BASE + " overall", "The BATTERY easily lasts two full days and the display stays bright and sharp in direct sunlight!"]
+    assert index.add_many(reviews) == [0, 1, 0, 0, 0]
+    assert len(index) == 5
+    assert index.duplicate_counts() == Counter({0: 3})
+
+def test_unrelated_reviews_are_their_own_representatives():
+    index = NearDuplicateIndex(threshold=0.8)
+    reviews = [f"review {i} about {topic} and nothing else" for i, topic in enumerate(["price", "speaker", "signal", "design"])]
+    reviews += ["", "ok"]
+    assert index.add_many(reviews) == list(range(6))
+
+def test_blocks_and_later_calls_share_one_index():
+    index = NearDuplicateIndex(threshold=0.8, block_size=2)
+    first = index.add_many(["alpha beta gamma delta", "one two three four", "alpha beta gamma delta"])
+    second = index.add_many(["one two three four", "five six seven eight"])
+    assert first + second == [0, 1, 0, 1, 4]
+
+def test_shared_results_hand_copies_to_duplicates():
+    shared = SharedResults(Counter({0: 2}))
+    representative, duplicate = {"row_index": 0, "representative": 0}, {"row_index": 3, "representative": 0}
+    assert not shared.is_duplicate(representative) and shared.is_duplicate(duplicate)
+    shared.publish(representative, {"key_drivers": ["battery"]})
+    first = shared.take(duplicate)
+    first["key_drivers"].append("mutated")
+    assert shared.take(duplicate) == {"key_drivers": ["battery"]}
+    assert shared.results == {} and shared.reused == 2
+
+def test_async_duplicate_waits_for_representative_in_flight():
+    async def run():
+        shared = SharedResults(Counter({0: 1}))
+        waiting = asyncio.ensure_future(shared.take_async({"row_index": 1, "representative": 0}))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        shared.publish({"row_index": 0}, {"sentiment_category": "positive"})
+        return await waiting
+    assert asyncio.run(run()) == {"sentiment_category": "positive"}
@@ -0,0 +1,41 @@
+# Clustering of key-driver phrases (DriverIndex)
+import pytest
+from Utils.driver_index import DriverIndex
+
+@pytest.mark.parametrize("label, variant", [
+    ("battery life", "Battery Life"),
+    ("battery life", "batteries life"),
+    ("battery life", "good battery life"),
+    ("battery life", "long battery life"),
+    ("camera", "camera quality"),
+    ("speakers", "speaker"),
+    ("heating issue", "heating issues"),
+])
+def test_variants_join_the_existing_cluster(label, variant):
+    index = DriverIndex()
+    assert index.canonical(label) == label
+    assert index.canonical(variant) == label
+
+@pytest.mark.parametrize("label, other", [
+    ("phone price", "phone heating"),
+    ("battery life", "screen life"),
+    ("fast charging", "fast performance"),
+    ("fast charging", "charging port"),
+    ("value for money", "money wasted"),
+    ("customer service", "service center"),
+    ("display quality", "camera quality"),
+])
+def test_phrases_sharing_one_content_token_stay_apart(label, other):
+    index = DriverIndex()
+    index.canonical(label)
+    assert index.canonical(other) == other
+    assert len(index) == 2
+
+def test_state_round_trip_keeps_clusters_and_aliases():
+    index = DriverIndex()
+    for phrase in ("battery life", "good battery life", "screen life", "camera"):
+        index.canonical(phrase)
+    restored = DriverIndex.from_state(index.to_state())
+    assert restored.labels == index.labels
+    assert restored.canonical("good battery life") == "battery life"
+    assert restored.canonical("camera quality") == "camera"
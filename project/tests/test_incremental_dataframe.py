@@ -0,0 +1,59 @@
+# Incremental DataFrame ingestion against an existing memory, with LLM calls replaced by a fixed classifier
+import pandas as pd
+import Utils.ingestion as ingestion
+from analyzer.base import MultiAgent
+from memory_manager import ProductMemory
+from Utils.helpers import assess_data_quality, review_fingerprint
+
+PRAISE = "Great phone with a bright display and the battery easily lasts two days of heavy use"
+COMPLAINT = "Terrible phone the screen cracked after a week and support never answered my emails at all"
+
+def classify(review, context):
+    """Stands in for the sentiment LLM: complaints are negative, everything else positive."""
+    negative = review.startswith("Terrible")
+    return {"sentiment_category": "negative" if negative else "positive", "sentiment_score": -0.8 if negative else 0.8,
+            "model_confidence": 0.9, "key_drivers": [], "emotional_intensity": 0.5, "justification": "", "persona_adjusted": True}
+
+def reviews(rows) -> pd.DataFrame:
+    """Returns a review DataFrame with one row per (customer_name, customer_review, day)."""
+    return pd.DataFrame([
+        {"product_name": "Phone", "brand_name": "Brand", "customer_name": name, "verified_purchase": True, "rating": rating,
+         "customer_review": text, "helpful_votes": 1, "review_date": f"{day:02d}-01-2020", "total_votes": 2, "review_length": len(text)}
+        for name, text, day, rating in rows
+    ])
+
+def make_agent() -> MultiAgent:
+    agent = MultiAgent("test-model", dedup_threshold=0.5)
+    agent.SentimentAnalyzerAgent.adaptive_sentiment_analysis = classify
+    agent.SentimentAnalyzerAgent.batch_sentiment_analysis = lambda reviews, contexts: [classify(r, c) for r, c in zip(reviews, contexts)]
+    return agent
+
+def test_absorbed_reviews_and_exact_repeats_are_skipped():
+    memory = ProductMemory("Phone")
+    memory.fingerprints.add(review_fingerprint({"customer_review": "Old review", "customer_name": "old", "review_date": "01-01-2020"}))
+    data = reviews([("old", "Old review", 1, 5), ("x", PRAISE, 2, 5), ("x", PRAISE, 2, 5), ("y", COMPLAINT, 3, 1), ("z", COMPLAINT + " really", 4, 1)])
+
+    agent = make_agent()
+    memory, tasks, _ = agent.create_product_memory_and_prioritize_tasks(data, product_memory=memory)
+
+    assert tasks
+    assert memory.stats["positive"] == 1
+    assert memory.stats["negative"] == 2
+    assert agent.dedup_stats == {"reviews": 3, "llm_calls_saved": 1}
+
+def test_update_assesses_only_new_rows(monkeypatch):
+    first = reviews([("a", PRAISE, 1, 5), ("b", COMPLAINT, 20, 1), ("c", PRAISE + " indeed", 3, 4)])
+    second = reviews([("d", COMPLAINT + " again", 25, 2), ("e", PRAISE + " so far", 28, 5)])
+    agent = make_agent()
+    memory, _, _ = agent.create_product_memory_and_prioritize_tasks(first)
+
+    assessed = []
+    review_stems = ingestion.review_stems
+    monkeypatch.setattr(ingestion, "review_stems", lambda series: assessed.append(len(series)) or review_stems(series))
+    memory, tasks, quality_parameter = make_agent().create_product_memory_and_prioritize_tasks(pd.concat([first, second]), product_memory=memory)
+
+    assert assessed == [2]
+    assert tasks
+    assert memory.quality.rows == 5
+    assert quality_parameter == assess_data_quality(pd.concat([first, second]))
+    assert ProductMemory.from_state("Phone", memory.to_state()).quality.result() == quality_parameter
@@ -0,0 +1,40 @@
+# Incremental streaming ingestion against an existing memory, with LLM calls replaced by a fixed classifier
+import csv
+from analyzer.base import MultiAgent
+from memory_manager import ProductMemory
+from Utils.helpers import review_fingerprint
+
+HEADER = ["product_name", "brand_name", "customer_name", "verified_purchase", "rating", "customer_review",
+          "helpful_votes", "review_date", "total_votes", "review_length"]
+OLD = "Old review that is already in the memory of this phone"
+PRAISE = "Great phone with a bright display and the battery easily lasts two days of heavy use"
+COMPLAINT = "Terrible phone the screen cracked after a week and support never answered my emails at all"
+
+def classify(review, context):
+    """Stands in for the sentiment LLM: complaints are negative, everything else positive."""
+    negative = review.startswith("Terrible")
+    return {"sentiment_category": "negative" if negative else "positive", "sentiment_score": -0.8 if negative else 0.8,
+            "model_confidence": 0.9, "key_drivers": [], "emotional_intensity": 0.5, "justification": "", "persona_adjusted": True}
+
+def write_reviews(path, reviews):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for name, text, day in reviews:
+            writer.writerow(["Phone", "Brand", name, True, 5, text, 1, f"{day:02d}-01-2020", 2, len(text)])
+
+def test_exact_repeat_in_file_keeps_duplicate_representatives_aligned(tmp_path):
+    path = tmp_path / "reviews.csv"
+    write_reviews(path, [("old", OLD, 1), ("x", PRAISE, 2), ("x", PRAISE, 2), ("y", COMPLAINT, 3), ("z", COMPLAINT + " really", 4)])
+    memory = ProductMemory("Phone")
+    memory.fingerprints.add(review_fingerprint({"customer_review": OLD, "customer_name": "old", "review_date": "01-01-2020"}))
+
+    agent = MultiAgent("test-model", dedup_threshold=0.5)
+    agent.SentimentAnalyzerAgent.adaptive_sentiment_analysis = classify
+    agent.SentimentAnalyzerAgent.batch_sentiment_analysis = lambda reviews, contexts: [classify(r, c) for r, c in zip(reviews, contexts)]
+    memory, tasks, _ = agent.create_product_memory_from_stream(str(path), chunksize=2, product_memory=memory)
+
+    assert tasks
+    assert memory.stats["positive"] == 1
+    assert memory.stats["negative"] == 2
+    assert agent.dedup_stats == {"reviews": 3, "llm_calls_saved": 1}
@@ -0,0 +1,84 @@
+# Persistent LLM response cache (LLMResponseCache) and its use in the model runner
+import asyncio
+import threading
+import openai
+import pytest
+from Core import llm_cache, model_runner
+from Core.llm_cache import LLMResponseCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh cache installed as the process-wide one for the duration of a test."""
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    monkeypatch.setattr(llm_cache, "_cache_disabled", False)
+    return cache
+
+@pytest.fixture
+def api(monkeypatch):
+    """Replaces the chat completion endpoint with one that numbers its answers."""
+    calls = []
+    def answer(**kwargs):
+        calls.append(kwargs)
+        return {"choices": [{"message": {"content": f"answer {len(calls)}"}}], "usage": {}}
+    async def answer_async(**kwargs):
+        return answer(**kwargs)
+    monkeypatch.setattr(openai.ChatCompletion, "create", answer)
+    monkeypatch.setattr(openai.ChatCompletion, "acreate", answer_async)
+    return calls
+
+def test_key_covers_every_request_parameter():
+    base = LLMResponseCache.make_key("m", 0.2, "system", "prompt", 1000)
+    assert base == LLMResponseCache.make_key("m", 0.2, "system", "prompt", 1000)
+    for other in (("n", 0.2, "system", "prompt", 1000), ("m", 0.3, "system", "prompt", 1000),
+                  ("m", 0.2, "other", "prompt", 1000), ("m", 0.2, "system", "other", 1000), ("m", 0.2, "system", "prompt", 200)):
+        assert LLMResponseCache.make_key(*other) != base
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache.set("key", "m", "response")
+    assert cache.get("key") == "response"
+    now[0] += 11
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set(key, "m", key)
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", "m", "c")
+    assert cache.get("a") == "a" and cache.get("b") is None and cache.get("c") == "c"
+
+def test_runner_caches_per_token_budget_and_refreshes_on_request(cache, api):
+    assert model_runner.run_llm_model("m", "prompt", max_tokens=100)[0] == "answer 1"
+    assert model_runner.run_llm_model("m", "prompt", max_tokens=100) == ("answer 1", 0.0)
+    assert model_runner.run_llm_model("m", "prompt", max_tokens=2000)[0] == "answer 2"
+    assert model_runner.run_llm_model("m", "prompt", max_tokens=100, refresh_cache=True)[0] == "answer 3"
+    assert model_runner.run_llm_model("m", "prompt", max_tokens=100)[0] == "answer 3"
+    assert len(api) == 3
+
+def test_async_runner_keeps_sqlite_off_the_event_loop(cache, api, monkeypatch):
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(cache, name)
+        def traced(*args, method=method):
+            threads.append(threading.current_thread())
+            return method(*args)
+        monkeypatch.setattr(cache, name, traced)
+
+    async def run():
+        first = await model_runner.run_llm_model_async("m", "prompt")
+        second = await model_runner.run_llm_model_async("m", "prompt")
+        return first, second, threading.current_thread()
+
+    first, second, loop_thread = asyncio.run(run())
+    assert first[0] == second[0] == "answer 1" and second[1] == 0.0
+    assert len(threads) == 3 and loop_thread not in threads
@@ -0,0 +1,56 @@
+# Versioned SQLite store of product memories (ProductMemoryStore)
+import sqlite3
+from memory_manager import ProductMemory
+from memory_store import ProductMemoryStore
+from Utils.helpers import review_fingerprint
+
+def build_memory(reviews: int = 30) -> ProductMemory:
+    memory = ProductMemory("Phone / 64GB")
+    for i in range(reviews):
+        negative = i % 3 == 0
+        result = {"sentiment_category": "negative" if negative else "positive", "sentiment_score": -0.6 if negative else 0.7,
+                  "model_confidence": 0.9, "key_drivers": ["battery drain" if negative else "battery life"],
+                  "emotional_intensity": 0.8, "justification": f"justification {i % 4}"}
+        row = {"customer_review": f"review {i}", "customer_name": f"customer {i}", "review_date": f"{1 + i % 28:02d}-{1 + i % 12:02d}-2020"}
+        context = dict(row, verified_purchase=True, reviewer_name=row["customer_name"], review_fingerprint=review_fingerprint(row))
+        memory.update(result, context)
+    return memory
+
+def test_round_trip_restores_aggregates_and_history(tmp_path):
+    store = ProductMemoryStore(str(tmp_path))
+    memory = build_memory()
+    store.save(memory)
+
+    restored = store.load(memory.product_name, with_history=True)
+    assert restored.to_state() == memory.to_state()
+    assert list(restored.sentiment_history) == list(memory.sentiment_history)
+    assert restored.generate_summary() == memory.generate_summary()
+    assert store.list_products() == [memory.product_name]
+    assert store.load_aggregate(memory.product_name, "usps") == dict(memory.usps)
+    assert store.load_history(memory.product_name, limit=2) == list(memory.sentiment_history)[-2:]
+
+def test_fingerprints_are_loaded_on_first_access(tmp_path):
+    store = ProductMemoryStore(str(tmp_path))
+    memory = build_memory()
+    store.save(memory)
+
+    restored = store.load(memory.product_name)
+    assert restored.fingerprint_loader is not None and restored._fingerprints == set()
+    assert restored.stats == memory.stats
+    assert restored.has_absorbed(next(iter(memory.fingerprints)))
+    assert restored.fingerprint_loader is None and restored.fingerprints == memory.fingerprints
+
+def test_reads_do_not_wait_for_a_save_in_progress(tmp_path):
+    store = ProductMemoryStore(str(tmp_path))
+    memory = build_memory()
+    store.save(memory)
+
+    writer = sqlite3.connect(store.path(memory.product_name), timeout=0)
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM history")
+        restored = store.load(memory.product_name, with_history=True)
+    finally:
+        writer.rollback()
+        writer.close()
+    assert len(restored.sentiment_history) == len(memory.sentiment_history)
@@ -0,0 +1,44 @@
+# Lazy, opt-in NLTK data lookups (ensure_nltk_resource)
+import socket
+import time
+import nltk
+import pytest
+from Utils import helpers
+
+@pytest.fixture
+def missing_data(monkeypatch):
+    """Makes every NLTK data package look missing and records download attempts."""
+    attempts = []
+    def find(path):
+        raise LookupError(path)
+    monkeypatch.setattr(nltk.data, "find", find)
+    helpers.ensure_nltk_resource.cache_clear()
+    yield attempts
+    helpers.ensure_nltk_resource.cache_clear()
+
+def test_missing_data_is_not_downloaded_by_default(monkeypatch, missing_data):
+    monkeypatch.setattr(helpers, "NLTK_ALLOW_DOWNLOADS", False)
+    monkeypatch.setattr(nltk, "download", lambda *args, **kwargs: missing_data.append(args))
+    assert helpers.ensure_nltk_resource("stopwords") is False
+    assert missing_data == []
+    assert helpers.tokenize_words("Battery isn't great.") == ["Battery", "isn", "'", "t", "great", "."]
+    assert "the" in helpers.english_stopwords()
+
+def test_hanging_download_is_abandoned_after_the_timeout(monkeypatch, missing_data):
+    monkeypatch.setattr(helpers, "NLTK_ALLOW_DOWNLOADS", True)
+    monkeypatch.setattr(helpers, "NLTK_DOWNLOAD_TIMEOUT", 0.2)
+    def hang(*args, **kwargs):
+        missing_data.append(args)
+        time.sleep(5)
+    monkeypatch.setattr(nltk, "download", hang)
+    default_timeout = socket.getdefaulttimeout()
+    start = time.monotonic()
+    assert helpers.ensure_nltk_resource("punkt") is False
+    assert time.monotonic() - start < 2
+    assert len(missing_data) == 1
+    assert socket.getdefaulttimeout() == default_timeout
+
+def test_allowed_download_reports_success(monkeypatch, missing_data):
+    monkeypatch.setattr(helpers, "NLTK_ALLOW_DOWNLOADS", True)
+    monkeypatch.setattr(nltk, "download", lambda *args, **kwargs: True)
+    assert helpers.ensure_nltk_resource("punkt") is True
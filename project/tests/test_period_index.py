@@ -0,0 +1,39 @@
+# Time spans and range totals of the per-period sentiment index
+from datetime import date
+from Utils.period_index import PeriodIndex
+
+def monthly_index() -> PeriodIndex:
+    """Returns an index with one positive review on the 15th of every month of 2020 and a negative one in December."""
+    index = PeriodIndex()
+    for month in range(1, 13):
+        index.add(date(2020, month, 15), "positive", 0.8)
+    index.add(date(2020, 12, 20), "negative", -0.4)
+    return index
+
+def test_month_spans_end_at_latest_period():
+    index = monthly_index()
+    assert [label for label, _ in index.span("quarter")] == ["10-2020", "11-2020", "12-2020"]
+    assert len(index.span("historical")) == 12
+    december = index.span("month")[0][1]
+    assert (december["positive"], december["negative"], december["score_count"]) == (1, 1, 2)
+    assert abs(december["average_sentiment_score"] - 0.2) < 1e-9
+
+def test_span_not_longer_than_history_is_unavailable():
+    index = monthly_index()
+    assert index.span("year") is None
+    assert PeriodIndex().span("historical") is None
+
+def test_day_and_week_spans_use_calendar_months():
+    index = PeriodIndex()
+    for day in (date(2020, 1, 15), date(2020, 2, 20), date(2020, 3, 1), date(2020, 3, 31)):
+        index.add(day, "positive", 0.5)
+    assert [label for label, _ in index.span("month", "day")] == ["01-03-2020", "31-03-2020"]
+    assert index.span("month", "week")[-1][0] == "2020-W14"
+
+def test_range_totals_and_state_round_trip():
+    index = monthly_index()
+    series = index.series["month"]
+    totals = series.totals(*index.span_bounds("quarter"))
+    assert (totals["positive"], totals["negative"], totals["periods"]) == (3, 1, 3)
+    restored = PeriodIndex.from_state(index.to_state())
+    assert restored.span("quarter") == index.span("quarter")
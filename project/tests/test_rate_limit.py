@@ -0,0 +1,56 @@
+# Request spacing of the shared limiter and fair scheduling across tenants
+import asyncio
+from Core.rate_limit import FairShareLimiter, SharedRateLimiter, current_tenant, get_rate_limiter, set_rate_limiter
+
+def test_shared_limiter_spaces_reserved_slots():
+    limiter = SharedRateLimiter(600)
+    waits = [limiter.reserve() for _ in range(3)]
+    assert waits[0] == 0.0
+    assert abs(waits[1] - 0.1) < 0.01 and abs(waits[2] - 0.2) < 0.01
+
+def test_shared_limiter_allows_burst_after_idle_period():
+    limiter = SharedRateLimiter(60, burst=3)
+    assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.reserve() > 0.9
+
+def test_process_wide_limiter_can_be_installed_and_removed():
+    limiter = SharedRateLimiter(60)
+    set_rate_limiter(limiter)
+    try:
+        assert get_rate_limiter() is limiter
+    finally:
+        set_rate_limiter(None)
+    assert get_rate_limiter() is None
+
+def test_small_tenant_is_not_starved_by_large_one():
+    async def run():
+        limiter = FairShareLimiter(requests_per_minute=60 * 200)
+        order = []
+
+        async def request(tenant):
+            current_tenant.set(tenant)
+            await limiter.acquire_async(100)
+            order.append(tenant)
+
+        async def tenant_requests(tenant, count):
+            await asyncio.gather(*(request(tenant) for _ in range(count)))
+
+        await asyncio.gather(tenant_requests("large", 30), tenant_requests("small", 3))
+        return order, limiter.granted
+
+    order, granted = asyncio.run(run())
+    assert granted["large"]["requests"] == 30 and granted["small"]["requests"] == 3
+    assert granted["small"]["tokens"] == 300
+    assert max(position for position, tenant in enumerate(order) if tenant == "small") < 8
+
+def test_sync_callers_only_wait_for_upstream():
+    class Upstream:
+        def __init__(self):
+            self.tokens = []
+
+        def acquire(self, tokens=0):
+            self.tokens.append(tokens)
+
+    upstream = Upstream()
+    FairShareLimiter(requests_per_minute=1, upstream=upstream).acquire(42)
+    assert upstream.tokens == [42]
@@ -0,0 +1,63 @@
+# Retry classification, adaptive concurrency and circuit breaking of the request controller
+import asyncio
+import time
+import openai
+from Core.resilience import RequestController, is_retryable, parse_duration, retry_hint
+
+def throttled(headers=None):
+    return openai.error.RateLimitError("rate limited", http_status=429, headers=headers)
+
+def server_error():
+    return openai.error.ServiceUnavailableError("unavailable", http_status=503)
+
+def test_retryable_errors_and_retry_hints():
+    assert is_retryable(throttled()) and is_retryable(server_error())
+    assert is_retryable(openai.error.Timeout("timed out"))
+    assert not is_retryable(openai.error.InvalidRequestError("bad request", None, http_status=400))
+    assert [parse_duration(value) for value in ("1.5", "20ms", "6m0s", "soon")] == [1.5, 0.02, 360.0, None]
+    assert retry_hint(throttled({"Retry-After": "2"})) == 2.0
+    assert retry_hint(throttled({"retry-after-ms": "250", "Retry-After": "2"})) == 0.25
+    assert retry_hint(server_error()) is None
+
+def test_retry_delay_prefers_hint_and_bounds_backoff():
+    controller = RequestController(base_delay=0.5, max_delay=2.0, max_breaker_cooldown=60.0)
+    assert controller.retry_delay(throttled({"Retry-After": "3"}), 0) == 3.0
+    assert all(0.0 <= controller.retry_delay(server_error(), 10) <= 2.0 for _ in range(50))
+
+def test_concurrency_grows_on_success_and_halves_on_throttling():
+    controller = RequestController(initial_concurrency=4, decrease_interval=0.0)
+    for _ in range(5):
+        controller.acquire()
+        controller.release()
+    assert 5.0 < controller.limit < 5.2
+    assert [controller.try_acquire() for _ in range(6)] == [0.0] * 5 + [float("inf")]
+    limit = controller.limit
+    controller.release(throttled())
+    assert controller.limit == limit / 2
+    assert controller.summary()["throttled"] == 1
+
+def test_breaker_opens_on_server_errors_and_closes_after_probe():
+    controller = RequestController(breaker_window=4, breaker_threshold=0.5, breaker_cooldown=0.05)
+    for error in (None, server_error(), None, server_error()):
+        controller.acquire()
+        controller.release(error)
+    assert controller.state == "open"
+    assert controller.try_acquire() > 0
+    time.sleep(0.06)
+    assert controller.try_acquire() == 0.0
+    assert controller.state == "half_open" and controller.try_acquire() == float("inf")
+    controller.release()
+    assert controller.state == "closed"
+    assert controller.summary()["breaker_trips"] == 1
+
+def test_async_waiter_is_woken_by_release():
+    async def run():
+        controller = RequestController(initial_concurrency=1, max_concurrency=1)
+        await controller.acquire_async()
+        waiting = asyncio.ensure_future(controller.acquire_async())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        controller.release()
+        await asyncio.wait_for(waiting, 1.0)
+        return controller.in_flight
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,45 @@
+# Bounded-memory driver sketch and justification sample
+from collections import Counter
+from Utils.sketches import Reservoir, SpaceSaving
+
+def test_space_saving_tracks_heavy_hitters_within_capacity():
+    sketch, true_counts = SpaceSaving(capacity=10), Counter()
+    for i in range(1000):
+        item = "battery" if i % 3 == 0 else "display" if i % 5 == 0 else f"rare {i}"
+        sketch.add(item)
+        true_counts[item] += 1
+    assert len(sketch) == 10
+    assert sketch.total == 1000
+    assert [item for item, _ in sketch.top(2, guaranteed=True)] == ["battery", "display"]
+    for item, count in sketch.top():
+        assert count - sketch.errors[item] <= true_counts[item] <= count
+
+def test_space_saving_error_bounds_true_count():
+    sketch = SpaceSaving(capacity=2)
+    for item in ["a", "a", "b", "c", "a"]:
+        sketch.add(item)
+    assert sketch.counts == {"a": 3, "c": 2}
+    assert sketch.errors == {"a": 0, "c": 1}
+    assert sketch.top(guaranteed=True) == [("a", 3), ("c", 1)]
+
+def test_reservoir_keeps_capacity_items_of_the_stream():
+    reservoir = Reservoir(capacity=10, seed=3)
+    for i in range(500):
+        reservoir.add(i)
+    assert len(reservoir) == 10
+    assert reservoir.seen == 500
+    assert len(set(reservoir.items)) == 10 and all(0 <= item < 500 for item in reservoir.items)
+
+def test_restored_sketches_continue_deterministically():
+    sketch, reservoir = SpaceSaving(capacity=3), Reservoir(capacity=4, seed=1)
+    for i in range(50):
+        sketch.add(f"driver {i % 7}")
+        reservoir.add(i)
+    restored_sketch, restored_reservoir = SpaceSaving.from_state(sketch.to_state()), Reservoir.from_state(reservoir.to_state())
+    assert restored_sketch.top() == sketch.top()
+    other = Reservoir.from_state(reservoir.to_state())
+    for i in range(50, 100):
+        restored_reservoir.add(i)
+        other.add(i)
+    assert restored_reservoir.items == other.items
+    assert restored_reservoir.seen == 100
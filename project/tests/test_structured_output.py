@@ -0,0 +1,35 @@
+# Extraction and local repair of LLM JSON responses
+from Core.structured_output import Schema, extract_json, extract_json_list, repair
+
+SUMMARY = Schema({"summary": str}, {"model_confidence": (float, 0.0)})
+DRIVER = Schema({"feature": str, "positive_mentions": int}, {"model_confidence": (float, 0.0)})
+USPS = Schema({"top_usps": DRIVER, "model_confidence": float})
+
+def test_repair_fixes_commas_and_python_literals():
+    assert repair('{"a": 1 "b": [1, 2,], "c": True, "d": None,}') == {"a": 1, "b": [1, 2], "c": True, "d": None}
+
+def test_repair_closes_truncated_fragments():
+    assert repair('{"summary": "Customers like it but the batt') == {"summary": "Customers like it but the batt"}
+    assert repair('{"items": [{"a": 1}, {"a": 2}, {"a": 3') == {"items": [{"a": 1}, {"a": 2}, {"a": 3}]}
+    assert repair('{"a": 1, "b": ') == {"a": 1}
+
+def test_extract_json_reads_fenced_object_and_coerces_fields():
+    text = '''Sure! ```json
+{"top_usps": [{"feature": "battery", "positive_mentions": "42", "justification": "lasts {long}"},
+ {"feature": "screen", "positive_mentions": 3, "model_confidence": 0.95},]
+ "model_confidence": 0.93,}
+```'''
+    result = extract_json(text, USPS, agent="usp", model="test-model")
+    assert result["model_confidence"] == 0.93
+    assert [(usp["feature"], usp["positive_mentions"], usp["model_confidence"]) for usp in result["top_usps"]] == [("battery", 42, 0.0), ("screen", 3, 0.95)]
+
+def test_extract_json_skips_objects_that_do_not_validate():
+    text = 'Example: {"answer": 1}. Result: {"summary": "Solid phone", "model_confidence": "0.8"}'
+    assert extract_json(text, SUMMARY) == {"summary": "Solid phone", "model_confidence": 0.8}
+    assert extract_json("no json here", SUMMARY) is None
+
+def test_extract_json_list_keeps_complete_records_of_truncated_array():
+    text = '[{"feature": "battery", "positive_mentions": 4}, {"feature": "camera"}, {"feature": "scr'
+    records = extract_json_list(text, DRIVER)
+    assert records[0] == {"feature": "battery", "positive_mentions": 4, "model_confidence": 0.0}
+    assert records[1] is None